@@ -0,0 +1,86 @@
+import os
+import random
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+SAMPLE_CATALOGUE = os.path.join(SRC_DIR, "labels", "label_data.txt")
+
+CATALOGUE_SIZES = {
+    "1k": 1000,
+    "10k": 10000,
+    "100k": 100000,
+    "1m": 1000000,
+}
+
+# Label sizes as they appear in real catalogues: the 3.5*3.5 circle labels,
+# the common rectangles (with the stray spaces people type) and a few
+# larger ones. Weights are roughly what the sample catalogue holds.
+DIMENSIONS = ["3.5*3.5", "4.0*2.5", "4.5* 3", "4.5*3", "5*3", "6.0*4.0", "9*6"]
+DIMENSION_WEIGHTS = [25, 35, 15, 10, 8, 5, 2]
+INVALID_DIMENSIONS = ["", "4.5", "abc*3", "4*3*2", "-1*3"]
+PACK_SIZES = ["50g", "100g", "200g", "250g", "500g", "1kg"]
+GRADES = ["", "", "", "Organic ", "Premium ", "Home-made "]
+
+
+def _name_pool():
+    # Product names from the sample catalogue: English with the Tamil name
+    # in brackets, which exercises the Tamil font markup path.
+    names = []
+    with open(SAMPLE_CATALOGUE, encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            name = line.rstrip("\r\n").split("\t")[0]
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def iter_catalogue_rows(rows, seed=0, invalid_ratio=0.01, english_only_ratio=0.2):
+    # Yields (product name, dimensions) pairs. Names vary in grade and pack
+    # size so the fit cache sees a realistic number of distinct labels.
+    rng = random.Random(seed)
+    names = _name_pool()
+    english_names = [name.split("(")[0].strip() for name in names]
+    for _ in range(rows):
+        if rng.random() < english_only_ratio:
+            name = rng.choice(english_names)
+        else:
+            name = rng.choice(names)
+        product = f"{rng.choice(GRADES)}{name} {rng.choice(PACK_SIZES)}"
+        if rng.random() < invalid_ratio:
+            dimensions = rng.choice(INVALID_DIMENSIONS)
+        else:
+            dimensions = rng.choices(DIMENSIONS, DIMENSION_WEIGHTS)[0]
+        yield product, dimensions
+
+
+def write_catalogue(path, rows, seed=0, **kwargs):
+    # Tab-separated, UTF-8, with the same header as label_data.txt.
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Product Name\tDimensions\r\n")
+        for product, dimensions in iter_catalogue_rows(rows, seed, **kwargs):
+            f.write(f"{product}\t{dimensions}\r\n")
+    return path
+
+
+def synthetic_house(walls, rooms, seed=0, img_size=(800, 600)):
+    # House with randomly placed walls and rooms inside `img_size`.
+    from src.design.house import House, Wall
+
+    rng = random.Random(seed)
+    width, height = img_size
+    house = House()
+    colors = ["lightblue", "lightgreen", "lightyellow", "mistyrose", "lavender"]
+    for _ in range(rooms):
+        w = rng.randint(40, width // 3)
+        h = rng.randint(40, height // 3)
+        house.add_room({
+            "x": rng.randint(0, width - w), "y": rng.randint(0, height - h),
+            "width": w, "height": h, "color": rng.choice(colors),
+        })
+    for _ in range(walls):
+        if rng.random() < 0.5:
+            w, h = rng.randint(20, width // 2), 10
+        else:
+            w, h = 10, rng.randint(20, height // 2)
+        house.add_wall(Wall(rng.randint(0, width - w), rng.randint(0, height - h), w, h))
+    return house
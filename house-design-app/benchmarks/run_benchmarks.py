@@ -0,0 +1,328 @@
+"""Benchmarks for label PDF generation (with and without the output cache),
+the frame layout scripts, the 2D house renderer and module import times.
+
+Every case runs in a fresh process so its peak memory is its own. Results
+are written as JSON to benchmarks/results/ (or --output); pass an earlier
+results file with --compare to see what got slower.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --labels 1k,10k,100k,1m --workers 4
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.normpath(os.path.join(BENCH_DIR, os.pardir))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_TAMIL_FONT = os.path.join(BENCH_DIR, os.pardir, os.pardir, "NotoSansTamil-Regular.ttf")
+
+FRAME_SCRIPTS = ["create_frame", "new_frame", "bed_frame"]
+HOUSE_SIZES = { # (walls, rooms, image size)
+    "small": (4, 3, (800, 600)),
+    "large": (400, 300, (800, 600)),
+    "huge": (20000, 20000, (2000, 1500)),
+}
+IMAGE_BACKENDS = ["pillow", "numpy"]
+
+
+def _setup_paths():
+    # The sources are the `src` package under the app directory.
+    for path in (APP_DIR, BENCH_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _peak_rss_bytes():
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _timings(samples):
+    return {
+        "repeat": len(samples),
+        "min_seconds": min(samples),
+        "median_seconds": statistics.median(samples),
+        "max_seconds": max(samples),
+    }
+
+
+def bench_labels(rows, tamil_font=None, workers=1, seed=0):
+    import logging
+    from catalogues import write_catalogue
+    from src.labels.label_print import create_labels_pdf
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        catalogue_path = os.path.join(tmp_dir, "catalogue.txt")
+        output_path = os.path.join(tmp_dir, "labels.pdf")
+        started = time.perf_counter()
+        write_catalogue(catalogue_path, rows, seed)
+        generate_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report = create_labels_pdf(
+            catalogue_path, output_path, tamil_font_path=tamil_font, font_size_product=12, workers=workers,
+        )
+        wall_seconds = time.perf_counter() - started
+        return {
+            "rows": rows,
+            "workers": workers,
+            "wall_seconds": wall_seconds,
+            "generate_seconds": generate_seconds,
+            "output_bytes": os.path.getsize(output_path),
+            "labels": report.labels,
+            "pages": report.pages,
+            "rejected_rows": report.validation.rejected_count,
+            "phases": report.timings,
+        }
+
+
+def bench_labels_cache(rows, tamil_font=None, seed=0):
+    # Label PDFs through a page-level output cache: a cold run, the same
+    # catalogue again (a whole-PDF hit) and the catalogue with one product
+    # renamed, which should redraw one page. The headline is the last.
+    import logging
+    from catalogues import write_catalogue
+    from src.labels.label_print import create_labels_pdf
+    from src.output_cache import OutputCache
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        catalogue_path = os.path.join(tmp_dir, "catalogue.txt")
+        edited_path = os.path.join(tmp_dir, "edited.txt")
+        output_path = os.path.join(tmp_dir, "labels.pdf")
+        write_catalogue(catalogue_path, rows, seed)
+        with open(catalogue_path, encoding="utf-8", newline="") as f:
+            lines = f.read().split("\r\n")
+        middle = len(lines) // 2
+        lines[middle] = "Renamed product\t" + lines[middle].split("\t", 1)[1]
+        with open(edited_path, "w", encoding="utf-8", newline="") as f:
+            f.write("\r\n".join(lines))
+
+        cache = OutputCache(os.path.join(tmp_dir, "cache"))
+        seconds = {}
+        for run, path in (("cold", catalogue_path), ("hit", catalogue_path), ("edited", edited_path)):
+            started = time.perf_counter()
+            report = create_labels_pdf(path, output_path, tamil_font_path=tamil_font, font_size_product=12,
+                                       cache=cache, cache_pages=True)
+            seconds[run] = time.perf_counter() - started
+        return {
+            "rows": rows,
+            "wall_seconds": seconds["edited"],
+            "cold_seconds": seconds["cold"],
+            "hit_seconds": seconds["hit"],
+            "pages": report.pages,
+            "cached_pages": report.cached_pages,
+            "cache": cache.stats(),
+        }
+
+
+def bench_frame_script(script, repeat=5):
+    # Each run executes the whole script as `python -m` would, in a scratch
+    # dir. The first run also pays for the renderer's imports (matplotlib
+    # for the agg backend), so it is reported on its own as first_seconds.
+    module = f"src.labels.{script}"
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd, argv = os.getcwd(), sys.argv
+        os.chdir(tmp_dir)
+        sys.argv = [module] # the scripts read an optional image path from their arguments
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    runpy.run_module(module, run_name="__main__")
+                samples.append(time.perf_counter() - started)
+            output_bytes = sum(os.path.getsize(name) for name in os.listdir(tmp_dir))
+        finally:
+            os.chdir(cwd)
+            sys.argv = argv
+    result = _timings(samples)
+    result.update(first_seconds=samples[0], output_bytes=output_bytes)
+    return result
+
+
+def bench_image2d(walls, rooms, repeat=5, img_size=(800, 600), backend="pillow"):
+    from catalogues import synthetic_house
+    from src.design.image2d import generate_2d_image
+
+    house = synthetic_house(walls, rooms, img_size=img_size)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        generate_2d_image(house, img_size, backend=backend)
+        samples.append(time.perf_counter() - started)
+    result = _timings(samples)
+    result.update(walls=walls, rooms=rooms, img_size=list(img_size), backend=backend)
+    return result
+
+
+def bench_import(module, repeat=5):
+    # Imports `module` in fresh interpreters; each sample is the import time
+    # `python -X importtime` reports for it.
+    # The modules, budgets and measurement are shared with
+    # tests/test_import_time.py.
+    from tests.test_import_time import IMPORT_BUDGETS, measure_import
+
+    samples = []
+    heavy = set()
+    for _ in range(repeat):
+        seconds, loaded = measure_import(module)
+        samples.append(seconds)
+        heavy |= loaded
+    result = _timings(samples)
+    budget = IMPORT_BUDGETS.get(module)
+    result.update(
+        module=module, heavy_modules=sorted(heavy), budget_seconds=budget,
+        over_budget=bool(heavy) or (budget is not None and result["median_seconds"] > budget),
+    )
+    return result
+
+
+def _run_case(fn_name, kwargs):
+    # Entry point in the child process.
+    _setup_paths()
+    result = globals()[fn_name](**kwargs)
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+
+def run_case(fn_name, **kwargs):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_run_case, (fn_name, kwargs))
+
+
+def build_cases(args):
+    cases = []
+    for size in filter(None, args.labels.split(",")):
+        rows = _parse_rows(size)
+        cases.append((f"labels_{size}", "bench_labels",
+                      dict(rows=rows, tamil_font=args.tamil_font, workers=args.workers)))
+        cases.append((f"labels_cache_{size}", "bench_labels_cache", dict(rows=rows, tamil_font=args.tamil_font)))
+    for script in FRAME_SCRIPTS:
+        cases.append((f"frame_{script}", "bench_frame_script", dict(script=script, repeat=args.repeat)))
+    for name, (walls, rooms, img_size) in HOUSE_SIZES.items():
+        for backend in IMAGE_BACKENDS:
+            suffix = "" if backend == "pillow" else f"_{backend}"
+            cases.append((f"image2d_{name}{suffix}", "bench_image2d",
+                          dict(walls=walls, rooms=rooms, repeat=args.repeat, img_size=img_size, backend=backend)))
+    from tests.test_import_time import IMPORT_BUDGETS
+
+    for module in IMPORT_BUDGETS:
+        cases.append((f"import_{module.split('.')[-1]}", "bench_import", dict(module=module, repeat=args.repeat)))
+    if args.only:
+        prefixes = args.only.split(",")
+        cases = [case for case in cases if case[0].startswith(tuple(prefixes))]
+    return cases
+
+
+def _parse_rows(size):
+    from catalogues import CATALOGUE_SIZES
+    return CATALOGUE_SIZES[size] if size in CATALOGUE_SIZES else int(size)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _headline(result):
+    return result.get("wall_seconds", result.get("median_seconds"))
+
+
+def compare(results, baseline, threshold):
+    # Prints each case's time against the baseline run and returns the names
+    # of cases that got slower by more than `threshold` (e.g. 0.2 = 20%).
+    regressions = []
+    for name, result in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None:
+            continue
+        new_seconds, old_seconds = _headline(result), _headline(old)
+        change = new_seconds / old_seconds - 1 if old_seconds else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:24s} {old_seconds:10.4f}s -> {new_seconds:10.4f}s  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", default="1k,10k,100k",
+                        help="Comma-separated catalogue sizes (1k, 10k, 100k, 1m or a row count)")
+    parser.add_argument("--workers", type=int, default=1, help="Label render workers")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per frame/image case")
+    parser.add_argument("--only", help="Comma-separated case name prefixes to run")
+    parser.add_argument("--tamil-font", default=DEFAULT_TAMIL_FONT if os.path.exists(DEFAULT_TAMIL_FONT) else None)
+    parser.add_argument("--output", help="Results file (default: results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown reported as a regression")
+    args = parser.parse_args(argv)
+    _setup_paths()
+
+    commit = _git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": {},
+    }
+    over_budget = []
+    for name, fn_name, kwargs in build_cases(args):
+        result = run_case(fn_name, **kwargs)
+        results["cases"][name] = result
+        peak = result["peak_rss_bytes"]
+        peak_text = f"{peak / 2**20:8.1f} MiB" if peak else "       n/a"
+        flag = ""
+        if result.get("over_budget"):
+            over_budget.append(name)
+            heavy = ", ".join(result["heavy_modules"])
+            flag = f"  OVER BUDGET ({result['budget_seconds']}s{', imports ' + heavy if heavy else ''})"
+        print(f"{name:24s} {_headline(result):10.4f}s  peak {peak_text}{flag}", flush=True)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,7 @@ setup(
     author='Your Name',
     author_email='your.email@example.com',
     description='A Python application for modeling walls and designing houses in 2D and 3D.',
-    packages=find_packages(where='src'),
-    package_dir={'': 'src'},
+    packages=find_packages(include=['src', 'src.*']),
     install_requires=[
         # List your project dependencies here
     ],
@@ -0,0 +1,8 @@
+import sys
+
+from .cli import main
+
+# `python -m src <command> [args]`; see cli.py for the commands.
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+# Files written so that readers, and a crash half way, never see half of
+# one: the data goes to a temporary file beside the target, which then
+# replaces it.
+
+
+def move_into_place(tmp_path, path):
+    # Moves a mkstemp file to `path` with the permissions open() would have
+    # given it; mkstemp makes it readable by its owner only.
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_path, 0o666 & ~umask)
+    os.replace(tmp_path, path)
+
+
+def write_atomic(path, write, mode='w', encoding=None):
+    # Calls write(f) on a temporary file that then replaces `path`.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            write(f)
+        move_into_place(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_output(output, data):
+    # Writes `data` to `output`, a file path (atomically) or a writable
+    # binary stream.
+    if isinstance(output, (str, os.PathLike)):
+        write_atomic(output, lambda f: f.write(data), 'wb')
+    else:
+        output.write(data)
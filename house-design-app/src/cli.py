@@ -0,0 +1,428 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import runpy
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .atomic_write import move_into_place, write_atomic
+from .output_cache import CACHE_DIR_ENV, DEFAULT_MAX_BYTES, OutputCache
+
+# `python -m src <command>`: batch commands that turn many input files into
+# outputs, plus the example scripts.
+#
+#   labels        label tables (.txt, .csv, .xlsx) -> label PDFs
+#   render-house  saved house layouts (.json, .hplan) -> PNG/WebP plans
+#   frame-layout  saved gallery wall layouts (.json) -> PNG, SVG or PDF
+#
+# Inputs are files, globs (quote them; ** recurses) or directories, which
+# are searched recursively for the command's file types. An output goes in
+# --output-dir under the input's name with the new suffix; inputs found in a
+# directory keep their path below it. Inputs are rendered across --jobs
+# processes. Each output directory keeps a manifest of the SHA-256 key every
+# output was made from (the input's bytes, the options and any files they
+# name, such as fonts), and inputs whose output exists with the same key are
+# skipped. With --cache-dir, renders also go through an output_cache
+# shared by every run and output directory, so an input already rendered
+# elsewhere is copied rather than drawn, and --cache-pages lets a label
+# table with a few changed rows redraw only their pages. The run ends with
+# a throughput summary and exits 1 if any input failed.
+
+MANIFEST = '.outputs.json' # in each output directory: output path -> key
+KEY_VERSION = 1 # part of every key; bump when the same input and options draw differently
+UNKEYED_OPTIONS = ('cache_dir', 'cache_mb') # options that never change an output
+
+EXAMPLES = { # name -> (module under this package, description)
+    'house': ('design.image2d', "Draw the example house to house_2d.png"),
+    'create-frame': ('labels.create_frame', "Lay out and draw the create_frame gallery wall"),
+    'new-frame': ('labels.new_frame', "Lay out and draw the new_frame gallery wall"),
+    'bed-frame': ('labels.bed_frame', "Lay out and draw the bed_frame gallery wall"),
+}
+
+# One input to render: its output path and the key the output is made from.
+Job = namedtuple('Job', ['source', 'output', 'key'])
+# How a job went; `counts` are what the command made (labels, pages, ...)
+# and `error` is None unless it failed.
+JobResult = namedtuple('JobResult', ['job', 'bytes', 'seconds', 'counts', 'error'])
+
+_label_renderers = {} # sorted options -> LabelRenderer, one set per process
+_output_caches = {} # (directory, MiB) -> OutputCache, one set per process
+
+
+def _output_cache(options):
+    if not options.get('cache_dir'):
+        return None
+    key = (options['cache_dir'], options['cache_mb'])
+    cache = _output_caches.get(key)
+    if cache is None:
+        max_bytes = DEFAULT_MAX_BYTES if options['cache_mb'] is None else int(options['cache_mb'] * 1024 * 1024)
+        cache = _output_caches[key] = OutputCache(options['cache_dir'], max_bytes)
+    return cache
+
+
+def _render_labels(source, output, options):
+    from .labels.label_print import LabelRenderer
+
+    key = tuple(sorted(options.items()))
+    renderer = _label_renderers.get(key)
+    if renderer is None:
+        settings = {name: value for name, value in options.items() if name not in ('format',) + UNKEYED_OPTIONS}
+        renderer = _label_renderers[key] = LabelRenderer(cache=_output_cache(options), **settings)
+    report = renderer.render(source, output)
+    return {'labels': report.labels, 'pages': report.pages}
+
+
+def _render_house(source, output, options):
+    from .design.batch import IMAGE_FORMATS
+    from .design.house_io import load_house
+    from .design.image2d import generate_2d_image
+
+    image = generate_2d_image(load_house(source), tuple(options['size']), backend=options['backend'],
+                              cache=_output_cache(options))
+    image.save(output, IMAGE_FORMATS[options['format']])
+    return {'houses': 1}
+
+
+def _render_frame_layout(source, output, options):
+    from .design.house_io import load_frame_layout
+    from .labels.frame_layout import placed_layout
+
+    wall_size, frames = load_frame_layout(source)
+    layout = placed_layout(wall_size, frames)
+    scene_options = {
+        'title': options['title'] or os.path.splitext(os.path.basename(source))[0],
+        'labels': {frame['name']: frame['label'] for frame in frames if 'label' in frame},
+        'guides': options['guides'],
+        'measure': options['measure'],
+    }
+    if options['format'] == 'png':
+        from .labels.frame_render import render_layout
+
+        render_layout(layout, output, backend=options['backend'], cache=_output_cache(options), **scene_options)
+    else:
+        from .labels.frame_vector import export_layouts
+
+        export_layouts(layout, output, options['scale'], **scene_options)
+    return {'frames': len(frames)}
+
+
+def _label_options(args):
+    return {
+        'format': 'pdf',
+        'product_col_name': args.product_column,
+        'dimensions_col_name': args.dimensions_column,
+        'tamil_font_path': args.tamil_font,
+        'font_size_product': args.font_size,
+        'layout_strategy': args.layout,
+        'cache_pages': args.cache_pages,
+    }
+
+
+def _house_options(args):
+    return {'format': args.format, 'size': list(args.size), 'backend': args.backend}
+
+
+def _frame_layout_options(args):
+    return {
+        'format': args.format,
+        'backend': args.backend,
+        'scale': args.scale,
+        'title': args.title,
+        'guides': args.guides,
+        'measure': args.measure,
+    }
+
+
+# name -> (render function, input suffixes, options from the arguments,
+# option names holding paths of files the output depends on)
+Command = namedtuple('Command', ['render', 'suffixes', 'options', 'depends_on'])
+
+COMMANDS = {
+    'labels': Command(_render_labels, ('.txt', '.csv', '.xlsx'), _label_options, ('tamil_font_path',)),
+    'render-house': Command(_render_house, ('.json', '.hplan'), _house_options, ()),
+    'frame-layout': Command(_render_frame_layout, ('.json',), _frame_layout_options, ()),
+}
+
+
+def expand_inputs(patterns, suffixes):
+    # (input path, path under the output directory without suffix) for each
+    # file, in order and without repeats. Paths that match nothing are kept,
+    # so they fail as missing files.
+    found = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, names in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    if name.lower().endswith(suffixes) and not name.startswith('.'):
+                        found.setdefault(path, os.path.splitext(os.path.relpath(path, pattern))[0])
+        elif glob.has_magic(pattern):
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    found.setdefault(path, os.path.splitext(os.path.basename(path))[0])
+        else:
+            found.setdefault(pattern, os.path.splitext(os.path.basename(pattern))[0])
+    return list(found.items())
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+
+def job_key(command, options, source):
+    # SHA-256 over the command, its options, the input and the files the
+    # options name.
+    keyed = {name: value for name, value in options.items() if name not in UNKEYED_OPTIONS}
+    digest = hashlib.sha256(json.dumps([KEY_VERSION, command, keyed], sort_keys=True).encode())
+    for name in COMMANDS[command].depends_on:
+        if options.get(name) and os.path.isfile(options[name]):
+            _hash_file(digest, options[name])
+    _hash_file(digest, source)
+    return digest.hexdigest()
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_manifest(output_dir, manifest):
+    write_atomic(os.path.join(output_dir, MANIFEST), lambda f: json.dump(manifest, f, indent=1, sort_keys=True),
+                 encoding='utf-8')
+
+
+def _run_job(render, job, options):
+    # Renders to a temporary file beside the output and moves it into place,
+    # so an output is never left half written.
+    started = time.perf_counter()
+    directory = os.path.dirname(job.output)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix=os.path.splitext(job.output)[1], dir=directory)
+    os.close(fd)
+    try:
+        counts = render(job.source, tmp_path, options)
+        move_into_place(tmp_path, job.output)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return JobResult(job, 0, time.perf_counter() - started, {}, f"{type(e).__name__}: {e}")
+    return JobResult(job, os.path.getsize(job.output), time.perf_counter() - started, counts, None)
+
+
+def _run_jobs(render, jobs, options, workers):
+    # Yields a JobResult per job as each finishes.
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _run_job(render, job, options)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(_run_job, render, job, options) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+class RunSummary:
+    def __init__(self, command):
+        self.command = command
+        self.inputs = 0
+        self.skipped = 0
+        self.results = []
+        self.total_seconds = 0.0
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def bytes_written(self):
+        return sum(result.bytes for result in self.results)
+
+    def counts(self):
+        totals = {}
+        for result in self.results:
+            for name, value in result.counts.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def as_dict(self):
+        return {
+            'command': self.command,
+            'inputs': self.inputs,
+            'rendered': len(self.results) - len(self.failed),
+            'up_to_date': self.skipped,
+            'failed': len(self.failed),
+            'total_seconds': self.total_seconds,
+            'bytes_written': self.bytes_written,
+            'counts': self.counts(),
+        }
+
+    def lines(self):
+        seconds = self.total_seconds
+        rate = (lambda value: value / seconds) if seconds else (lambda value: 0.0)
+        rendered = len(self.results) - len(self.failed)
+        lines = [
+            f"{self.command}: {self.inputs} inputs, {rendered} rendered, {self.skipped} up to date, "
+            f"{len(self.failed)} failed in {seconds:.2f} s",
+            f"  {rate(rendered):.1f} inputs/s, {self.bytes_written / 1e6:.2f} MB written "
+            f"({rate(self.bytes_written) / 1e6:.2f} MB/s)",
+        ]
+        counts = self.counts()
+        if counts:
+            lines.append("  " + ", ".join(f"{value} {name} ({rate(value):.1f}/s)" for name, value in counts.items()))
+        return lines
+
+
+def run_command(command, inputs, output_dir, options, jobs=None, force=False, report=None):
+    # Renders every input of `command` that is not already up to date in
+    # `output_dir`. `report(result)` is called as each input finishes.
+    # Returns a RunSummary.
+    spec = COMMANDS[command]
+    summary = RunSummary(command)
+    started = time.perf_counter()
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+
+    pending = []
+    claimed = {}
+    for source, name in expand_inputs(inputs, spec.suffixes):
+        output_name = f"{name}.{options['format']}".replace(os.sep, '/')
+        if output_name in claimed:
+            raise ValueError(f"'{source}' and '{claimed[output_name]}' would both write {output_name}")
+        claimed[output_name] = source
+        summary.inputs += 1
+        try:
+            key = job_key(command, options, source)
+        except OSError as e:
+            result = JobResult(Job(source, output_name, None), 0, 0.0, {}, f"{type(e).__name__}: {e}")
+            summary.results.append(result)
+            if report is not None:
+                report(result)
+            continue
+        output = os.path.join(output_dir, *output_name.split('/'))
+        if not force and manifest.get(output_name) == key and os.path.exists(output):
+            summary.skipped += 1
+            continue
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        pending.append(Job(source, output, key))
+
+    try:
+        for result in _run_jobs(spec.render, pending, options, jobs or os.cpu_count() or 1):
+            summary.results.append(result)
+            output_name = os.path.relpath(result.job.output, output_dir).replace(os.sep, '/')
+            if result.error is None:
+                manifest[output_name] = result.job.key
+            else:
+                manifest.pop(output_name, None)
+            if report is not None:
+                report(result)
+    finally:
+        if pending:
+            _save_manifest(output_dir, manifest)
+        summary.total_seconds = time.perf_counter() - started
+    return summary
+
+
+def _size(text):
+    width, _, height = text.lower().partition('x')
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'")
+
+
+def _run_batch(args):
+    options = COMMANDS[args.command].options(args)
+    options.update(cache_dir=args.cache_dir, cache_mb=args.cache_mb)
+
+    def report(result):
+        if result.error is not None:
+            print(f"failed {result.job.source}: {result.error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"{result.job.source} -> {result.job.output} ({result.seconds:.2f} s)")
+
+    try:
+        summary = run_command(args.command, args.inputs, args.output_dir, options, args.jobs, args.force, report)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for line in summary.lines():
+        print(line)
+    return 1 if summary.failed else 0
+
+
+def _run_example(args):
+    module = f"{__package__ or 'src'}.{EXAMPLES[args.command][0]}"
+    sys.argv = [module] + args.args
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+    return 0
+
+
+def _add_batch_options(parser, default_output):
+    parser.add_argument('inputs', nargs='+', help="input files, globs or directories")
+    parser.add_argument('-o', '--output-dir', default=default_output, help="where outputs go (default: %(default)s)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="processes to render with (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="render inputs even if their outputs are up to date")
+    parser.add_argument('-q', '--quiet', action='store_true', help="only print failures and the summary")
+    parser.add_argument('--cache-dir', default=os.environ.get(CACHE_DIR_ENV),
+                        help=f"output cache shared between runs (default: ${CACHE_DIR_ENV})")
+    parser.add_argument('--cache-mb', type=float, default=None, help="output cache size limit in MiB")
+    parser.set_defaults(func=_run_batch)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src', description="House design and label tools.")
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+
+    labels = commands.add_parser('labels', help="Print label tables to PDFs")
+    _add_batch_options(labels, 'labels_out')
+    labels.add_argument('--product-column', default="Product Name")
+    labels.add_argument('--dimensions-column', default="Dimensions")
+    labels.add_argument('--tamil-font', default=None, help="path of the Tamil .ttf font")
+    labels.add_argument('--font-size', type=int, default=10)
+    labels.add_argument('--layout', default='shelf', help="label_layout strategy (default: %(default)s)")
+    labels.add_argument('--cache-pages', action='store_true', help="cache single pages too (needs --cache-dir)")
+
+    house = commands.add_parser('render-house', help="Draw saved house layouts as images")
+    _add_batch_options(house, 'houses_out')
+    house.add_argument('--format', choices=('png', 'webp'), default='png')
+    house.add_argument('--size', type=_size, default=(800, 600), help="WIDTHxHEIGHT in pixels (default: 800x600)")
+    house.add_argument('--backend', choices=('pillow', 'numpy'), default='pillow')
+
+    frames = commands.add_parser('frame-layout', help="Draw saved gallery wall layouts")
+    _add_batch_options(frames, 'frames_out')
+    frames.add_argument('--format', choices=('png', 'svg', 'pdf'), default='png')
+    frames.add_argument('--backend', choices=('agg', 'pillow'), default='agg', help="PNG renderer")
+    frames.add_argument('--scale', type=float, default=0.1, help="SVG/PDF drawing scale, 0.1 for 1:10 (default: %(default)s)")
+    frames.add_argument('--title', default=None, help="title on every wall (default: the input's name)")
+    frames.add_argument('--guides', action='store_true', help="draw guide lines")
+    frames.add_argument('--measure', choices=('top', 'both'), default=None,
+                        help="mark distances from the top (and bottom) of the wall")
+
+    for name, (_, description) in EXAMPLES.items():
+        example = commands.add_parser(name, help=f"Example: {description[0].lower()}{description[1:]}")
+        example.add_argument('args', nargs=argparse.REMAINDER)
+        example.set_defaults(func=_run_example)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+    return args.func(args)
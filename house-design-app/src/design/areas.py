@@ -0,0 +1,184 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Areas of sets of axis-aligned rectangles where overlaps count once, for
+# cost estimates that simple width * height sums get wrong wherever walls
+# meet at corners or rooms overlap.
+#
+# union_area works on the grid of distinct x and y edges. When that grid
+# is small next to the number of rectangles, as for plans drawn on whole
+# units, every cell's cover count comes from a 2D difference array and two
+# cumulative sums, all in NumPy. Otherwise it sweeps a line along x over a
+# segment tree of the distinct y edges: each rectangle enters and leaves
+# the tree once and the covered length under the line is read at the root,
+# so n rectangles take O(n log n) rather than the O(n^2) of checking pairs.
+
+# The grid is used while it has at most this many cells per rectangle;
+# past that, filling it takes longer than the sweep.
+GRID_CELLS_PER_BOX = 500
+# Cells of the grid held in memory at a time
+GRID_STRIP_CELLS = 1 << 22
+
+# Area figures for a house (see area_report):
+#   wall_area      ground the walls cover, each spot counted once
+#   wall_overlap   area counted twice or more by summing wall areas
+#   room_area      ground the rooms cover, each spot counted once
+#   room_overlap   area shared by two or more rooms
+#   room_net_areas per room, its area minus the part walls cover
+#   gap_area       area inside the plan's bounding box covered by neither
+#                  a wall nor a room
+AreaReport = namedtuple(
+    'AreaReport',
+    ['wall_area', 'wall_overlap', 'room_area', 'room_overlap', 'room_net_areas', 'gap_area'],
+)
+
+
+def union_area(x0, y0, x1, y1):
+    # Area of the union of the boxes with corners (x0, y0) and (x1, y1),
+    # given as arrays; empty boxes are ignored.
+    x0, x1 = np.minimum(x0, x1), np.maximum(x0, x1)
+    y0, y1 = np.minimum(y0, y1), np.maximum(y0, y1)
+    keep = (x1 > x0) & (y1 > y0)
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    count = len(x0)
+    if count < 2:
+        return float(((x1 - x0) * (y1 - y0)).sum())
+
+    # Edges are indices into the distinct coordinates: box i runs from
+    # x_edges[i] to x_edges[count + i], and likewise in y.
+    xs, x_edges = np.unique(np.concatenate([x0, x1]), return_inverse=True)
+    ys, y_edges = np.unique(np.concatenate([y0, y1]), return_inverse=True)
+    if len(xs) * len(ys) <= GRID_CELLS_PER_BOX * count:
+        return _grid_area(xs, x_edges, ys, y_edges)
+    return _sweep_area(np.concatenate([x0, x1]), ys, y_edges)
+
+
+def _grid_area(xs, x_edges, ys, y_edges):
+    # Each box adds 1 at its low corner and high corner and -1 at the other
+    # two; summing that up along both axes gives every cell's cover count.
+    # Runs of x are filled a strip at a time, carrying the sums across.
+    count = len(x_edges) // 2
+    low_x, high_x = x_edges[:count], x_edges[count:]
+    low_y, high_y = y_edges[:count], y_edges[count:]
+    rows = np.concatenate([low_x, low_x, high_x, high_x])
+    cols = np.concatenate([low_y, high_y, low_y, high_y])
+    signs = np.repeat(np.array([1, -1, -1, 1]), count)
+    order = np.argsort(rows, kind='stable')
+    rows, cols, signs = rows[order], cols[order], signs[order]
+
+    widths, heights = np.diff(xs), np.diff(ys)
+    strip = max(1, GRID_STRIP_CELLS // len(ys))
+    carry = np.zeros(len(ys), dtype=np.int32)
+    area = 0.0
+    for start in range(0, len(widths), strip):
+        stop = min(start + strip, len(widths))
+        first, last = np.searchsorted(rows, [start, stop])
+        steps = np.bincount((rows[first:last] - start) * len(ys) + cols[first:last], weights=signs[first:last],
+                            minlength=(stop - start) * len(ys)).astype(np.int32).reshape(stop - start, len(ys))
+        along_x = carry + np.cumsum(steps, axis=0, dtype=np.int32)
+        carry = along_x[-1]
+        covered = np.cumsum(along_x[:, :-1], axis=1, dtype=np.int32) > 0
+        area += float(widths[start:stop] @ covered @ heights)
+    return area
+
+
+def _sweep_area(xs, ys, edges):
+    # `xs` are the boxes' left then right edges, unsorted.
+    count = len(xs) // 2
+
+    # Leaves are the gaps between consecutive distinct y edges; each node
+    # knows its length, how many boxes cover all of it, and how much of it
+    # is covered.
+    segments = len(ys) - 1
+    size = 1 << (segments - 1).bit_length()
+    length = [0.0] * (2 * size)
+    length[size:size + segments] = np.diff(ys).tolist()
+    for node in range(size - 1, 0, -1):
+        length[node] = length[2 * node] + length[2 * node + 1]
+    covers = [0] * (2 * size)
+    covered = [0.0] * (2 * size)
+
+    # Events are a box's left edge (entering, event < count) or right edge.
+    order = np.argsort(xs, kind='stable')
+    low = edges[:count].tolist() * 2
+    high = edges[count:].tolist() * 2
+    area = 0.0
+    last_x = float(xs[order[0]])
+    for x, event in zip(xs[order].tolist(), order.tolist()):
+        area += covered[1] * (x - last_x)
+        last_x = x
+        delta = 1 if event < count else -1
+        left = low[event] + size
+        right = high[event] + size
+        first, last = left, right - 1
+        while left < right:
+            if left & 1:
+                covers[left] += delta
+                covered[left] = length[left] if covers[left] else (
+                    covered[2 * left] + covered[2 * left + 1] if left < size else 0.0)
+                left += 1
+            if right & 1:
+                right -= 1
+                covers[right] += delta
+                covered[right] = length[right] if covers[right] else (
+                    covered[2 * right] + covered[2 * right + 1] if right < size else 0.0)
+            left >>= 1
+            right >>= 1
+        for node in (first >> 1, last >> 1):
+            while node:
+                covered[node] = length[node] if covers[node] else covered[2 * node] + covered[2 * node + 1]
+                node >>= 1
+    return area
+
+
+def _corners(*columns):
+    # (x0, y0, x1, y1) arrays over every rectangle of the RectColumns given.
+    x = np.concatenate([c.x for c in columns])
+    y = np.concatenate([c.y for c in columns])
+    width = np.concatenate([c.width for c in columns])
+    height = np.concatenate([c.height for c in columns])
+    return x, y, x + width, y + height
+
+
+def columns_area(*columns):
+    # Union area of the rectangles in one or more RectColumns.
+    return union_area(*_corners(*columns))
+
+
+def net_areas(rooms, walls, walls_in):
+    # Per room, its area less the union of the walls inside it. `walls_in`
+    # is a region query returning wall indices, e.g. House.walls_in, so
+    # large plans look at nearby walls only.
+    rx0, ry0, rx1, ry1 = _corners(rooms)
+    rx0, rx1 = np.minimum(rx0, rx1), np.maximum(rx0, rx1)
+    ry0, ry1 = np.minimum(ry0, ry1), np.maximum(ry0, ry1)
+    net = (rx1 - rx0) * (ry1 - ry0)
+    wx0, wy0, wx1, wy1 = _corners(walls)
+    for i, box in enumerate(zip(rx0.tolist(), ry0.tolist(), rx1.tolist(), ry1.tolist())):
+        found = walls_in(*box)
+        if len(found):
+            # Walls clipped to the room; ones only touching it clip to nothing.
+            net[i] -= union_area(np.maximum(wx0[found], box[0]), np.maximum(wy0[found], box[1]),
+                                 np.minimum(wx1[found], box[2]), np.minimum(wy1[found], box[3]))
+    return net
+
+
+def area_report(house):
+    walls = house.wall_columns
+    rooms = house.room_columns
+    wall_area = house.total_area()
+    room_area = house.room_area()
+    bounds = house.bounding_box()
+    gap_area = 0.0
+    if bounds is not None:
+        plan_area = (bounds[2] - bounds[0]) * (bounds[3] - bounds[1])
+        gap_area = max(plan_area - columns_area(walls, rooms), 0.0)
+    return AreaReport(
+        wall_area=wall_area,
+        wall_overlap=max(float(np.abs(walls.areas()).sum()) - wall_area, 0.0),
+        room_area=room_area,
+        room_overlap=max(float(np.abs(rooms.areas()).sum()) - room_area, 0.0),
+        room_net_areas=house.room_net_areas(),
+        gap_area=gap_area,
+    )
@@ -0,0 +1,224 @@
+import io
+import os
+import statistics
+import time
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import PIL
+from PIL import features
+
+from ..output_cache import cache_key, code_version, file_digest
+from .house_io import load_house
+from .image2d import generate_2d_image
+
+IMAGE_FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+
+# One rendered house: `latency` is from submission to being written out,
+# `render_seconds` / `encode_seconds` the work itself in the worker.
+BatchItem = namedtuple('BatchItem', ['name', 'path', 'bytes', 'latency', 'render_seconds', 'encode_seconds'])
+
+
+class BatchReport:
+    def __init__(self):
+        self.items = []
+        self.total_seconds = 0.0
+        self.cached = 0 # items taken from the output cache
+
+    @property
+    def bytes_written(self):
+        return sum(item.bytes for item in self.items)
+
+    @property
+    def throughput(self):
+        # Houses per second over the whole batch
+        return len(self.items) / self.total_seconds if self.total_seconds else 0.0
+
+    def latency_stats(self):
+        latencies = sorted(item.latency for item in self.items)
+        if not latencies:
+            return {}
+        return {
+            'mean': statistics.fmean(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+            'max': latencies[-1],
+        }
+
+    def as_dict(self):
+        return {
+            'houses': len(self.items),
+            'total_seconds': self.total_seconds,
+            'houses_per_second': self.throughput,
+            'bytes_written': self.bytes_written,
+            'cached': self.cached,
+            'latency_seconds': self.latency_stats(),
+            'render_seconds': sum(item.render_seconds for item in self.items),
+            'encode_seconds': sum(item.encode_seconds for item in self.items),
+        }
+
+
+def _save_options(image_format, compress_level, quality, lossless):
+    if image_format == 'PNG':
+        return {'compress_level': compress_level}
+    return {'quality': quality, 'lossless': lossless, 'method': 4}
+
+
+def _render_encoded(house, img_size, backend, image_format, save_options):
+    started = time.perf_counter()
+    if isinstance(house, (str, os.PathLike)):
+        house = load_house(house)
+    image = generate_2d_image(house, img_size, backend=backend)
+    rendered = time.perf_counter()
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **save_options)
+    return buffer.getvalue(), rendered - started, time.perf_counter() - rendered
+
+
+def _cache_key(house, img_size, backend, image_format, save_options):
+    # Saved layouts are keyed by their file contents, so workers still load
+    # them; houses by their layout hash.
+    digest = file_digest(house) if isinstance(house, (str, os.PathLike)) else house.layout_hash()
+    return cache_key('batch', code_version(generate_2d_image.__module__), PIL.__version__, digest,
+                     list(img_size), backend, image_format, save_options)
+
+
+class _DirectoryWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, filename, data):
+        path = os.path.join(self.path, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def close(self):
+        pass
+
+
+class _ZipWriter:
+    def __init__(self, path):
+        self.path = path
+        # Images are already compressed; deflating them again only costs time.
+        self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+
+    def write(self, filename, data):
+        self.archive.writestr(filename, data)
+        return f"{self.path}:{filename}"
+
+    def close(self):
+        self.archive.close()
+
+
+def _iter_named(houses):
+    # Items are houses, saved layout paths or (name, house) pairs. Two items
+    # with one name (say a/plan.json and b/plan.json) would write the same
+    # file, so the second raises ValueError.
+    claimed = {}
+    for i, item in enumerate(houses):
+        if isinstance(item, tuple):
+            name, house = item
+        elif isinstance(item, (str, os.PathLike)):
+            name, house = os.path.splitext(os.path.basename(item))[0], item
+        else:
+            name, house = f"house_{i:05d}", item
+        source = os.fspath(house) if isinstance(house, (str, os.PathLike)) else f"item {i}"
+        if name in claimed:
+            raise ValueError(f"'{source}' and '{claimed[name]}' would both be written as {name}")
+        claimed[name] = source
+        yield name, house
+
+
+def render_houses(
+    houses,
+    output,
+    img_size=(800, 600),
+    image_format="png",
+    compress_level=6, # PNG zlib level, 0 (fastest) to 9 (smallest)
+    quality=80, # WebP quality
+    lossless=False, # WebP lossless mode
+    backend="pillow", # generate_2d_image backend
+    workers=None, # processes; None for one per CPU, 1 renders in this process
+    max_in_flight=None, # houses submitted but not yet written; defaults to 2 per worker
+    progress=None, # called as progress(houses_done, item) after each house is written
+    cache=None, # optional output_cache.OutputCache of encoded images, checked before rendering
+):
+    # Renders each house and writes it as an image into `output`, a
+    # directory or a .zip file, in input order. `houses` may be any iterable
+    # (e.g. a generator of design variants) and may hold paths of saved
+    # layouts (see house_io), which workers load themselves; it is consumed
+    # lazily, so memory stays bounded by max_in_flight however many houses
+    # there are.
+    # Returns a BatchReport.
+    image_format = IMAGE_FORMATS.get(image_format.lower())
+    if image_format is None:
+        raise ValueError(f"Unknown image format. Use one of: {', '.join(IMAGE_FORMATS)}.")
+    if image_format == 'WEBP' and not features.check('webp'):
+        raise ValueError("This Pillow build cannot write WebP images.")
+    extension = image_format.lower()
+    save_options = _save_options(image_format, compress_level, quality, lossless)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    writer = _ZipWriter(output) if str(output).lower().endswith('.zip') else _DirectoryWriter(output)
+    report = BatchReport()
+    started = time.perf_counter()
+
+    def lookup(house):
+        # (key to store the result under, or None; finished result on a hit)
+        if cache is None:
+            return None, None
+        key = _cache_key(house, img_size, backend, image_format, save_options)
+        data = cache.get(key)
+        if data is None:
+            return key, None
+        report.cached += 1
+        return None, (data, 0.0, 0.0)
+
+    def finish(name, submitted_at, result, key=None):
+        data, render_seconds, encode_seconds = result
+        if key is not None:
+            cache.put(key, data)
+        path = writer.write(f"{name}.{extension}", data)
+        item = BatchItem(name, path, len(data), time.perf_counter() - submitted_at, render_seconds, encode_seconds)
+        report.items.append(item)
+        if progress is not None:
+            progress(len(report.items), item)
+
+    try:
+        if workers == 1:
+            for name, house in _iter_named(houses):
+                submitted_at = time.perf_counter()
+                key, result = lookup(house)
+                if result is None:
+                    result = _render_encoded(house, img_size, backend, image_format, save_options)
+                finish(name, submitted_at, result, key)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for name, house in _iter_named(houses):
+                    if len(pending) >= max_in_flight:
+                        finish(*_result(pending.popleft()))
+                    submitted_at = time.perf_counter()
+                    key, result = lookup(house)
+                    if result is None:
+                        future = pool.submit(_render_encoded, house, img_size, backend, image_format, save_options)
+                    else:
+                        # Hits queue up like renders, so output stays in input order.
+                        future = Future()
+                        future.set_result(result)
+                    pending.append((name, submitted_at, future, key))
+                while pending:
+                    finish(*_result(pending.popleft()))
+    finally:
+        writer.close()
+    report.total_seconds = time.perf_counter() - started
+    return report
+
+
+def _result(entry):
+    name, submitted_at, future, key = entry
+    return name, submitted_at, future.result(), key
@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Overlap and bounds checks for placed rectangles: frames on a wall, or the
+# walls and rooms of a House.
+#
+# The broad phase is sort-and-sweep: boxes are sorted by their low edge on
+# one axis, and each box is paired only with the boxes that start before
+# it ends, found by a binary search. The axis giving fewer candidate pairs
+# is used, and candidates are then checked exactly on both axes. Boxes
+# that merely touch do not collide.
+
+# Overlaps shallower than this are rounding, not collisions.
+TOLERANCE = 1e-9
+
+# Candidate pairs checked per NumPy batch, which bounds memory when many
+# boxes overlap along both axes.
+MAX_CANDIDATES = 1 << 22
+
+# `pairs` is a (k, 2) array of indices i < j of colliding boxes, sorted;
+# `out_of_bounds` the sorted indices of boxes reaching past the bounds.
+Collisions = namedtuple('Collisions', ['pairs', 'out_of_bounds'])
+
+# check_house results, as (k, 2) index arrays and index arrays.
+# `room_walls` pairs are (room index, wall index).
+HouseCollisions = namedtuple(
+    'HouseCollisions',
+    ['wall_pairs', 'room_pairs', 'room_walls', 'walls_out_of_bounds', 'rooms_out_of_bounds'],
+)
+
+
+def _sweep_axis(low, high, tolerance):
+    # Sorted order along one axis and, per sorted box, how many of the boxes
+    # after it start before it ends.
+    order = np.argsort(low, kind='stable')
+    ends = np.searchsorted(low[order], high[order] - tolerance, 'left')
+    counts = np.maximum(ends - np.arange(len(low)) - 1, 0)
+    return order, counts
+
+
+def overlapping_pairs(x0, y0, x1, y1, tolerance=TOLERANCE):
+    # (k, 2) array of index pairs i < j whose boxes overlap by more than
+    # `tolerance` along both axes. Corners are arrays with x0 <= x1 and
+    # y0 <= y1.
+    x0, y0, x1, y1 = (np.asarray(a, dtype=float) for a in (x0, y0, x1, y1))
+    count = len(x0)
+    if count < 2:
+        return np.empty((0, 2), dtype=np.intp)
+    order, counts = min((_sweep_axis(x0, x1, tolerance), _sweep_axis(y0, y1, tolerance)),
+                        key=lambda sweep: int(sweep[1].sum()))
+
+    found = []
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < count:
+        done = int(cumulative[start - 1]) if start else 0
+        stop = max(int(np.searchsorted(cumulative, done + MAX_CANDIDATES, 'right')), start + 1)
+        batch = counts[start:stop]
+        first = np.repeat(np.arange(start, stop), batch)
+        second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(batch) - batch, batch)
+        a, b = order[first], order[second]
+        hit = ((np.minimum(x1[a], x1[b]) - np.maximum(x0[a], x0[b]) > tolerance)
+               & (np.minimum(y1[a], y1[b]) - np.maximum(y0[a], y0[b]) > tolerance))
+        found.append(np.column_stack([np.minimum(a[hit], b[hit]), np.maximum(a[hit], b[hit])]))
+        start = stop
+    pairs = np.concatenate(found)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def out_of_bounds(x0, y0, x1, y1, bounds, tolerance=TOLERANCE):
+    # Indices of boxes reaching past `bounds`, an (x0, y0, x1, y1) box, by
+    # more than `tolerance`.
+    bx0, by0, bx1, by1 = bounds
+    past = ((np.asarray(x0) < bx0 - tolerance) | (np.asarray(y0) < by0 - tolerance)
+            | (np.asarray(x1) > bx1 + tolerance) | (np.asarray(y1) > by1 + tolerance))
+    return np.flatnonzero(past)
+
+
+def check_boxes(x0, y0, x1, y1, bounds=None, clearance=0.0, tolerance=TOLERANCE):
+    # Collisions among boxes given by their corners. With `clearance`, boxes
+    # closer together than that also collide; `bounds` is checked against
+    # the boxes themselves.
+    x0, y0, x1, y1 = (np.asarray(a, dtype=float) for a in (x0, y0, x1, y1))
+    x0, x1 = np.minimum(x0, x1), np.maximum(x0, x1)
+    y0, y1 = np.minimum(y0, y1), np.maximum(y0, y1)
+    half = clearance / 2
+    pairs = overlapping_pairs(x0 - half, y0 - half, x1 + half, y1 + half, tolerance)
+    outside = np.empty(0, dtype=np.intp) if bounds is None else out_of_bounds(x0, y0, x1, y1, bounds, tolerance)
+    return Collisions(pairs, outside)
+
+
+def _corners(columns):
+    return columns.x, columns.y, columns.x + columns.width, columns.y + columns.height
+
+
+def check_columns(columns, bounds=None, clearance=0.0, tolerance=TOLERANCE):
+    # check_boxes over the rectangles of a RectColumns.
+    return check_boxes(*_corners(columns), bounds, clearance, tolerance)
+
+
+def check_house(house, bounds=None, tolerance=TOLERANCE):
+    # Overlaps between walls, between rooms and between rooms and walls,
+    # plus walls and rooms past `bounds` (e.g. the plot) if given. Walls
+    # overlapping at corners are reported too; callers usually only care
+    # about room_pairs and room_walls.
+    walls = house.wall_columns
+    rooms = house.room_columns
+    wall_count = len(walls)
+    corners = [np.concatenate(pair) for pair in zip(_corners(walls), _corners(rooms))]
+    found = check_boxes(*corners, bounds, 0.0, tolerance)
+    pairs = found.pairs
+    # Pairs are i < j over walls then rooms, so a mixed pair is (wall, room).
+    is_room = pairs >= wall_count
+    mixed = pairs[is_room[:, 1] & ~is_room[:, 0]]
+    outside = found.out_of_bounds
+    return HouseCollisions(
+        wall_pairs=pairs[~is_room[:, 1]],
+        room_pairs=pairs[is_room[:, 0]] - wall_count,
+        room_walls=np.column_stack([mixed[:, 1] - wall_count, mixed[:, 0]]),
+        walls_out_of_bounds=outside[outside < wall_count],
+        rooms_out_of_bounds=outside[outside >= wall_count] - wall_count,
+    )
+
+
+def check_frames(wall_size, frames, clearance=0.0, tolerance=TOLERANCE):
+    # Collisions on a gallery wall, for frames in the form
+    # house_io.save_frame_layout stores (dicts with name, x, y, width and
+    # height). Returns Collisions holding frame names: (name, name) pairs
+    # and the names of frames past the wall.
+    names = [frame['name'] for frame in frames]
+    x0 = np.array([frame['x'] for frame in frames], dtype=float)
+    y0 = np.array([frame['y'] for frame in frames], dtype=float)
+    x1 = x0 + np.array([frame['width'] for frame in frames], dtype=float)
+    y1 = y0 + np.array([frame['height'] for frame in frames], dtype=float)
+    found = check_boxes(x0, y0, x1, y1, (0.0, 0.0) + tuple(wall_size), clearance, tolerance)
+    return Collisions([(names[i], names[j]) for i, j in found.pairs.tolist()],
+                      [names[i] for i in found.out_of_bounds.tolist()])
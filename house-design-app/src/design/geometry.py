@@ -0,0 +1,415 @@
+import math
+
+import numpy as np
+
+# Column order in RectColumns.data
+X, Y, WIDTH, HEIGHT = range(4)
+FIELDS = ('x', 'y', 'width', 'height')
+
+# An element covering more grid cells than this is kept out of the grid and
+# checked on every query instead, so one huge room cannot flood the index.
+MAX_CELLS_PER_ELEMENT = 64
+
+# Queries expected to gather more candidates than this share of all elements
+# scan every element instead; past that, collecting and de-duplicating the
+# candidates cell by cell costs more than one vectorized pass.
+MAX_CANDIDATE_SHARE = 1 / 32
+
+
+class RectColumns:
+    # Axis-aligned rectangles stored column-wise: data[X], data[Y], data[WIDTH]
+    # and data[HEIGHT] are float arrays with one entry per rectangle. Grows
+    # by doubling like a list. `version` changes on every edit so derived
+    # structures (like a GridIndex) know when to rebuild, and `listener`, if
+    # set, is called as listener(old_box, new_box) with the (x0, y0, x1, y1)
+    # extent an edit covered before and after (None for a side that has no
+    # extent, e.g. the old side of an append).
+
+    def __init__(self, capacity=16):
+        self.data = np.zeros((4, capacity))
+        self.size = 0
+        self.version = 0
+        self.listener = None
+
+    @classmethod
+    def from_arrays(cls, x, y, width, height):
+        return cls.wrap(np.array([x, y, width, height], dtype=float).reshape(4, -1))
+
+    @classmethod
+    def wrap(cls, data):
+        # Uses a (4, n) float array as is, e.g. a memory map; it is only
+        # copied when rectangles are appended.
+        columns = cls(0)
+        columns.data = data
+        columns.size = data.shape[1]
+        return columns
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def x(self):
+        return self.data[X, :self.size]
+
+    @property
+    def y(self):
+        return self.data[Y, :self.size]
+
+    @property
+    def width(self):
+        return self.data[WIDTH, :self.size]
+
+    @property
+    def height(self):
+        return self.data[HEIGHT, :self.size]
+
+    def _reserve(self, count):
+        needed = self.size + count
+        capacity = self.data.shape[1]
+        if needed > capacity:
+            grown = np.zeros((4, max(needed, 2 * capacity, 16)))
+            grown[:, :self.size] = self.data[:, :self.size]
+            self.data = grown
+
+    def append(self, x, y, width, height):
+        self._reserve(1)
+        index = self.size
+        self.data[:, index] = (x, y, width, height)
+        self.size += 1
+        self.touch(None, self.box(index))
+        return index
+
+    def extend(self, x, y, width, height):
+        # Appends many rectangles at once; returns the index of the first.
+        values = np.array([x, y, width, height], dtype=float).reshape(4, -1)
+        start = self.size
+        self._reserve(values.shape[1])
+        self.data[:, start:start + values.shape[1]] = values
+        self.size += values.shape[1]
+        self.touch(None, _bounds(*values) if values.shape[1] else None)
+        return start
+
+    def insert(self, index, x, y, width, height):
+        # Inserts before `index`, clamped like list.insert; later rectangles
+        # move up one. Returns the index used.
+        index = _insert_position(index, self.size)
+        self._reserve(1)
+        self.data[:, index + 1:self.size + 1] = self.data[:, index:self.size]
+        self.data[:, index] = (x, y, width, height)
+        self.size += 1
+        self.touch(None, self.box(index))
+        return index
+
+    def replace(self, index, x, y, width, height):
+        index = self._position(index)
+        old_box = self.box(index)
+        self.data[:, index] = (x, y, width, height)
+        self.touch(old_box, self.box(index))
+
+    def remove(self, index):
+        # Later rectangles move down one.
+        index = self._position(index)
+        old_box = self.box(index)
+        self.data[:, index:self.size - 1] = self.data[:, index + 1:self.size]
+        self.size -= 1
+        self.touch(old_box, None)
+
+    def _position(self, index):
+        if not -self.size <= index < self.size:
+            raise IndexError(index)
+        return index % self.size
+
+    def get(self, index, field):
+        return float(self.data[field, self._position(index)])
+
+    def set(self, index, field, value):
+        index = self._position(index)
+        old_box = self.box(index)
+        self.data[field, index] = value
+        self.touch(old_box, self.box(index))
+
+    def box(self, index):
+        x, y, width, height = self.data[:, index % self.size]
+        return (float(x), float(y), float(x + width), float(y + height))
+
+    def touch(self, old_box, new_box):
+        # Records an edit; see the class comment.
+        self.version += 1
+        if self.listener is not None:
+            self.listener(old_box, new_box)
+
+    def areas(self):
+        return self.width * self.height
+
+    def bounds(self):
+        # (min_x, min_y, max_x, max_y) over all rectangles, or None if empty.
+        if not self.size:
+            return None
+        return _bounds(self.x, self.y, self.width, self.height)
+
+    def intersecting(self, x0, y0, x1, y1, indices=None):
+        # Indices of rectangles touching the closed box [x0, x1] x [y0, y1],
+        # optionally restricted to the candidate `indices`.
+        if indices is None:
+            x, y, w, h = self.x, self.y, self.width, self.height
+        else:
+            x, y, w, h = self.data[:, indices]
+        hit = (x <= x1) & (x + w >= x0) & (y <= y1) & (y + h >= y0)
+        found = np.flatnonzero(hit)
+        return found if indices is None else indices[found]
+
+
+# AttrColumns code for an element that does not have the key
+MISSING = -1
+
+
+class AttrColumns:
+    # Per-element attributes (a room's color, name, ...) stored by key: each
+    # key has a palette of the distinct values seen and an int32 code per
+    # element, MISSING where the element lacks the key. Plans repeat a few
+    # colours over thousands of rooms, so this stays small, can be memory
+    # mapped, and lets a renderer resolve each distinct value once.
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self.capacity = capacity
+        self.palettes = {} # key -> list of distinct values
+        self.codes = {} # key -> int32 array of palette positions
+        self._lookup = {} # key -> {value: palette position}, for hashable values
+
+    @classmethod
+    def from_columns(cls, size, palettes, codes):
+        # Wraps existing (possibly memory-mapped) code arrays without copying.
+        attrs = cls(size)
+        attrs.size = size
+        for key, palette in palettes.items():
+            attrs.palettes[key] = list(palette)
+            attrs.codes[key] = codes[key]
+            attrs._lookup[key] = _palette_lookup(palette)
+        return attrs
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        return {
+            'size': self.size,
+            'palettes': self.palettes,
+            'codes': {key: np.asarray(codes[:self.size]) for key, codes in self.codes.items()},
+        }
+
+    def __setstate__(self, state):
+        restored = AttrColumns.from_columns(state['size'], state['palettes'], state['codes'])
+        self.__dict__.update(restored.__dict__)
+
+    def _reserve(self, count):
+        needed = self.size + count
+        if needed > self.capacity:
+            self.capacity = max(needed, 2 * self.capacity, 16)
+            for key, codes in self.codes.items():
+                grown = np.full(self.capacity, MISSING, dtype=np.int32)
+                grown[:self.size] = codes[:self.size]
+                self.codes[key] = grown
+
+    def _code(self, key, value):
+        if key not in self.codes:
+            self.palettes[key] = []
+            self._lookup[key] = {}
+            self.codes[key] = np.full(self.capacity, MISSING, dtype=np.int32)
+        lookup = self._lookup[key]
+        try:
+            code = lookup.get(value)
+        except TypeError: # unhashable values are stored once per element
+            code, lookup = None, None
+        if code is None:
+            code = len(self.palettes[key])
+            self.palettes[key].append(value)
+            if lookup is not None:
+                lookup[value] = code
+        return code
+
+    def append(self, attrs):
+        self._reserve(1)
+        index = self.size
+        self.size += 1
+        for key, value in attrs.items():
+            code = self._code(key, value)
+            self.codes[key][index] = code
+        return index
+
+    def insert(self, index, attrs):
+        # Like RectColumns.insert.
+        index = _insert_position(index, self.size)
+        self._reserve(1)
+        for codes in self.codes.values():
+            codes[index + 1:self.size + 1] = codes[index:self.size]
+            codes[index] = MISSING
+        self.size += 1
+        return self.replace(index, attrs)
+
+    def replace(self, index, attrs):
+        index = self._position(index)
+        for codes in self.codes.values():
+            codes[index] = MISSING
+        for key, value in attrs.items():
+            code = self._code(key, value)
+            self.codes[key][index] = code
+        return index
+
+    def remove(self, index):
+        index = self._position(index)
+        for codes in self.codes.values():
+            codes[index:self.size - 1] = codes[index + 1:self.size]
+        self.size -= 1
+
+    def _position(self, index):
+        if not -self.size <= index < self.size:
+            raise IndexError(index)
+        return index % self.size
+
+    def get(self, index, key):
+        index = self._position(index)
+        codes = self.codes.get(key)
+        code = MISSING if codes is None else int(codes[index])
+        if code == MISSING:
+            raise KeyError(key)
+        return self.palettes[key][code]
+
+    def set(self, index, key, value):
+        index = self._position(index)
+        code = self._code(key, value)
+        self.codes[key][index] = code
+
+    def delete(self, index, key):
+        index = self._position(index)
+        self.get(index, key)
+        self.codes[key][index] = MISSING
+
+    def keys(self, index):
+        index = self._position(index)
+        return [key for key, codes in self.codes.items() if codes[index] != MISSING]
+
+    def row(self, index):
+        return {key: self.get(index, key) for key in self.keys(index)}
+
+    def column(self, key):
+        # (codes, palette) for every element; codes are MISSING where absent.
+        codes = self.codes.get(key)
+        if codes is None:
+            return np.full(self.size, MISSING, dtype=np.int32), []
+        return codes[:self.size], self.palettes[key]
+
+
+def _insert_position(index, size):
+    # Where list.insert(index, ...) would put an item in a list of `size`.
+    if index < 0:
+        index += size
+    return min(max(index, 0), size)
+
+
+def _palette_lookup(palette):
+    lookup = {}
+    for code, value in enumerate(palette):
+        try:
+            lookup.setdefault(value, code)
+        except TypeError:
+            pass
+    return lookup
+
+
+def _bounds(x, y, width, height):
+    return (float(x.min()), float(y.min()),
+            float((x + width).max()), float((y + height).max()))
+
+
+class GridIndex:
+    # Uniform grid over a RectColumns snapshot. Every rectangle is listed
+    # under each cell it overlaps; a query looks up the cells its box covers
+    # and returns the candidates, which the caller filters exactly.
+
+    def __init__(self, columns, cell_size=None):
+        self.version = columns.version
+        self.count = len(columns)
+        x0, y0 = columns.x, columns.y
+        x1, y1 = x0 + columns.width, y0 + columns.height
+        count = len(columns)
+        if cell_size is None:
+            cell_size = self._default_cell_size(columns)
+        self.cell_size = cell_size
+        self.origin = (float(x0.min()), float(y0.min())) if count else (0.0, 0.0)
+
+        cx0, cy0 = self._cell(x0, y0)
+        cx1, cy1 = self._cell(x1, y1)
+        nx = cx1 - cx0 + 1
+        spans = nx * (cy1 - cy0 + 1)
+        large = spans > MAX_CELLS_PER_ELEMENT
+        self.large = np.flatnonzero(large)
+        if count:
+            self.cell_bounds = (int(cx0.min()), int(cy0.min()), int(cx1.max()), int(cy1.max()))
+        else:
+            self.cell_bounds = (0, 0, -1, -1)
+        self.grid_cells = (self.cell_bounds[2] - self.cell_bounds[0] + 1) * (self.cell_bounds[3] - self.cell_bounds[1] + 1)
+
+        small = np.flatnonzero(~large)
+        repeats = spans[small]
+        owners = np.repeat(small, repeats)
+        starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+        offsets = np.arange(len(owners)) - starts
+        cell_x = cx0[owners] + offsets % nx[owners]
+        cell_y = cy0[owners] + offsets // nx[owners]
+        keys = self._key(cell_x, cell_y)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.entries = owners[order]
+
+    @staticmethod
+    def _default_cell_size(columns):
+        # Around one element per cell for evenly spread plans, but never
+        # smaller than a typical element.
+        bounds = columns.bounds()
+        if bounds is None:
+            return 1.0
+        extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1], 1e-9)
+        typical = float(np.median(np.maximum(columns.width, columns.height)))
+        return max(extent / max(np.sqrt(len(columns)), 1.0), typical, 1e-9)
+
+    def _cell(self, x, y):
+        return (np.floor((np.asarray(x) - self.origin[0]) / self.cell_size).astype(np.int64),
+                np.floor((np.asarray(y) - self.origin[1]) / self.cell_size).astype(np.int64))
+
+    @staticmethod
+    def _key(cell_x, cell_y):
+        # Cells are addressed by one int64 so lookups are a searchsorted.
+        return (cell_x + (1 << 31)) << 32 | (cell_y + (1 << 31))
+
+    def candidates(self, x0, y0, x1, y1):
+        # Indices that may touch the box, or None when scanning every
+        # element is the cheaper way to answer it.
+        min_x, min_y, max_x, max_y = self.cell_bounds
+        ox, oy = self.origin
+        cx0 = max(math.floor((x0 - ox) / self.cell_size), min_x)
+        cy0 = max(math.floor((y0 - oy) / self.cell_size), min_y)
+        cx1 = min(math.floor((x1 - ox) / self.cell_size), max_x)
+        cy1 = min(math.floor((y1 - oy) / self.cell_size), max_y)
+        if cx0 > cx1 or cy0 > cy1:
+            return self.large
+        cell_count = (cx1 - cx0 + 1) * (cy1 - cy0 + 1)
+        expected = cell_count * len(self.keys) / self.grid_cells
+        if expected > MAX_CANDIDATE_SHARE * self.count:
+            return None
+        # Keys sort by cell x, then cell y, so each column of cells the box
+        # covers is one contiguous run of entries.
+        cell_x = np.arange(cx0, cx1 + 1)
+        lo = np.searchsorted(self.keys, self._key(cell_x, cy0), 'left')
+        hi = np.searchsorted(self.keys, self._key(cell_x, cy1), 'right')
+        if len(lo) == 1:
+            found = self.entries[lo[0]:hi[0]]
+        else:
+            counts = hi - lo
+            positions = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+            found = self.entries[positions]
+        if cell_count > 1:
+            found = np.unique(found)
+        if len(self.large):
+            found = np.union1d(found, self.large)
+        return found
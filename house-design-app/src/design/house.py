@@ -1,4 +1,31 @@
+import hashlib
+import json
+from collections import deque
+from collections.abc import MutableMapping, MutableSequence
+
+import numpy as np
+
+from .areas import area_report, columns_area, net_areas
+from .collisions import check_house
+from .geometry import AttrColumns, FIELDS, GridIndex, HEIGHT, MISSING, RectColumns, WIDTH, X, Y
+
+# Below this many elements a query scans every element instead of building
+# a spatial index.
+INDEX_THRESHOLD = 4096
+
+# Geometry a room gets when its dict leaves a key out; the same defaults
+# image2d.render_room has always drawn with.
+ROOM_DEFAULTS = {'x': 0, 'y': 0, 'width': 100, 'height': 100}
+ROOM_GEOMETRY = dict(zip(FIELDS, (X, Y, WIDTH, HEIGHT)))
+
+# Edits remembered by House.changes_since; a reader further behind than this
+# has to treat the whole plan as changed.
+CHANGE_LOG_SIZE = 4096
+
+
 class Wall:
+    __slots__ = ('x', 'y', 'width', 'height')
+
     def __init__(self, x, y, width, height):
         self.x = x
         self.y = y
@@ -11,19 +38,365 @@ class Wall:
     def as_dict(self):
         return {'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height}
 
+
+def _column_property(field):
+    def fget(self):
+        return self._columns.get(self._index, field)
+
+    def fset(self, value):
+        self._columns.set(self._index, field, value)
+
+    return property(fget, fset)
+
+
+class WallView:
+    # One wall of a House, read from and written to the house's columns.
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    x = _column_property(X)
+    y = _column_property(Y)
+    width = _column_property(WIDTH)
+    height = _column_property(HEIGHT)
+
+    area = Wall.area
+    as_dict = Wall.as_dict
+
+    def __eq__(self, other):
+        # Views are made on each access, so two views of one wall are equal;
+        # walls.index() and walls.remove() rely on it.
+        if not isinstance(other, WallView):
+            return NotImplemented
+        return self._columns is other._columns and self._index == other._index
+
+    def __hash__(self):
+        return hash((id(self._columns), self._index))
+
+    def __repr__(self):
+        return f"WallView({self.x}, {self.y}, {self.width}, {self.height})"
+
+
+class RoomView(MutableMapping):
+    # One room of a House. Reads like the dict it was added as: geometry keys
+    # come from the house's columns, anything else (color, name, ...) from
+    # its attribute columns.
+    __slots__ = ('_columns', '_attrs', '_index')
+
+    def __init__(self, columns, attrs, index):
+        self._columns = columns
+        self._attrs = attrs
+        self._index = index
+
+    def __getitem__(self, key):
+        field = ROOM_GEOMETRY.get(key)
+        if field is not None:
+            return self._columns.get(self._index, field)
+        return self._attrs.get(self._index, key)
+
+    def __setitem__(self, key, value):
+        field = ROOM_GEOMETRY.get(key)
+        if field is not None:
+            self._columns.set(self._index, field, value)
+        else:
+            self._attrs.set(self._index, key, value)
+            box = self._columns.box(self._index)
+            self._columns.touch(box, box)
+
+    def __delitem__(self, key):
+        if key in ROOM_GEOMETRY:
+            raise KeyError(f"Room geometry '{key}' cannot be removed")
+        self._attrs.delete(self._index, key)
+        box = self._columns.box(self._index)
+        self._columns.touch(box, box)
+
+    def __iter__(self):
+        yield from FIELDS
+        yield from self._attrs.keys(self._index)
+
+    def __len__(self):
+        return len(FIELDS) + len(self._attrs.keys(self._index))
+
+    def __repr__(self):
+        return f"RoomView({dict(self)})"
+
+
+class _ElementList(MutableSequence):
+    # List of views over one kind of House element. Assigning, inserting and
+    # deleting items write through to the columns, as they did on the list
+    # the house used to keep. A view refers to a position, so after an
+    # insert or delete earlier views may show a different element.
+
+    def __init__(self, columns, attrs, make_view, fields):
+        self._columns = columns
+        self._attrs = attrs # None for walls
+        self._make_view = make_view
+        self._fields = fields # element -> (geometry, attrs)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._make_view(i) for i in range(len(self))[index]]
+        if not -len(self) <= index < len(self):
+            raise IndexError("House element index out of range")
+        return self._make_view(index % len(self))
+
+    def __setitem__(self, index, element):
+        if isinstance(index, slice):
+            self._set_slice(index, element)
+        else:
+            self._replace(index, *self._fields(element))
+
+    def _set_slice(self, index, elements):
+        # Values are read before anything moves, so views of this list can be
+        # assigned back to it.
+        values = [self._fields(element) for element in elements]
+        positions = range(len(self))[index]
+        if index.step in (None, 1):
+            for position in reversed(positions):
+                self._remove(position)
+            for offset, (geometry, attrs) in enumerate(values):
+                self._insert(positions.start + offset, geometry, attrs)
+        elif len(values) != len(positions):
+            raise ValueError(f"attempt to assign sequence of size {len(values)} "
+                             f"to extended slice of size {len(positions)}")
+        else:
+            for position, (geometry, attrs) in zip(positions, values):
+                self._replace(position, geometry, attrs)
+
+    def __delitem__(self, index):
+        positions = range(len(self))[index] if isinstance(index, slice) else [index]
+        for position in sorted(positions, reverse=True):
+            self._remove(position)
+
+    def insert(self, index, element):
+        self._insert(index, *self._fields(element))
+
+    def _replace(self, position, geometry, attrs):
+        if self._attrs is not None:
+            self._attrs.replace(position, attrs)
+        self._columns.replace(position, *geometry)
+
+    def _insert(self, index, geometry, attrs):
+        if self._attrs is not None:
+            self._attrs.insert(index, attrs)
+        self._columns.insert(index, *geometry)
+
+    def _remove(self, position):
+        if self._attrs is not None:
+            self._attrs.remove(position)
+        self._columns.remove(position)
+
+
+def _wall_fields(wall):
+    return (wall.x, wall.y, wall.width, wall.height), None
+
+
+def _room_fields(room):
+    geometry = [room.get(key, ROOM_DEFAULTS[key]) for key in FIELDS]
+    return geometry, {key: value for key, value in room.items() if key not in ROOM_GEOMETRY}
+
+
+def _canonical_attr(codes, palette):
+    # An attribute column renumbered so equal rooms give equal arrays
+    # however the palette grew: values are deduplicated and numbered by first
+    # use, with None standing for rooms without the key. Returns (codes,
+    # values).
+    texts = [json.dumps(value, default=str) for value in palette]
+    first_code = {}
+    merged = np.array([first_code.setdefault(text, code) for code, text in enumerate(texts)] + [MISSING],
+                      dtype=np.int64)
+    codes = merged[codes] # MISSING indexes the last entry, which stays MISSING
+    used, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    rank = np.empty(len(used), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(used))
+    values = [None if code == MISSING else palette[code] for code in used[np.argsort(first)].tolist()]
+    return rank[inverse.reshape(-1)], values
+
+
 class House:
+    # Walls and rooms are stored as columns of x/y/width/height (see
+    # geometry.RectColumns), so areas, bounds and region queries are array
+    # operations. `walls` and `rooms` still behave like the lists they used
+    # to be; their items are lightweight views onto the columns. Unlike those
+    # lists, they hold copies: a Wall or dict is read when it is added or
+    # assigned, and editing it afterwards does not change the house.
+    #
+    # `version` counts edits, and the regions recent edits touched are kept
+    # so a renderer can repaint only those (see changes_since). Edits must go
+    # through the House API or the views to be seen.
+
     def __init__(self):
-        self.walls = []
-        self.rooms = []
+        self.wall_columns = RectColumns()
+        self.room_columns = RectColumns()
+        self.room_attrs = AttrColumns() # non-geometry room fields (color, ...)
+        self._init_views()
+
+    def _init_views(self):
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE) # (version, box) per edited region
+        self._forgotten_version = 0 # changes up to this version fell off the log
+        self.wall_columns.listener = self._record_change
+        self.room_columns.listener = self._record_change
+        self.walls = _ElementList(
+            self.wall_columns, None, lambda i: WallView(self.wall_columns, i), _wall_fields)
+        self.rooms = _ElementList(
+            self.room_columns, self.room_attrs, lambda i: RoomView(self.room_columns, self.room_attrs, i),
+            _room_fields)
+        self._indexes = {} # 'walls' / 'rooms' -> GridIndex, rebuilt after edits
+        self._hash = None # (versions, digest) of the last layout_hash()
+        self._areas = (None, {}) # (versions, {figure: value}) for the area methods
+
+    def __getstate__(self):
+        # Views and indexes are rebuilt on unpickling, e.g. in worker processes.
+        return {
+            'walls': self.wall_columns.data[:, :len(self.wall_columns)],
+            'rooms': self.room_columns.data[:, :len(self.room_columns)],
+            'room_attrs': self.room_attrs,
+        }
+
+    def __setstate__(self, state):
+        self.wall_columns = RectColumns.from_arrays(*state['walls'])
+        self.room_columns = RectColumns.from_arrays(*state['rooms'])
+        self.room_attrs = state['room_attrs']
+        self._init_views()
+
+    @classmethod
+    def from_columns(cls, wall_columns, room_columns, room_attrs):
+        # Builds a house around existing storage, e.g. memory-mapped columns
+        # from house_io.load_binary, without copying it.
+        house = cls.__new__(cls)
+        house.wall_columns = wall_columns
+        house.room_columns = room_columns
+        house.room_attrs = room_attrs
+        house._init_views()
+        return house
+
+    def _record_change(self, old_box, new_box):
+        self.version += 1
+        for box in (old_box, new_box):
+            if box is not None:
+                if len(self._changes) == self._changes.maxlen:
+                    self._forgotten_version = self._changes[0][0]
+                self._changes.append((self.version, box))
+
+    def changes_since(self, version):
+        # (x0, y0, x1, y1) plan regions edited after `version`, old and new
+        # extents both included. None if the log no longer reaches back that
+        # far, in which case everything should be treated as changed.
+        if version < self._forgotten_version:
+            return None
+        return [box for changed_at, box in self._changes if changed_at > version]
 
     def add_wall(self, wall):
-        self.walls.append(wall)
+        # The wall's values are copied in and its index returned; later edits
+        # go through house.walls[index], not the Wall passed here.
+        return self.wall_columns.append(*_wall_fields(wall)[0])
+
+    def add_walls(self, x, y, width, height):
+        # Adds many walls from arrays; returns the index of the first.
+        return self.wall_columns.extend(x, y, width, height)
 
     def add_room(self, room):
-        self.rooms.append(room)
+        # Copies the dict, like add_wall; edit house.rooms[index] afterwards.
+        geometry, attrs = _room_fields(room)
+        self.room_attrs.append(attrs)
+        return self.room_columns.append(*geometry)
+
+    def _cached_area(self, name, compute):
+        # Area figures are kept until the next edit to the walls or rooms.
+        versions = (self.wall_columns.version, self.room_columns.version)
+        if self._areas[0] != versions:
+            self._areas = (versions, {})
+        figures = self._areas[1]
+        if name not in figures:
+            figures[name] = compute()
+        return figures[name]
 
     def total_area(self):
-        return sum(wall.area() for wall in self.walls)
+        # Ground covered by walls; where walls overlap, e.g. at corners, the
+        # shared part counts once.
+        return self._cached_area('walls', lambda: columns_area(self.wall_columns))
+
+    def room_area(self):
+        return self._cached_area('rooms', lambda: columns_area(self.room_columns))
+
+    def room_net_areas(self):
+        # Floor area of each room, less what walls inside it take up.
+        def compute():
+            net = net_areas(self.room_columns, self.wall_columns, self.walls_in)
+            net.flags.writeable = False
+            return net
+
+        return self._cached_area('room_net', compute)
+
+    def area_report(self):
+        # Union areas, overlaps and gaps; see areas.AreaReport.
+        return self._cached_area('report', lambda: area_report(self))
+
+    def bounding_box(self):
+        # (min_x, min_y, max_x, max_y) over every wall and room, or None.
+        boxes = [b for b in (self.wall_columns.bounds(), self.room_columns.bounds()) if b is not None]
+        if not boxes:
+            return None
+        boxes = np.array(boxes)
+        return (float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+                float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+
+    def _spatial_index(self, kind, columns):
+        index = self._indexes.get(kind)
+        if index is None or index.version != columns.version:
+            index = self._indexes[kind] = GridIndex(columns)
+        return index
+
+    def _query(self, kind, columns, x0, y0, x1, y1):
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        candidates = None
+        if len(columns) >= INDEX_THRESHOLD:
+            candidates = self._spatial_index(kind, columns).candidates(x0, y0, x1, y1)
+        return columns.intersecting(x0, y0, x1, y1, candidates)
+
+    def walls_in(self, x0, y0, x1, y1):
+        # Indices of walls touching the box with corners (x0, y0), (x1, y1).
+        return self._query('walls', self.wall_columns, x0, y0, x1, y1)
+
+    def rooms_in(self, x0, y0, x1, y1):
+        return self._query('rooms', self.room_columns, x0, y0, x1, y1)
+
+    def walls_at(self, x, y):
+        return self._query('walls', self.wall_columns, x, y, x, y)
+
+    def rooms_at(self, x, y):
+        return self._query('rooms', self.room_columns, x, y, x, y)
+
+    def collisions(self, bounds=None):
+        # Overlapping walls and rooms, and any past `bounds`; see
+        # collisions.check_house.
+        return check_house(self, bounds)
+
+    def layout_hash(self):
+        # Hex digest of the geometry and room attributes: equal layouts hash
+        # equal, and any edit changes it.
+        versions = (self.wall_columns.version, self.room_columns.version)
+        if self._hash is None or self._hash[0] != versions:
+            digest = hashlib.sha256()
+            for columns in (self.wall_columns, self.room_columns):
+                digest.update(len(columns).to_bytes(8, 'little'))
+                digest.update(columns.data[:, :len(columns)].tobytes())
+            for key in sorted(self.room_attrs.codes):
+                codes, values = _canonical_attr(*self.room_attrs.column(key))
+                if values != [None]: # a key no room has any more
+                    digest.update(json.dumps([key, values], default=str).encode())
+                    digest.update(codes.tobytes())
+            self._hash = (versions, digest.hexdigest())
+        return self._hash[1]
 
     def __str__(self):
-        return f"House with {len(self.walls)} walls and {len(self.rooms)} rooms."
\ No newline at end of file
+        return f"House with {len(self.walls)} walls and {len(self.rooms)} rooms."
@@ -0,0 +1,226 @@
+import json
+
+import numpy as np
+
+from ..atomic_write import write_atomic
+from .geometry import AttrColumns, FIELDS, RectColumns
+from .house import House, ROOM_DEFAULTS
+
+# Saved houses and frame layouts, in two forms:
+#
+# JSON, for interchange and hand editing:
+#   {"format": "house-design-app", "kind": "house", "version": 1,
+#    "walls": [{"x": .., "y": .., "width": .., "height": ..}, ...],
+#    "rooms": [{"x": .., ..., "color": "lightblue"}, ...]}
+#
+# Binary, for large plans: MAGIC, the header length as a little-endian
+# uint64, a JSON header describing the arrays, then the raw arrays, each
+# starting on an ALIGNMENT boundary so they can be memory mapped in place.
+# Walls and rooms are (4, n) float64 columns (x, y, width, height) and each
+# room attribute is an int32 code array plus its palette of distinct values
+# (see geometry.AttrColumns), stored in the header.
+
+FORMAT_NAME = 'house-design-app'
+FORMAT_VERSION = 1
+MAGIC = b'HDAPLAN\x00'
+ALIGNMENT = 64
+
+
+class LayoutFormatError(ValueError):
+    pass
+
+
+def _number(value):
+    # Whole numbers are written as ints so saved plans read like the code
+    # that built them.
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _attr_value(value):
+    # JSON has no tuples; attribute values like RGB colours come back as
+    # lists and are turned back into the tuples Pillow expects.
+    return tuple(map(_attr_value, value)) if isinstance(value, list) else value
+
+
+def _check_envelope(data, kind):
+    if not isinstance(data, dict) or data.get('format') != FORMAT_NAME:
+        raise LayoutFormatError("Not a house-design-app layout file")
+    if data.get('kind') != kind:
+        raise LayoutFormatError(f"Expected a '{kind}' layout, found '{data.get('kind')}'")
+    if data.get('version', 0) > FORMAT_VERSION:
+        raise LayoutFormatError(
+            f"Layout version {data.get('version')} is newer than this reader ({FORMAT_VERSION})")
+
+
+def house_to_dict(house):
+    walls = house.wall_columns
+    rooms = house.room_columns
+    wall_rows = zip(*(column.tolist() for column in (walls.x, walls.y, walls.width, walls.height)))
+    room_rows = zip(*(column.tolist() for column in (rooms.x, rooms.y, rooms.width, rooms.height)))
+    room_dicts = []
+    for i, geometry in enumerate(room_rows):
+        room = dict(zip(FIELDS, map(_number, geometry)))
+        room.update(house.room_attrs.row(i))
+        room_dicts.append(room)
+    return {
+        'format': FORMAT_NAME,
+        'kind': 'house',
+        'version': FORMAT_VERSION,
+        'walls': [dict(zip(FIELDS, map(_number, row))) for row in wall_rows],
+        'rooms': room_dicts,
+    }
+
+
+def house_from_dict(data):
+    _check_envelope(data, 'house')
+    try:
+        walls = np.array([[wall[key] for key in FIELDS] for wall in data.get('walls', [])], dtype=float)
+        rooms = np.array([[room.get(key, ROOM_DEFAULTS[key]) for key in FIELDS]
+                          for room in data.get('rooms', [])], dtype=float)
+    except (KeyError, TypeError, ValueError) as e:
+        raise LayoutFormatError(f"Malformed wall or room: {e}") from e
+    attrs = AttrColumns(len(rooms))
+    for room in data.get('rooms', []):
+        attrs.append({key: _attr_value(value) for key, value in room.items() if key not in FIELDS})
+    return House.from_columns(
+        RectColumns.wrap(walls.reshape(-1, 4).T.copy()),
+        RectColumns.wrap(rooms.reshape(-1, 4).T.copy()),
+        attrs,
+    )
+
+
+def save_json(house, path):
+    write_atomic(path, lambda f: json.dump(house_to_dict(house), f, indent=1))
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return house_from_dict(json.load(f))
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_binary(house, path):
+    arrays = {
+        'walls': np.ascontiguousarray(house.wall_columns.data[:, :len(house.wall_columns)], dtype='<f8'),
+        'rooms': np.ascontiguousarray(house.room_columns.data[:, :len(house.room_columns)], dtype='<f8'),
+    }
+    palettes = {}
+    for key in house.room_attrs.codes:
+        codes, palette = house.room_attrs.column(key)
+        arrays[f'attr:{key}'] = np.ascontiguousarray(codes, dtype='<i4')
+        palettes[key] = palette
+
+    # Offsets are relative to the data section, which starts on an
+    # ALIGNMENT boundary after the header.
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        entries[name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({
+        'format': FORMAT_NAME,
+        'kind': 'house',
+        'version': FORMAT_VERSION,
+        'arrays': entries,
+        'room_attrs': {'size': len(house.room_attrs), 'palettes': palettes},
+    }).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    def write(f):
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + entries[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+    write_atomic(path, write, 'wb')
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise LayoutFormatError("Not a binary house layout")
+    length = int.from_bytes(f.read(8), 'little')
+    header = json.loads(f.read(length))
+    _check_envelope(header, 'house')
+    return header, _aligned(len(MAGIC) + 8 + length)
+
+
+def load_binary(path, mmap=True):
+    # With mmap, the arrays stay on disk and pages are read as they are
+    # touched, so opening a huge plan to render one region reads little
+    # more than that region. Edits go to private copy-on-write pages and
+    # never reach the file; save again to keep them.
+    with open(path, 'rb') as f:
+        header, data_start = _read_header(f)
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            shape = tuple(entry['shape'])
+            dtype = np.dtype(entry['dtype'])
+            offset = data_start + entry['offset']
+            if mmap and int(np.prod(shape)):
+                arrays[name] = np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape)
+            else:
+                f.seek(offset)
+                count = int(np.prod(shape))
+                arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+
+    attr_header = header['room_attrs']
+    palettes = {key: [_attr_value(value) for value in palette] for key, palette in attr_header['palettes'].items()}
+    codes = {key: arrays[f'attr:{key}'] for key in palettes}
+    attrs = AttrColumns.from_columns(attr_header['size'], palettes, codes)
+    return House.from_columns(RectColumns.wrap(arrays['walls']), RectColumns.wrap(arrays['rooms']), attrs)
+
+
+def save_house(house, path):
+    # Binary for .hplan files, JSON otherwise.
+    if str(path).lower().endswith('.hplan'):
+        save_binary(house, path)
+    else:
+        save_json(house, path)
+
+
+def load_house(path, mmap=True):
+    # Reads either form, told apart by the binary magic.
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    return load_binary(path, mmap) if binary else load_json(path)
+
+
+def save_frame_layout(path, wall_size, frames):
+    # A gallery wall: its (width, height) and the placed frames, each a dict
+    # with name, x, y, width and height plus any extras (label, color, ...).
+    data = {
+        'format': FORMAT_NAME,
+        'kind': 'frame-layout',
+        'version': FORMAT_VERSION,
+        'wall': {'width': _number(wall_size[0]), 'height': _number(wall_size[1])},
+        'frames': [
+            {**frame, **{key: _number(frame[key]) for key in FIELDS}}
+            for frame in frames
+        ],
+    }
+    write_atomic(path, lambda f: json.dump(data, f, indent=1))
+
+
+def load_frame_layout(path):
+    # Returns ((wall width, wall height), frames).
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    _check_envelope(data, 'frame-layout')
+    wall = data.get('wall', {})
+    frames = data.get('frames', [])
+    for frame in [wall] + frames:
+        missing = [key for key in ('width', 'height') if key not in frame]
+        if missing:
+            raise LayoutFormatError(f"Malformed frame layout: missing {', '.join(missing)}")
+    for frame in frames:
+        missing = [key for key in ('name', 'x', 'y') if key not in frame]
+        if missing:
+            raise LayoutFormatError(f"Malformed frame layout: missing {', '.join(missing)}")
+    return (wall['width'], wall['height']), frames
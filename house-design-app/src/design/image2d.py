@@ -1,28 +1,341 @@
-from PIL import Image, ImageDraw
-from house import House, Wall
+import io
 
-def generate_2d_image(house, img_size=(800, 600)):
-    image = Image.new("RGB", img_size, "white")
+import numpy as np
+import PIL
+from PIL import Image, ImageColor, ImageDraw
+from ..output_cache import cache_key, code_version, default_cache
+from .house import House, Wall
+
+BACKGROUND = "white"
+WALL_OUTLINE, WALL_OUTLINE_WIDTH = "black", 4
+ROOM_OUTLINE, ROOM_OUTLINE_WIDTH = "gray", 2
+ROOM_FILL = "lightgray" # rooms without a color
+OUTLINE_SPILL = max(WALL_OUTLINE_WIDTH, ROOM_OUTLINE_WIDTH) # pixels an outline can reach past its box
+# The numpy backend paints rooms in one batch (_paint_in_order) when
+# slicing them one by one would cost more than that batch's few dozen
+# passes over the canvas: per room, about as much as this many canvas
+# pixels of those passes, plus one per this many pixels it fills.
+ROOM_SLICE_COST, ROOM_SLICE_PIXELS = 50, 200
+
+def generate_2d_image(house, img_size=(800, 600), viewport=None, backend="pillow", cache=None):
+    # viewport: optional (x0, y0, x1, y1) region of the plan to stretch over
+    # img_size; only rooms and walls inside it are drawn.
+    # backend: "pillow" draws shape by shape with ImageDraw; "numpy" paints
+    # all shapes from the house's arrays and is much faster for big plans.
+    # cache: optional output_cache.OutputCache keeping the image as PNG.
+    if cache is not None:
+        return _cached_2d_image(house, img_size, viewport, backend, cache)
+    if backend == "numpy":
+        return _generate_2d_image_numpy(house, img_size, viewport)
+    if backend != "pillow":
+        raise ValueError(f"Unknown backend '{backend}'. Use 'pillow' or 'numpy'.")
+    image = Image.new("RGB", img_size, BACKGROUND)
     draw = ImageDraw.Draw(image)
-    for room in house.rooms:
-        render_room(draw, room)
-    for wall in house.walls:
-        render_wall(draw, wall)
+    if viewport is None:
+        rooms, walls, transform = house.rooms, house.walls, None
+    else:
+        x0, y0, x1, y1 = viewport
+        rooms = [house.rooms[i] for i in house.rooms_in(x0, y0, x1, y1)]
+        walls = [house.walls[i] for i in house.walls_in(x0, y0, x1, y1)]
+        transform = (x0, y0, img_size[0] / (x1 - x0), img_size[1] / (y1 - y0))
+    for room in rooms:
+        render_room(draw, room, transform)
+    for wall in walls:
+        render_wall(draw, wall, transform)
     return image
 
-def render_wall(draw, wall):
+def _cached_2d_image(house, img_size, viewport, backend, cache):
+    # Keyed by the layout hash, the drawing parameters and this module's code.
+    key = cache_key('image2d', code_version(__name__), PIL.__version__, house.layout_hash(),
+                    list(img_size), None if viewport is None else list(viewport), backend)
+    data = cache.get(key)
+    if data is not None:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+    image = generate_2d_image(house, img_size, viewport, backend)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", compress_level=1)
+    cache.put(key, buffer.getvalue())
+    return image
+
+def _to_image(x, y, w, h, transform):
+    # transform: (origin x, origin y, x scale, y scale) from plan to image
+    if transform is None:
+        return [x, y, x + w, y + h]
+    ox, oy, sx, sy = transform
+    if sx == 1 and sy == 1:
+        # A plain shift: snap to pixels first, as an untransformed draw does
+        # (Pillow truncates coordinates), so a region drawn on its own is
+        # identical to the same crop of a full render.
+        return [int(x) - ox, int(y) - oy, int(x + w) - ox, int(y + h) - oy]
+    return [(x - ox) * sx, (y - oy) * sy, (x + w - ox) * sx, (y + h - oy) * sy]
+
+def render_wall(draw, wall, transform=None):
     # wall: Wall object
     x, y, w, h = wall.x, wall.y, wall.width, wall.height
-    draw.rectangle([x, y, x + w, y + h], outline="black", width=4)
+    draw.rectangle(_to_image(x, y, w, h, transform), outline=WALL_OUTLINE, width=WALL_OUTLINE_WIDTH)
 
-def render_room(draw, room):
+def render_room(draw, room, transform=None):
     # room: dict with x, y, width, height, color
     x = room.get('x', 0)
     y = room.get('y', 0)
     w = room.get('width', 100)
     h = room.get('height', 100)
-    color = room.get('color', 'lightgray')
-    draw.rectangle([x, y, x + w, y + h], fill=color, outline="gray", width=2)
+    color = room.get('color', ROOM_FILL)
+    draw.rectangle(_to_image(x, y, w, h, transform), fill=color, outline=ROOM_OUTLINE, width=ROOM_OUTLINE_WIDTH)
+
+def _pixel_boxes(columns, indices, transform):
+    # Vectorized _to_image followed by Pillow's coordinate truncation:
+    # inclusive (x0, y0, x1, y1) pixel boxes as int arrays.
+    x, y, w, h = columns.data[:, :len(columns)] if indices is None else columns.data[:, indices]
+    if transform is None:
+        boxes = (x, y, x + w, y + h)
+    else:
+        ox, oy, sx, sy = transform
+        if sx == 1 and sy == 1:
+            boxes = (np.trunc(x) - ox, np.trunc(y) - oy, np.trunc(x + w) - ox, np.trunc(y + h) - oy)
+        else:
+            boxes = ((x - ox) * sx, (y - oy) * sy, (x + w - ox) * sx, (y + h - oy) * sy)
+    return [np.trunc(v).astype(np.int64) for v in boxes]
+
+def _paint_rectangles(canvas, boxes, outline, width, fills=None):
+    # Paints rectangles in order onto `canvas`, an (height, width) array of
+    # palette indices, the way ImageDraw.rectangle does: `fills` (one palette
+    # index per box, or None for no fill) covers the box, then the outline
+    # is drawn `width` pixels inside it. Pillow draws that outline as two
+    # horizontal bands and two vertical ones running between them, so for a
+    # box thinner than twice `width` the bands reach past the box; this
+    # reproduces those pixels too. A fill equal to the outline is drawn
+    # without an outline, as Pillow does.
+    rows, cols = canvas.shape
+    x0, y0, x1, y1 = boxes
+    keep = ((x1 >= x0) & (y1 >= y0) & (x1 + width >= 0) & (y1 + width >= 0)
+            & (x0 - width < cols) & (y0 - width < rows))
+    if not keep.all():
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+        if fills is not None:
+            fills = fills[keep]
+    # Rows of the vertical bands: from y0 + width towards y1 - width + 1,
+    # not including the latter, whichever way round they are.
+    start, stop = y0 + width, y1 - width + 1
+    upward = start > stop
+    band_top = np.where(upward, stop + 1, start)
+    band_bottom = np.where(upward, start + 1, stop)
+    # Slice bounds, clipped to the canvas
+    left, right = np.clip(x0, 0, cols), np.clip(x1 + 1, 0, cols)
+    top, bottom = np.clip(y0, 0, rows), np.clip(y1 + 1, 0, rows)
+    top_end, bottom_start = np.clip(y0 + width, 0, rows), np.clip(y1 + 1 - width, 0, rows)
+    left_end, right_start = np.clip(x0 + width, 0, cols), np.clip(x1 + 1 - width, 0, cols)
+    band_top, band_bottom = np.clip(band_top, 0, rows), np.clip(band_bottom, 0, rows)
+    if fills is None:
+        # One ink and no fills, so the order does not matter: all the bands
+        # are painted at once.
+        _paint_union(canvas, outline,
+                     np.concatenate([top, bottom_start, band_top, band_top]),
+                     np.concatenate([top_end, bottom, band_bottom, band_bottom]),
+                     np.concatenate([left, left, left, right_start]),
+                     np.concatenate([right, right, left_end, right]))
+        return
+    # Boxes at least `width` + 1 tall and `width` wide keep their outline
+    # inside them: the outline covers the box, then the fill its interior.
+    inside = (y1 - y0 >= width) & (x1 - x0 >= width - 1)
+    areas = (bottom - top) * (right - left)
+    if ROOM_SLICE_COST * len(areas) + areas.sum() // ROOM_SLICE_PIXELS > canvas.size:
+        # The slices the loop below paints, in the same order.
+        plain = fills == outline
+        boxed, banded = ~plain & inside, ~plain & ~inside
+        outlines = np.full_like(fills, outline)
+        steps = [(plain, top, bottom, left, right, fills),
+                 (boxed, top, bottom, left, right, outlines),
+                 (~plain, top_end, bottom_start, left_end, right_start, fills),
+                 (banded, top, top_end, left, right, outlines),
+                 (banded, bottom_start, bottom, left, right, outlines),
+                 (banded, band_top, band_bottom, left, left_end, outlines),
+                 (banded, band_top, band_bottom, right_start, right, outlines)]
+        order = np.argsort(np.concatenate([np.flatnonzero(step[0]) * len(steps) + i for i, step in enumerate(steps)]))
+        _paint_in_order(canvas, *(np.concatenate([step[i][step[0]] for step in steps])[order] for i in range(1, 6)))
+        return
+    for l, r, t, b, te, bs, le, rs, bt, bb, fill, is_plain, is_inside in zip(
+            left.tolist(), right.tolist(), top.tolist(), bottom.tolist(), top_end.tolist(),
+            bottom_start.tolist(), left_end.tolist(), right_start.tolist(), band_top.tolist(),
+            band_bottom.tolist(), fills.tolist(), (fills == outline).tolist(), inside.tolist()):
+        if is_plain:
+            canvas[t:b, l:r] = fill
+        elif is_inside:
+            canvas[t:b, l:r] = outline
+            canvas[te:bs, le:rs] = fill
+        else:
+            canvas[te:bs, le:rs] = fill
+            canvas[t:te, l:r] = outline
+            canvas[bs:b, l:r] = outline
+            canvas[bt:bb, l:le] = outline
+            canvas[bt:bb, rs:r] = outline
+
+def _paint_in_order(canvas, top, bottom, left, right, values):
+    # Paints the slices [top:bottom, left:right] (clipped bounds) with
+    # `values` in order, later slices over earlier ones, with no loop per
+    # slice. Each pixel takes the value of the last slice covering it: a
+    # slice is covered by four blocks with power-of-two sides at its
+    # corners, the slices' numbers go into a table per block size, and
+    # halving the block sizes one step at a time carries the largest number
+    # down to single pixels. That is a few dozen passes over the canvas,
+    # however many slices there are.
+    rows, cols = canvas.shape
+    nonempty = (top < bottom) & (left < right)
+    top, bottom, left, right, values = top[nonempty], bottom[nonempty], left[nonempty], right[nonempty], values[nonempty]
+    count = len(values)
+    if not count:
+        return
+    number = np.arange(1, count + 1, dtype=np.uint16 if count < 1 << 16 else np.uint32) # 0: no slice
+    level_y, level_x = np.frexp(bottom - top)[1] - 1, np.frexp(right - left)[1] - 1
+    # Flat index of each block's first pixel
+    at = np.concatenate([block_top * cols + block_left
+                         for block_top in (top, bottom - (1 << level_y))
+                         for block_left in (left, right - (1 << level_x))])
+    level_y, level_x, number = np.tile(level_y, 4), np.tile(level_x, 4), np.tile(number, 4)
+    # Blocks one pixel tall, by width, from the widest down.
+    across = None
+    for x in range(level_x.max(), -1, -1):
+        here = level_x == x
+        down = None
+        if here.any():
+            # Blocks of this width, from the tallest down to one pixel.
+            at_x, level_y_x, number_x = at[here], level_y[here], number[here]
+            for y in range(level_y_x.max(), -1, -1):
+                down = np.zeros(rows * cols, number.dtype) if down is None else _spread(down, cols << y)
+                np.maximum.at(down, at_x[level_y_x == y], number_x[level_y_x == y])
+        if across is not None:
+            across = _spread(across, 1 << x)
+            down = across if down is None else np.maximum(down, across, out=down)
+        across = down
+    across = across.reshape(rows, cols)
+    lookup = np.concatenate([np.zeros(1, canvas.dtype), values.astype(canvas.dtype)])
+    np.copyto(canvas, lookup[across], where=across > 0)
+
+def _spread(table, step):
+    # Copy of the flat `table` with each entry raised to the one `step`
+    # before it: blocks twice `step` long, split into halves.
+    spread = table.copy()
+    np.maximum(spread[step:], table[:-step], out=spread[step:])
+    return spread
+
+def _paint_union(canvas, value, top, bottom, left, right):
+    # Sets every pixel in any of the slices [top:bottom, left:right] (clipped
+    # bounds) to `value`. Each slice adds +1/-1 at its corners to a
+    # difference array; after running sums along both axes it holds how
+    # many slices cover each pixel.
+    rows, cols = canvas.shape
+    nonempty = (top < bottom) & (left < right)
+    top, bottom, left, right = top[nonempty], bottom[nonempty], left[nonempty], right[nonempty]
+    stride = cols + 1
+    size = (rows + 1) * stride
+    counts = np.bincount(np.concatenate([top * stride + left, bottom * stride + right]), minlength=size)
+    counts -= np.bincount(np.concatenate([top * stride + right, bottom * stride + left]), minlength=size)
+    counts = counts.reshape(rows + 1, stride)
+    np.cumsum(counts, axis=0, out=counts)
+    np.cumsum(counts, axis=1, out=counts)
+    canvas[counts[:rows, :cols] > 0] = value
+
+def _rgb(color):
+    return tuple(color[:3]) if isinstance(color, tuple) else ImageColor.getrgb(color)[:3]
+
+def _generate_2d_image_numpy(house, img_size, viewport):
+    width, height = img_size
+    color_codes, colors = house.room_attrs.column('color')
+    if viewport is None:
+        room_indices = wall_indices = transform = None
+    else:
+        x0, y0, x1, y1 = viewport
+        room_indices = house.rooms_in(x0, y0, x1, y1)
+        wall_indices = house.walls_in(x0, y0, x1, y1)
+        transform = (x0, y0, width / (x1 - x0), height / (y1 - y0))
+        color_codes = color_codes[room_indices]
+
+    # Colours are resolved once into a palette of RGB triples; the canvas
+    # holds indices. color_codes index the house's distinct room colours,
+    # -1 for no colour, which the last entry of `lookup` maps to ROOM_FILL.
+    palette = []
+    palette_index = {}
+    lookup = []
+    for color in [BACKGROUND, WALL_OUTLINE, ROOM_OUTLINE] + list(colors) + [ROOM_FILL]:
+        key = _rgb(tuple(color) if isinstance(color, list) else color)
+        index = palette_index.get(key)
+        if index is None:
+            index = palette_index[key] = len(palette)
+            palette.append(key)
+        lookup.append(index)
+    background, wall_outline, room_outline = lookup[:3]
+    lookup = lookup[3:]
+    dtype = np.uint8 if len(palette) <= 256 else np.uint32
+    fills = np.array(lookup, dtype=dtype)[color_codes]
+    canvas = np.full((height, width), background, dtype=dtype)
+
+    _paint_rectangles(canvas, _pixel_boxes(house.room_columns, room_indices, transform),
+                      room_outline, ROOM_OUTLINE_WIDTH, fills)
+    _paint_rectangles(canvas, _pixel_boxes(house.wall_columns, wall_indices, transform),
+                      wall_outline, WALL_OUTLINE_WIDTH)
+
+    if dtype is np.uint8:
+        image = Image.fromarray(canvas, "P")
+        image.putpalette([channel for color in palette for channel in color])
+        return image.convert("RGB")
+    rgb = np.array(palette, dtype=np.uint8)
+    return Image.fromarray(rgb[canvas], "RGB")
+
+class IncrementalRenderer:
+    # Keeps the last frame rendered for a house and, on the next render(),
+    # repaints only the regions edited since then (House.changes_since).
+    # Each region is redrawn from the plan, so the frame always matches a
+    # full generate_2d_image of the current house.
+
+    max_regions = 256 # more dirty regions than this and a full render is cheaper
+
+    def __init__(self, house, img_size=(800, 600), backend="pillow"):
+        self.house = house
+        self.img_size = img_size
+        self.backend = backend
+        self.image = None
+        self.version = None
+        self.repainted_regions = 0 # regions repainted by the last render()
+
+    def _pixel_region(self, box):
+        # Pixels a plan box can reach: coordinates are truncated, rectangles
+        # include their right and bottom edge, and Pillow draws the outline
+        # of a box thinner than the outline width past the box's edges.
+        x0, y0, x1, y1 = box
+        width, height = self.img_size
+        left = max(int(x0) - OUTLINE_SPILL, 0)
+        top = max(int(y0) - OUTLINE_SPILL, 0)
+        right = min(int(x1) + 1 + OUTLINE_SPILL, width)
+        bottom = min(int(y1) + 1 + OUTLINE_SPILL, height)
+        if left >= right or top >= bottom:
+            return None
+        return left, top, right, bottom
+
+    def render(self):
+        # Returns the up-to-date frame. The same Image object is updated in
+        # place across calls; copy it to keep an old frame.
+        changes = None
+        if self.image is not None:
+            changes = self.house.changes_since(self.version)
+        if changes is None or len(changes) > self.max_regions:
+            self.image = generate_2d_image(self.house, self.img_size, backend=self.backend)
+            self.repainted_regions = None
+        else:
+            regions = {region for region in map(self._pixel_region, changes) if region is not None}
+            # Each region is drawn with a margin so shapes just outside it,
+            # whose outlines spill in, are drawn too; the margin is cut off.
+            margin = OUTLINE_SPILL + 1
+            for left, top, right, bottom in regions:
+                patch = generate_2d_image(
+                    self.house, (right - left + 2 * margin, bottom - top + 2 * margin),
+                    (left - margin, top - margin, right + margin, bottom + margin), self.backend)
+                self.image.paste(patch.crop((margin, margin, margin + right - left, margin + bottom - top)),
+                                 (left, top))
+            self.repainted_regions = len(regions)
+        self.version = self.house.version
+        return self.image
 
 def save_image(image, filename):
     image.save(filename, "PNG")
@@ -39,5 +352,5 @@ if __name__ == "__main__":
     house.add_room({'x': 340, 'y': 120, 'width': 320, 'height': 180, 'color': 'lightgreen'})
     house.add_room({'x': 120, 'y': 320, 'width': 540, 'height': 170, 'color': 'lightyellow'})
 
-    img = generate_2d_image(house)
+    img = generate_2d_image(house, cache=default_cache())
     save_image(img, "house_2d.png")
\ No newline at end of file
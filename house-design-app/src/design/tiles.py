@@ -0,0 +1,147 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from ..atomic_write import write_atomic
+from .image2d import OUTLINE_SPILL, generate_2d_image
+
+TILE_SIZE = 256
+
+_worker_renderer = None
+
+
+class TileRenderer:
+    # Image pyramid over a House for panning and zooming large plans.
+    #
+    # At zoom `max_zoom` one plan unit is one pixel, the scale
+    # generate_2d_image draws at; every level up halves the scale, and zoom 0
+    # fits the whole plan in one tile. Tile (tx, ty) at zoom z covers plan
+    # units [tx, tx + 1) * tile_span(z) across and likewise down, from the
+    # plan origin (0, 0). Each tile draws only the rooms and walls that
+    # intersect it or lie close enough for their outlines to spill in. With a cache_dir, tiles are stored as
+    # <cache_dir>/<layout hash>/<tile_size>/<z>/<tx>/<ty>.png and reused
+    # until the layout changes; the tile size is part of the path because
+    # it decides what (z, tx, ty) covers.
+
+    def __init__(self, house, tile_size=TILE_SIZE, cache_dir=None, workers=1):
+        self.house = house
+        self.tile_size = tile_size
+        self.cache_dir = cache_dir
+        self.workers = workers
+        bounds = house.bounding_box()
+        extent = max(bounds[2], bounds[3], 1) if bounds else 1
+        self.max_zoom = max(math.ceil(math.log2(extent / tile_size)), 0)
+
+    def tile_span(self, z):
+        # Plan units covered by one tile side at zoom z.
+        return self.tile_size * 2 ** (self.max_zoom - z)
+
+    def tile_bounds(self, z, tx, ty):
+        span = self.tile_span(z)
+        return (tx * span, ty * span, (tx + 1) * span, (ty + 1) * span)
+
+    def tiles_for_viewport(self, z, x0, y0, x1, y1):
+        # (tx, ty) of every tile at zoom z that the plan region overlaps.
+        span = self.tile_span(z)
+        return [
+            (tx, ty)
+            for ty in range(math.floor(y0 / span), math.ceil(y1 / span))
+            for tx in range(math.floor(x0 / span), math.ceil(x1 / span))
+        ]
+
+    def _cache_path(self, z, tx, ty):
+        return os.path.join(self.cache_dir, self.house.layout_hash(), str(self.tile_size), str(z), str(tx),
+                            f"{ty}.png")
+
+    def _cached(self, z, tx, ty):
+        if self.cache_dir is None:
+            return None
+        path = self._cache_path(z, tx, ty)
+        if not os.path.exists(path):
+            return None
+        with Image.open(path) as tile:
+            tile.load()
+            return tile
+
+    def _store(self, z, tx, ty, tile):
+        if self.cache_dir is None:
+            return
+        path = self._cache_path(z, tx, ty)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name first so readers never see half a tile.
+        write_atomic(path, lambda f: tile.save(f, "PNG"), "wb")
+
+    def draw_tile(self, z, tx, ty):
+        # Renders the tile without touching the cache. As in
+        # IncrementalRenderer, it is drawn with a margin so shapes just
+        # outside it, whose outlines spill in, are drawn too; the margin is
+        # cut off.
+        margin = OUTLINE_SPILL + 1
+        pad = margin * self.tile_span(z) / self.tile_size # the margin in plan units
+        x0, y0, x1, y1 = self.tile_bounds(z, tx, ty)
+        size = self.tile_size + 2 * margin
+        tile = generate_2d_image(self.house, (size, size), (x0 - pad, y0 - pad, x1 + pad, y1 + pad))
+        return tile.crop((margin, margin, margin + self.tile_size, margin + self.tile_size))
+
+    def render_tile(self, z, tx, ty):
+        tile = self._cached(z, tx, ty)
+        if tile is None:
+            tile = self.draw_tile(z, tx, ty)
+            self._store(z, tx, ty, tile)
+        return tile
+
+    def render_tiles(self, tiles):
+        # Yields ((z, tx, ty), image) for each requested tile, cached tiles
+        # first. Missing tiles are drawn across `workers` processes, which
+        # receive the house once when they start.
+        missing = []
+        for key in tiles:
+            tile = self._cached(*key)
+            if tile is None:
+                missing.append(key)
+            else:
+                yield key, tile
+        if self.workers <= 1 or len(missing) <= 1:
+            for key in missing:
+                tile = self.draw_tile(*key)
+                self._store(*key, tile)
+                yield key, tile
+            return
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.house, self.tile_size),
+        ) as pool:
+            chunksize = max(len(missing) // (4 * self.workers), 1)
+            for key, tile in zip(missing, pool.map(_draw_tile, missing, chunksize=chunksize)):
+                self._store(*key, tile)
+                yield key, tile
+
+    def render_viewport(self, z, x0, y0, x1, y1):
+        # The plan region at zoom z as one image, stitched from tiles.
+        scale = 2 ** (z - self.max_zoom)
+        tiles = self.tiles_for_viewport(z, x0, y0, x1, y1)
+        if not tiles:
+            raise ValueError("Viewport is empty")
+        span = self.tile_span(z)
+        left = math.floor(x0 / span)
+        top = math.floor(y0 / span)
+        columns = max(tx for tx, _ in tiles) - left + 1
+        rows = max(ty for _, ty in tiles) - top + 1
+        mosaic = Image.new("RGB", (columns * self.tile_size, rows * self.tile_size), "white")
+        for (_, tx, ty), tile in self.render_tiles([(z, tx, ty) for tx, ty in tiles]):
+            mosaic.paste(tile, ((tx - left) * self.tile_size, (ty - top) * self.tile_size))
+        crop_x = round((x0 - left * span) * scale)
+        crop_y = round((y0 - top * span) * scale)
+        width = round((x1 - x0) * scale)
+        height = round((y1 - y0) * scale)
+        return mosaic.crop((crop_x, crop_y, crop_x + width, crop_y + height))
+
+
+def _init_worker(house, tile_size):
+    global _worker_renderer
+    _worker_renderer = TileRenderer(house, tile_size)
+
+
+def _draw_tile(key):
+    return _worker_renderer.draw_tile(*key)
@@ -0,0 +1,296 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Gallery wall layouts: frames on a wall placed by rules relative to the wall
+# or to each other, solved in one pass per axis in dependency order.
+#
+# Coordinates are in wall units (cm in the scripts) with the origin at the
+# bottom-left corner of the wall and y growing upwards, as on the plots, so
+# 'top' is the high edge.
+
+# Anchor name -> (axis, side); side -1, 0 or 1 is the low edge, the centre or
+# the high edge along the axis.
+ANCHORS = {
+    'left': (0, -1), 'center_x': (0, 0), 'right': (0, 1),
+    'bottom': (1, -1), 'center_y': (1, 0), 'top': (1, 1),
+}
+
+WALL = None # `ref` for rules relative to the wall itself
+
+# Puts `anchor` of a frame at `to` of `ref` plus offset + gaps * spacing,
+# where spacing is the layout's spacing between frames.
+Rule = namedtuple('Rule', ['anchor', 'ref', 'to', 'offset', 'gaps'])
+
+# One frame of a LayoutSpec; `size` is (width, height) before rotation and
+# `x` / `y` are its horizontal and vertical rules.
+Frame = namedtuple('Frame', ['name', 'size', 'x', 'y', 'rotated', 'label'])
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def align(anchor, ref=WALL, to=None, offset=0.0):
+    # General rule: e.g. align('bottom', 'a', 'center_y') puts a frame's
+    # bottom edge on the centre line of frame 'a'.
+    to = anchor if to is None else to
+    if anchor not in ANCHORS or to not in ANCHORS:
+        raise LayoutError(f"Unknown anchor. Use one of: {', '.join(ANCHORS)}.")
+    if ANCHORS[anchor][0] != ANCHORS[to][0]:
+        raise LayoutError(f"Cannot align '{anchor}' to '{to}' across axes")
+    return Rule(anchor, ref, to, offset, 0)
+
+
+def _beside(anchor, ref, to, direction, gap):
+    # The layout's spacing when gap is None, else a fixed gap.
+    if gap is None:
+        return Rule(anchor, ref, to, 0.0, direction)
+    return Rule(anchor, ref, to, direction * gap, 0)
+
+
+def left_of(ref, gap=None):
+    return _beside('right', ref, 'left', -1, gap)
+
+
+def right_of(ref, gap=None):
+    return _beside('left', ref, 'right', 1, gap)
+
+
+def above(ref, gap=None):
+    return _beside('bottom', ref, 'top', 1, gap)
+
+
+def below(ref, gap=None):
+    return _beside('top', ref, 'bottom', -1, gap)
+
+
+def center_x(ref=WALL, offset=0.0):
+    return align('center_x', ref, offset=offset)
+
+
+def center_y(ref=WALL, offset=0.0):
+    return align('center_y', ref, offset=offset)
+
+
+def align_left(ref=WALL, offset=0.0):
+    return align('left', ref, offset=offset)
+
+
+def align_right(ref=WALL, offset=0.0):
+    return align('right', ref, offset=offset)
+
+
+def align_top(ref=WALL, offset=0.0):
+    return align('top', ref, offset=offset)
+
+
+def align_bottom(ref=WALL, offset=0.0):
+    return align('bottom', ref, offset=offset)
+
+
+class LayoutSpec:
+    # A wall, the spacing between frames and each frame's rules. Every frame
+    # has exactly one horizontal and one vertical rule, so each axis forms a
+    # forest rooted at the wall and solving is one pass over it.
+    #
+    # solve() places the frames once; solve_many() places many variants of
+    # the same spec (other sizes, rotations or spacings) as NumPy batches.
+
+    def __init__(self, wall_size, spacing=0.0):
+        self.wall_size = (float(wall_size[0]), float(wall_size[1]))
+        self.spacing = spacing
+        self.frames = []
+        self.groups = [] # (axis, names) centred on the wall after solving
+        self._index = {}
+        self._plan = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def names(self):
+        return [frame.name for frame in self.frames]
+
+    def add(self, name, size, x, y, rotated=False, label=None):
+        # `x` must be a horizontal rule and `y` a vertical one.
+        if name in self._index:
+            raise LayoutError(f"Frame '{name}' already exists")
+        for rule, axis in ((x, 0), (y, 1)):
+            if ANCHORS[rule.anchor][0] != axis:
+                raise LayoutError(f"Frame '{name}': '{rule.anchor}' rule given for the {'xy'[axis]} axis")
+        self._index[name] = len(self.frames)
+        self.frames.append(Frame(name, (float(size[0]), float(size[1])), x, y, rotated, label))
+        self._plan = None
+        return self
+
+    def center_group(self, names, axis='x'):
+        # After solving, shifts the named frames, and everything placed
+        # relative to them, so together they are centred on the wall along
+        # `axis`. A group wider than the wall starts at the wall's low edge.
+        self.groups.append(('xy'.index(axis), list(names)))
+        self._plan = None
+        return self
+
+    def _order(self, axis):
+        # Frame indices in dependency order along one axis.
+        children = {}
+        for i, frame in enumerate(self.frames):
+            ref = (frame.x, frame.y)[axis].ref
+            if ref is not WALL and ref not in self._index:
+                raise LayoutError(f"Frame '{frame.name}' refers to unknown frame '{ref}'")
+            children.setdefault(ref, []).append(i)
+        order = []
+        pending = [WALL]
+        while pending:
+            ref = pending.pop()
+            for i in children.get(ref, []):
+                order.append(i)
+                pending.append(self.frames[i].name)
+        if len(order) != len(self.frames):
+            stuck = sorted(set(self.names) - {self.frames[i].name for i in order})
+            raise LayoutError(f"Circular rules along {'xy'[axis]} between: {', '.join(stuck)}")
+        return order
+
+    def _moved_by(self, axis, names):
+        # Indices of the named frames and every frame depending on them.
+        moved = set()
+        for i in self._order(axis):
+            frame = self.frames[i]
+            ref = (frame.x, frame.y)[axis].ref
+            if frame.name in names or (ref is not WALL and self._index[ref] in moved):
+                moved.add(i)
+        return np.array(sorted(moved), dtype=np.intp)
+
+    def _build_plan(self):
+        # Per axis: (frame, own side, ref index or -1, ref side, offset, gaps)
+        # steps in dependency order, plus the group shifts.
+        steps = []
+        for axis in (0, 1):
+            axis_steps = []
+            for i in self._order(axis):
+                rule = (self.frames[i].x, self.frames[i].y)[axis]
+                ref = -1 if rule.ref is WALL else self._index[rule.ref]
+                axis_steps.append((i, ANCHORS[rule.anchor][1], ref, ANCHORS[rule.to][1], rule.offset, rule.gaps))
+            steps.append(axis_steps)
+        groups = []
+        for axis, names in self.groups:
+            unknown = set(names) - set(self._index)
+            if unknown:
+                raise LayoutError(f"Unknown frames in group: {', '.join(sorted(unknown))}")
+            members = np.array([self._index[name] for name in names], dtype=np.intp)
+            groups.append((axis, members, self._moved_by(axis, set(names))))
+        return steps, groups
+
+    def solve_many(self, sizes=None, rotated=None, spacing=None):
+        # Places V variants at once. `sizes` is (n, 2) or (V, n, 2) unrotated
+        # frame sizes in spec order, `rotated` (n,) or (V, n) booleans and
+        # `spacing` a scalar or (V,); each defaults to the spec's own.
+        # Returns (centers, placed_sizes), both (V, n, 2).
+        if self._plan is None:
+            self._plan = self._build_plan()
+        steps, groups = self._plan
+        if sizes is None:
+            sizes = [frame.size for frame in self.frames]
+        if rotated is None:
+            rotated = [frame.rotated for frame in self.frames]
+        if spacing is None:
+            spacing = self.spacing
+        sizes = np.asarray(sizes, dtype=float)
+        rotated = np.asarray(rotated, dtype=bool)
+        spacing = np.asarray(spacing, dtype=float)
+        variants = max(sizes.shape[0] if sizes.ndim == 3 else 1,
+                       rotated.shape[0] if rotated.ndim == 2 else 1,
+                       spacing.shape[0] if spacing.ndim == 1 else 1)
+        count = len(self.frames)
+        sizes = np.broadcast_to(sizes, (variants, count, 2))
+        rotated = np.broadcast_to(rotated, (variants, count))
+        spacing = np.broadcast_to(spacing, (variants,))
+
+        placed = np.where(rotated[..., None], sizes[..., ::-1], sizes)
+        centers = np.empty((variants, count, 2))
+        for axis, axis_steps in enumerate(steps):
+            wall = self.wall_size[axis]
+            for i, side, ref, ref_side, offset, gaps in axis_steps:
+                if ref < 0:
+                    base = wall * (ref_side + 1) / 2
+                else:
+                    base = centers[:, ref, axis] + ref_side * placed[:, ref, axis] / 2
+                value = base + offset
+                if gaps:
+                    value = value + gaps * spacing
+                centers[:, i, axis] = value - side * placed[:, i, axis] / 2
+        for axis, members, moved in groups:
+            low = (centers[:, members, axis] - placed[:, members, axis] / 2).min(axis=1)
+            high = (centers[:, members, axis] + placed[:, members, axis] / 2).max(axis=1)
+            start = np.maximum((self.wall_size[axis] - (high - low)) / 2, 0)
+            centers[:, moved, axis] += (start - low)[:, None]
+        return centers, placed
+
+    def solve(self, sizes=None, rotated=None, spacing=None):
+        centers, placed = self.solve_many(sizes, rotated, spacing)
+        return Layout(self, centers[0], placed[0])
+
+
+class Layout:
+    # One solved arrangement: frame centres and placed (rotated) sizes in
+    # spec order.
+
+    def __init__(self, spec, centers, sizes):
+        self.spec = spec
+        self.wall_size = spec.wall_size
+        self.centers = centers
+        self.sizes = sizes
+
+    @property
+    def names(self):
+        return self.spec.names
+
+    def positions(self):
+        # Name -> (center x, center y)
+        return {name: tuple(map(float, center)) for name, center in zip(self.names, self.centers)}
+
+    def placed_dims(self):
+        # Name -> (width, height) as hung, i.e. after rotation
+        return {name: tuple(map(float, size)) for name, size in zip(self.names, self.sizes)}
+
+    def boxes(self):
+        # (n, 4) array of (x0, y0, x1, y1)
+        return np.hstack([self.centers - self.sizes / 2, self.centers + self.sizes / 2])
+
+    def box(self, name):
+        return tuple(map(float, self.boxes()[self.spec._index[name]]))
+
+    def overflow(self):
+        # How far the frames reach past the wall edges, 0 if they all fit.
+        boxes = self.boxes()
+        if not len(boxes):
+            return 0.0
+        past = max(-boxes[:, 0].min(), -boxes[:, 1].min(),
+                   boxes[:, 2].max() - self.wall_size[0], boxes[:, 3].max() - self.wall_size[1])
+        return max(float(past), 0.0)
+
+    def frames(self):
+        # Placed frames as dicts with name, x, y (bottom-left corner), width
+        # and height, plus label and original size; the form
+        # house_io.save_frame_layout stores.
+        placed = []
+        for frame, (x0, y0, x1, y1) in zip(self.spec.frames, self.boxes().tolist()):
+            item = {'name': frame.name, 'x': x0, 'y': y0, 'width': x1 - x0, 'height': y1 - y0,
+                    'original_size': list(frame.size), 'rotated': bool(frame.rotated)}
+            if frame.label is not None:
+                item['label'] = frame.label
+            placed.append(item)
+        return placed
+
+
+def placed_layout(wall_size, frames):
+    # A Layout of frames already placed, in the form Layout.frames() gives
+    # and house_io.load_frame_layout returns, so saved layouts can be drawn.
+    spec = LayoutSpec(wall_size)
+    for frame in frames:
+        rotated = bool(frame.get('rotated', False))
+        size = (frame['height'], frame['width']) if rotated else (frame['width'], frame['height'])
+        spec.add(frame['name'], size, align_left(offset=frame['x']), align_bottom(offset=frame['y']),
+                 rotated=rotated, label=frame.get('label'))
+    return spec.solve()
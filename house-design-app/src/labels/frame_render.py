@@ -0,0 +1,285 @@
+import math
+from collections import namedtuple
+from io import BytesIO
+
+from ..atomic_write import write_output
+from ..output_cache import cache_key, code_version
+
+# Draws solved frame layouts (see frame_layout.Layout) without pyplot.
+#
+# build_scene() turns a layout into plain shapes: rectangles, groups of
+# line segments, arrow markers and text, in wall units with y growing
+# upwards. A backend then draws the scene:
+#   'agg'     matplotlib's Agg canvas used directly, one collection per
+#             style; matplotlib is imported when the first one is created
+#   'pillow'  ImageDraw only, so a process never imports matplotlib
+# Renderers keep their figure or fonts between layouts, so drawing many
+# layouts in one process pays for that setup once (see render_layout).
+
+Rect = namedtuple('Rect', ['x', 'y', 'width', 'height', 'facecolor', 'edgecolor', 'linewidth'])
+Lines = namedtuple('Lines', ['segments', 'color', 'linestyle', 'alpha', 'linewidth'])
+Markers = namedtuple('Markers', ['points', 'marker', 'color', 'alpha', 'size'])
+Text = namedtuple('Text', ['x', 'y', 'text', 'size', 'color', 'ha', 'va', 'bold'])
+Scene = namedtuple('Scene', ['wall_size', 'title', 'rects', 'lines', 'markers', 'texts'])
+
+# A rectangle drawn on the wall besides the frames (a plant, a pot, ...):
+# (x, y) is its bottom-left corner in wall units.
+Decoration = namedtuple('Decoration', ['x', 'y', 'width', 'height', 'facecolor', 'edgecolor', 'text', 'text_color'])
+
+WALL_FACE = 'whitesmoke'
+WALL_EDGE = 'gray'
+FRAME_FACE = 'white'
+FRAME_EDGE = 'black'
+FRAME_LINE_WIDTH = 2
+TOP_COLOR = 'blue'
+BOTTOM_COLOR = 'green'
+MEASURE_OFFSET = 1.5 # wall units between a frame edge and its measurement
+TITLE_SIZE = 12
+
+# The wall is fitted into this share of the figure, (left, bottom, width,
+# height), with the title above it.
+AXES_BOX = (0.02, 0.02, 0.96, 0.92)
+
+_renderers = {} # (backend, figsize, dpi) -> renderer, for render_layout
+
+
+def build_scene(
+    layout,
+    title=None,
+    labels=None, # {frame name: text drawn inside it}; defaults to the name
+    label_size=6,
+    guides=False, # faint diagonals, centre line and top (and bottom) edge
+    midline=None, # text for a dashed line across the wall's middle
+    measure=None, # 'top' or 'both': arrows and distances from the wall edges
+    decorations=(),
+):
+    if measure not in (None, 'top', 'both'):
+        raise ValueError("measure must be 'top', 'both' or None")
+    wall_w, wall_h = layout.wall_size
+    boxes = layout.boxes().tolist()
+    centers = layout.centers.tolist()
+    labels = labels or {}
+
+    rects = [Rect(0, 0, wall_w, wall_h, WALL_FACE, WALL_EDGE, 1)]
+    rects += [Rect(x0, y0, x1 - x0, y1 - y0, FRAME_FACE, FRAME_EDGE, FRAME_LINE_WIDTH) for x0, y0, x1, y1 in boxes]
+    rects += [Rect(d.x, d.y, d.width, d.height, d.facecolor, d.edgecolor, 1) for d in decorations]
+    texts = [Text(cx, cy, labels.get(name, name), label_size, 'black', 'center', 'center', True)
+             for name, (cx, cy) in zip(layout.names, centers)]
+    texts += [Text(d.x + d.width / 2, d.y + d.height / 2, d.text, 6, d.text_color, 'center', 'center', False)
+              for d in decorations if d.text]
+    lines = []
+    markers = []
+
+    if guides:
+        edges = [((0, wall_h), (wall_w, wall_h))]
+        if measure == 'both':
+            edges.append(((0, 0), (wall_w, 0)))
+        lines.append(Lines([((0, 0), (wall_w, wall_h)), ((0, wall_h), (wall_w, 0))], 'red', ':', 0.3, 0.8))
+        lines.append(Lines([((wall_w / 2, 0), (wall_w / 2, wall_h))] + edges, 'black', ':', 0.3, 0.8))
+    if midline is not None:
+        lines.append(Lines([((0, wall_h / 2), (wall_w, wall_h / 2))], 'darkgray', '--', 0.6, 1.0))
+        texts.append(Text(wall_w / 2, wall_h / 2 - 2, midline, 6, 'darkgray', 'center', 'top', False))
+
+    sides = []
+    if measure is not None:
+        suffix = " (T)" if measure == 'both' else ""
+        sides.append((wall_h, [box[3] for box in boxes], TOP_COLOR, 'v', 'bottom', 1, suffix))
+    if measure == 'both':
+        sides.append((0, [box[1] for box in boxes], BOTTOM_COLOR, '^', 'top', -1, " (B)"))
+    xs = [cx for cx, _ in centers]
+    for wall_edge, edges, color, marker, va, direction, suffix in sides:
+        # Dotted arrows from the wall edge to each frame edge, with the
+        # distance written just outside the frame.
+        lines.append(Lines([((x, wall_edge), (x, edge)) for x, edge in zip(xs, edges)], color, ':', 0.6, 0.7))
+        markers.append(Markers(list(zip(xs, edges)), marker, color, 0.6, 3))
+        texts += [Text(x, edge + direction * MEASURE_OFFSET, f"{abs(wall_edge - edge):.1f} cm{suffix}",
+                       6, color, 'center', va, True) for x, edge in zip(xs, edges)]
+    return Scene(layout.wall_size, title, rects, lines, markers, texts)
+
+
+class AggRenderer:
+    # One reusable matplotlib figure drawn on the Agg canvas.
+
+    def __init__(self, figsize=(12, 8), dpi=150):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.dpi = dpi
+        self.layouts_rendered = 0
+
+    def render(self, scene, output, image_format='png', compress_level=1):
+        from matplotlib.collections import LineCollection, PatchCollection
+        from matplotlib.patches import Rectangle
+
+        wall_w, wall_h = scene.wall_size
+        figure = self.figure
+        figure.clear()
+        ax = figure.add_axes(AXES_BOX)
+        ax.set_xlim(0, wall_w)
+        ax.set_ylim(0, wall_h)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        if scene.title:
+            ax.set_title(scene.title, fontsize=TITLE_SIZE)
+
+        rects = scene.rects
+        ax.add_collection(PatchCollection(
+            [Rectangle((r.x, r.y), r.width, r.height) for r in rects],
+            facecolor=[r.facecolor for r in rects], edgecolor=[r.edgecolor for r in rects],
+            linewidth=[r.linewidth for r in rects]))
+        for group in scene.lines:
+            ax.add_collection(LineCollection(
+                group.segments, color=group.color, linestyle=group.linestyle,
+                alpha=group.alpha, linewidth=group.linewidth))
+        for group in scene.markers:
+            xs, ys = zip(*group.points) if group.points else ((), ())
+            ax.plot(xs, ys, linestyle='none', marker=group.marker, markersize=group.size,
+                    color=group.color, alpha=group.alpha)
+        for text in scene.texts:
+            ax.text(text.x, text.y, text.text, ha=text.ha, va=text.va, fontsize=text.size,
+                    color=text.color, fontweight='bold' if text.bold else 'normal')
+
+        # PNG encoding dominates at zlib level 6, the usual default.
+        options = {'pil_kwargs': {'compress_level': compress_level}} if image_format == 'png' else {}
+        figure.savefig(output, dpi=self.dpi, format=image_format, **options)
+        self.layouts_rendered += 1
+        return output
+
+
+class PillowRenderer:
+    # Draws scenes with ImageDraw onto an image the size the Agg figure
+    # would be, with the wall fitted the same way. Dotted and dashed lines
+    # are drawn as short segments, and translucent shapes on an overlay.
+
+    def __init__(self, figsize=(12, 8), dpi=150):
+        self.size = (round(figsize[0] * dpi), round(figsize[1] * dpi))
+        self.dpi = dpi
+        self._fonts = {} # (points, bold) -> font
+        self.layouts_rendered = 0
+
+    def _font(self, points, bold):
+        from PIL import ImageFont
+
+        key = (points, bold)
+        font = self._fonts.get(key)
+        if font is None:
+            pixels = max(round(points * self.dpi / 72), 1)
+            try:
+                font = ImageFont.truetype('DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf', pixels)
+            except OSError:
+                font = ImageFont.load_default(pixels)
+            self._fonts[key] = font
+        return font
+
+    def render(self, scene, output, image_format='png', compress_level=1):
+        from PIL import Image, ImageColor, ImageDraw
+
+        width, height = self.size
+        wall_w, wall_h = scene.wall_size
+        left, bottom, box_w, box_h = AXES_BOX
+        scale = min(box_w * width / wall_w, box_h * height / wall_h)
+        origin_x = (left + box_w / 2) * width - wall_w * scale / 2
+        origin_y = (1 - bottom - box_h / 2) * height + wall_h * scale / 2
+        points_to_pixels = self.dpi / 72
+
+        def to_image(x, y):
+            return origin_x + x * scale, origin_y - y * scale
+
+        image = Image.new('RGBA', self.size, 'white')
+        draw = ImageDraw.Draw(image)
+        if scene.title:
+            draw.text((width / 2, origin_y - wall_h * scale - 6 * points_to_pixels), scene.title,
+                      fill='black', font=self._font(TITLE_SIZE, False), anchor='md')
+
+        for r in scene.rects:
+            x0, y1 = to_image(r.x, r.y)
+            x1, y0 = to_image(r.x + r.width, r.y + r.height)
+            draw.rectangle((x0, y0, x1, y1), fill=r.facecolor, outline=r.edgecolor,
+                           width=max(round(r.linewidth * points_to_pixels), 1))
+
+        overlay = Image.new('RGBA', self.size, (0, 0, 0, 0))
+        overlay_draw = ImageDraw.Draw(overlay)
+        for group in scene.lines:
+            color = ImageColor.getrgb(group.color)[:3] + (round(255 * group.alpha),)
+            line_width = max(round(group.linewidth * points_to_pixels), 1)
+            dash = (line_width, 2 * line_width) if group.linestyle == ':' else (4 * line_width, 2 * line_width)
+            for start, end in group.segments:
+                for piece in _dashes(to_image(*start), to_image(*end), *dash):
+                    overlay_draw.line(piece, fill=color, width=line_width)
+        for group in scene.markers:
+            color = ImageColor.getrgb(group.color)[:3] + (round(255 * group.alpha),)
+            half = group.size * points_to_pixels / 2
+            tip = 1 if group.marker == 'v' else -1 # pointing down or up
+            for point in group.points:
+                x, y = to_image(*point)
+                overlay_draw.polygon([(x - half, y - tip * half), (x + half, y - tip * half), (x, y + tip * half)],
+                                     fill=color)
+        image.alpha_composite(overlay)
+
+        anchors = {'left': 'l', 'center': 'm', 'right': 'r', 'top': 'a', 'bottom': 'd'}
+        for text in scene.texts:
+            anchor = anchors[text.ha] + ('m' if text.va == 'center' else anchors[text.va])
+            draw.multiline_text(to_image(text.x, text.y), text.text, fill=text.color,
+                                font=self._font(text.size, text.bold), anchor=anchor, align='center')
+
+        options = {'compress_level': compress_level} if image_format == 'png' else {}
+        image.convert('RGB').save(output, image_format.upper(), **options)
+        self.layouts_rendered += 1
+        return output
+
+
+def _dashes(start, end, on, off):
+    # Pieces of the line from start to end: `on` pixels drawn, then `off`
+    # skipped, repeating.
+    (x0, y0), (x1, y1) = start, end
+    length = math.hypot(x1 - x0, y1 - y0)
+    if length == 0:
+        return []
+    dx, dy = (x1 - x0) / length, (y1 - y0) / length
+    pieces = []
+    position = 0.0
+    while position < length:
+        stop = min(position + on, length)
+        pieces.append(((x0 + dx * position, y0 + dy * position), (x0 + dx * stop, y0 + dy * stop)))
+        position += on + off
+    return pieces
+
+
+RENDERERS = {'agg': AggRenderer, 'pillow': PillowRenderer}
+
+
+def render_layout(layout, output, figsize=(12, 8), dpi=150, backend='agg', image_format='png',
+                  compress_level=1, cache=None, **options):
+    # Draws a layout with a renderer kept per backend and figure size, so a
+    # process drawing many layouts sets each one up once. `options` go to
+    # build_scene. With a cache (output_cache.OutputCache) the image is
+    # looked up by its scene and settings first, and a hit is written out
+    # without setting up a renderer at all.
+    renderer_class = RENDERERS.get(backend)
+    if renderer_class is None:
+        raise ValueError(f"Unknown backend. Use one of: {', '.join(RENDERERS)}.")
+    scene = build_scene(layout, **options)
+    entry = None
+    if cache is not None:
+        from importlib.metadata import version
+
+        library = version('matplotlib' if backend == 'agg' else 'Pillow')
+        entry = cache_key('frame_render', code_version(__name__), library, backend, list(figsize), dpi,
+                          image_format, compress_level, scene)
+        data = cache.get(entry)
+        if data is not None:
+            write_output(output, data)
+            return output
+    key = (backend, tuple(figsize), dpi)
+    renderer = _renderers.get(key)
+    if renderer is None:
+        renderer = _renderers[key] = renderer_class(figsize, dpi)
+    if entry is None:
+        return renderer.render(scene, output, image_format, compress_level)
+    buffer = BytesIO()
+    renderer.render(scene, buffer, image_format, compress_level)
+    cache.put(entry, buffer.getvalue())
+    write_output(output, buffer.getvalue())
+    return output
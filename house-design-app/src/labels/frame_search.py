@@ -0,0 +1,298 @@
+import itertools
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .frame_layout import LayoutSpec, above, below, center_x, center_y, left_of, right_of
+
+# Automatic gallery wall arrangements: which frame goes where and which way
+# up, scored in NumPy batches.
+#
+# Candidates fill the slots of a cluster template (see cluster_spec) in some
+# order with some frames rotated. Small frame sets are enumerated outright;
+# larger ones are searched by mutating the best candidates found so far
+# (swapping slots, flipping rotations), one independent search per worker.
+
+# Score = sum of weight * term, lower is better:
+#   overlap   area where frames overlap, per unit of frame area
+#   bounds    frame area off the wall, per unit of frame area
+#   symmetry  how far the mirror image about the wall's vertical centre line
+#             is from the layout itself, plus how far the area-weighted
+#             centre is from the wall centre, in typical frame sizes
+#   spacing   mean difference between each frame's gap to its nearest
+#             neighbour and the target spacing, in typical frame sizes
+DEFAULT_WEIGHTS = {'overlap': 100.0, 'bounds': 100.0, 'symmetry': 1.0, 'spacing': 1.0}
+
+BATCH_SIZE = 2048 # candidates scored per NumPy batch
+EXHAUSTIVE_LIMIT = 50_000 # enumerate every candidate up to this many
+
+# One found layout: its score, the weighted-sum terms and the solved
+# frame_layout.Layout.
+Arrangement = namedtuple('Arrangement', ['score', 'terms', 'layout'])
+
+
+def cluster_spec(wall_size, frames, spacing, rows=3, rotated=None):
+    # A centred cluster template over (name, (width, height)) frames in slot
+    # order. The middle row is filled first, from the centre outwards
+    # alternating left and right, then the rows above and below it in turn,
+    # each frame centred over or under the frame of the row before in its
+    # column. The whole cluster is centred on the wall.
+    count = len(frames)
+    columns = max(math.ceil(count / rows), 1)
+    rotated = rotated if rotated is not None else [False] * count
+    spec = LayoutSpec(wall_size, spacing)
+    grid = {} # (layer, column) -> name
+    for slot, ((name, size), turn) in enumerate(zip(frames, rotated)):
+        layer, column = divmod(slot, columns)
+        if layer == 0:
+            if column == 0:
+                x, y = center_x(), center_y()
+            else:
+                beside = grid[0, max(column - 2, 0)]
+                x = left_of(beside) if column % 2 else right_of(beside)
+                y = center_y(grid[0, 0])
+        else:
+            # Layers 1, 2, 3, 4, ... are rows +1, -1, +2, -2, ...
+            inner = grid[max(layer - 2, 0), column]
+            x, y = center_x(inner), above(inner) if layer % 2 else below(inner)
+        grid[layer, column] = name
+        spec.add(name, size, x, y, rotated=bool(turn))
+    names = [name for name, _ in frames]
+    spec.center_group(names, axis='x')
+    spec.center_group(names, axis='y')
+    return spec
+
+
+def score_layouts(centers, sizes, wall_size, spacing, weights=None):
+    # Scores V solved layouts given as (V, n, 2) frame centres and placed
+    # sizes. Returns (scores, terms) with scores (V,) and terms mapping each
+    # DEFAULT_WEIGHTS key to its unweighted (V,) values.
+    # x and y are handled as separate (V, n) arrays: reducing over a
+    # trailing axis of length 2 is several times slower in NumPy.
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    wall_w, wall_h = wall_size
+    cx, cy = centers[..., 0], centers[..., 1]
+    w, h = sizes[..., 0], sizes[..., 1]
+    x0, x1 = cx - w / 2, cx + w / 2
+    y0, y1 = cy - h / 2, cy + h / 2
+    area = w * h
+    total = np.maximum(area.sum(axis=1), 1e-12)
+    typical = np.maximum((w.sum(axis=1) + h.sum(axis=1)) / (2 * w.shape[1]), 1e-12)
+    count = centers.shape[1]
+    diagonal = np.eye(count, dtype=bool)
+
+    # Pairwise (V, n, n) edge distances along each axis; negative where
+    # the two frames overlap along that axis.
+    apart_x = np.maximum(x0[:, None, :] - x1[:, :, None], x0[:, :, None] - x1[:, None, :])
+    apart_y = np.maximum(y0[:, None, :] - y1[:, :, None], y0[:, :, None] - y1[:, None, :])
+    # The overlap itself is no longer than the shorter frame, which matters
+    # when one lies within the other.
+    overlap_x = np.minimum(-apart_x, np.minimum(w[:, None, :], w[:, :, None]))
+    overlap_y = np.minimum(-apart_y, np.minimum(h[:, None, :], h[:, :, None]))
+    overlap_area = np.clip(overlap_x, 0, None) * np.clip(overlap_y, 0, None)
+    overlap_area[:, diagonal] = 0
+    terms = {'overlap': overlap_area.sum(axis=(1, 2)) / 2 / total}
+
+    inside_w = np.clip(np.minimum(x1, wall_w) - np.maximum(x0, 0), 0, None)
+    inside_h = np.clip(np.minimum(y1, wall_h) - np.maximum(y0, 0), 0, None)
+    terms['bounds'] = np.maximum(area - inside_w * inside_h, 0).sum(axis=1) / total
+
+    mismatch = np.abs(wall_w - cx[:, None, :] - cx[:, :, None])
+    mismatch += np.abs(cy[:, None, :] - cy[:, :, None])
+    mismatch += np.abs(w[:, None, :] - w[:, :, None])
+    mismatch += np.abs(h[:, None, :] - h[:, :, None])
+    balance = (np.abs((area * cx).sum(axis=1) / total - wall_w / 2)
+               + np.abs((area * cy).sum(axis=1) / total - wall_h / 2))
+    terms['symmetry'] = (mismatch.min(axis=2).mean(axis=1) + balance) / typical
+
+    if count > 1:
+        # Frames apart on both axes are separated by the corner distance.
+        gap = np.maximum(apart_x, apart_y)
+        corner = (apart_x > 0) & (apart_y > 0)
+        gap[corner] = np.hypot(apart_x[corner], apart_y[corner])
+        gap[:, diagonal] = np.inf
+        nearest = np.clip(gap.min(axis=2), 0, None)
+        terms['spacing'] = np.abs(nearest - spacing).mean(axis=1) / typical
+    else:
+        terms['spacing'] = np.zeros(len(centers))
+
+    scores = sum(weights[key] * terms[key] for key in DEFAULT_WEIGHTS)
+    return scores, terms
+
+
+class _Problem:
+    # What every search worker needs: the frames, a slot template and the
+    # scoring setup.
+
+    def __init__(self, wall_size, frames, spacing, rows, rotatable, weights):
+        self.wall_size = wall_size
+        self.names = list(frames)
+        self.sizes = np.array([frames[name] for name in self.names], dtype=float)
+        # Square frames look the same either way up.
+        self.rotatable = np.asarray(rotatable, dtype=bool) & (self.sizes[:, 0] != self.sizes[:, 1])
+        self.spacing = spacing
+        self.rows = rows
+        self.weights = weights
+        slots = [(f"slot{i}", (1.0, 1.0)) for i in range(len(self.names))]
+        self.template = cluster_spec(wall_size, slots, spacing, rows)
+
+    def placed_sizes(self, orders, rotated):
+        # (V, n, 2) sizes per slot as hung
+        sizes = self.sizes[orders]
+        turned = np.take_along_axis(rotated, orders, axis=1)
+        return np.where(turned[..., None], sizes[..., ::-1], sizes)
+
+    def score(self, orders, rotated):
+        # (V,) scores and terms for candidates given as (V, n) slot orders
+        # (frame index per slot) and (V, n) rotations per frame.
+        scores = np.empty(len(orders))
+        terms = {key: np.empty(len(orders)) for key in DEFAULT_WEIGHTS}
+        for start in range(0, len(orders), BATCH_SIZE):
+            order = orders[start:start + BATCH_SIZE]
+            turned = np.take_along_axis(rotated[start:start + BATCH_SIZE], order, axis=1)
+            centers, sizes = self.template.solve_many(self.sizes[order], turned)
+            batch_scores, batch_terms = score_layouts(centers, sizes, self.wall_size, self.spacing, self.weights)
+            scores[start:start + len(order)] = batch_scores
+            for key, values in batch_terms.items():
+                terms[key][start:start + len(order)] = values
+        return scores, terms
+
+    def random(self, rng, count):
+        orders = np.argsort(rng.random((count, len(self.names))), axis=1)
+        rotated = (rng.random((count, len(self.names))) < 0.5) & self.rotatable
+        return orders, rotated
+
+    def mutate(self, rng, orders, rotated):
+        # One or two slot swaps per candidate, and a rotation flip for some.
+        orders = orders.copy()
+        rotated = rotated.copy()
+        rows = np.arange(len(orders))
+        count = orders.shape[1]
+        for swaps in (np.ones(len(orders), dtype=bool), rng.random(len(orders)) < 0.5):
+            i = rng.integers(count, size=len(orders))
+            j = rng.integers(count, size=len(orders))
+            picked = rows[swaps]
+            first = orders[picked, i[swaps]]
+            orders[picked, i[swaps]] = orders[picked, j[swaps]]
+            orders[picked, j[swaps]] = first
+        flip = rng.random(len(orders)) < 0.3
+        frame = rng.integers(count, size=len(orders))
+        rotated[rows[flip], frame[flip]] ^= self.rotatable[frame[flip]]
+        return orders, rotated
+
+
+def _best(problem, orders, rotated, keep):
+    # The `keep` best distinct candidates. Candidates hanging the same sizes
+    # the same way in every slot (e.g. equal frames swapped) look the same
+    # and count once.
+    _, distinct = np.unique(problem.placed_sizes(orders, rotated).reshape(len(orders), -1),
+                            axis=0, return_index=True)
+    orders, rotated = orders[distinct], rotated[distinct]
+    scores, _ = problem.score(orders, rotated)
+    best = np.argsort(scores, kind='stable')[:keep]
+    return orders[best], rotated[best], scores[best]
+
+
+def _search_evolve(problem, seed, population, generations, keep):
+    rng = np.random.default_rng(seed)
+    elite_count = max(population // 8, 1)
+    fresh_count = max(population // 16, 1)
+    orders, rotated = problem.random(rng, population)
+    for _ in range(generations):
+        orders, rotated, _ = _best(problem, orders, rotated, elite_count)
+        parents = rng.integers(elite_count, size=population - elite_count - fresh_count)
+        children = problem.mutate(rng, orders[parents], rotated[parents])
+        fresh = problem.random(rng, fresh_count)
+        orders = np.concatenate([orders, children[0], fresh[0]])
+        rotated = np.concatenate([rotated, children[1], fresh[1]])
+    return _best(problem, orders, rotated, keep)
+
+
+def _all_candidates(problem):
+    count = len(problem.names)
+    turnable = np.flatnonzero(problem.rotatable)
+    orders = np.array(list(itertools.permutations(range(count))), dtype=np.intp).reshape(-1, count)
+    flips = np.zeros((2 ** len(turnable), count), dtype=bool)
+    if len(turnable):
+        flips[:, turnable] = np.array(list(itertools.product((False, True), repeat=len(turnable))))
+    return np.repeat(orders, len(flips), axis=0), np.tile(flips, (len(orders), 1))
+
+
+def _candidate_count(problem):
+    return math.factorial(len(problem.names)) * 2 ** int(problem.rotatable.sum())
+
+
+def arrange_frames(
+    wall_size,
+    frames, # {name: (width, height)}, as in the frame scripts
+    spacing,
+    top_k=5,
+    rows=3, # rows of the cluster template
+    rotatable=True, # bool, or one per frame: whether it may hang turned
+    weights=None, # overrides for DEFAULT_WEIGHTS
+    workers=1, # processes; None for one per CPU
+    seed=0,
+    population=512, # candidates per search generation
+    generations=60,
+    exhaustive_limit=EXHAUSTIVE_LIMIT,
+):
+    # Returns the top_k distinct Arrangements, best first. Frame sets with
+    # at most exhaustive_limit orderings x rotations are searched
+    # exhaustively, larger ones by `workers` independent evolutionary
+    # searches whose results are merged.
+    if not frames:
+        raise ValueError("No frames to arrange")
+    rotatable = np.broadcast_to(np.asarray(rotatable, dtype=bool), (len(frames),))
+    problem = _Problem(tuple(wall_size), dict(frames), spacing, rows, rotatable, weights)
+    workers = workers or os.cpu_count() or 1
+    keep = 2 * top_k # spares for layouts that only differ by rounding
+
+    if _candidate_count(problem) <= exhaustive_limit:
+        orders, rotated = _all_candidates(problem)
+        chunks = [(orders[i::workers], rotated[i::workers]) for i in range(workers)]
+        jobs = [(_best, problem, chunk_orders, chunk_rotated, keep)
+                for chunk_orders, chunk_rotated in chunks if len(chunk_orders)]
+    else:
+        jobs = [(_search_evolve, problem, seed + i, population, generations, keep) for i in range(workers)]
+
+    if workers == 1 or len(jobs) == 1:
+        results = [fn(*args) for fn, *args in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_job, jobs))
+    orders = np.concatenate([result[0] for result in results])
+    rotated = np.concatenate([result[1] for result in results])
+    scores = np.concatenate([result[2] for result in results])
+    return _arrangements(problem, orders, rotated, scores, top_k)
+
+
+def _run_job(job):
+    fn, *args = job
+    return fn(*args)
+
+
+def _arrangements(problem, orders, rotated, scores, top_k):
+    # Best first, skipping candidates that place the same boxes, e.g. two
+    # equal frames swapped.
+    arrangements = []
+    seen = set()
+    for index in np.argsort(scores, kind='stable'):
+        order = orders[index].tolist()
+        turned = rotated[index][order].tolist()
+        frames = [(problem.names[i], tuple(problem.sizes[i])) for i in order]
+        spec = cluster_spec(problem.wall_size, frames, problem.spacing, problem.rows, turned)
+        layout = spec.solve()
+        key = np.round(layout.boxes(), 6)
+        key = key[np.lexsort(key.T[::-1])].tobytes()
+        if key in seen:
+            continue
+        seen.add(key)
+        _, terms = score_layouts(layout.centers[None], layout.sizes[None], problem.wall_size,
+                                 problem.spacing, problem.weights)
+        arrangements.append(Arrangement(float(scores[index]), {k: float(v[0]) for k, v in terms.items()}, layout))
+        if len(arrangements) == top_k:
+            break
+    return arrangements
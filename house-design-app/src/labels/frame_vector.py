@@ -0,0 +1,241 @@
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+from .frame_render import TITLE_SIZE, Scene, build_scene
+
+# Installation sheets: solved frame layouts written as SVG or PDF straight
+# from a frame_render.Scene, so frame positions and the measurements to the
+# wall edges stay exact at any zoom and files stay small. No matplotlib
+# figure is involved; PDFs are drawn with reportlab, as the label sheets are.
+#
+# Geometry is drawn at `scale` paper cm per wall cm (1:10 by default) while
+# line widths and text keep their sizes in points, as on the PNGs. One
+# document holds any number of walls: a PDF gets a page per wall and an SVG
+# stacks them top to bottom.
+
+DEFAULT_SCALE = 0.1
+POINTS_PER_CM = 72 / 2.54
+MARGIN = 36 # points around each wall
+TITLE_BAND = 24 # points above the wall for the title
+LEADING = 1.2 # line height as a multiple of the font size
+ASCENT = 0.75 # share of the font size above the baseline
+DESCENT = 0.25
+FONT = 'Helvetica'
+BOLD_FONT = 'Helvetica-Bold'
+SVG_FONT_FAMILY = 'Helvetica, Arial, sans-serif'
+
+# Dash patterns as multiples of the line width, as matplotlib draws them.
+DASHES = {':': (1, 1.65), '--': (3.7, 1.6), '-': None}
+
+
+class _Page:
+    # Where a scene lands on paper: its size in points and the mapping from
+    # wall units to points, with y growing upwards and the origin at the
+    # page's bottom-left corner.
+
+    def __init__(self, scene, scale):
+        wall_w, wall_h = scene.wall_size
+        # Frames hung past the wall still have to be on the sheet.
+        x0 = min([0] + [r.x for r in scene.rects])
+        y0 = min([0] + [r.y for r in scene.rects])
+        x1 = max([wall_w] + [r.x + r.width for r in scene.rects])
+        y1 = max([wall_h] + [r.y + r.height for r in scene.rects])
+        self.scale = scale * POINTS_PER_CM
+        self.offset = (MARGIN - x0 * self.scale, MARGIN - y0 * self.scale)
+        self.width = (x1 - x0) * self.scale + 2 * MARGIN
+        self.height = (y1 - y0) * self.scale + 2 * MARGIN + (TITLE_BAND if scene.title else 0)
+        self.title_at = (self.width / 2, self.height - MARGIN - TITLE_SIZE)
+        self.scale_label = f"Scale 1:{1 / scale:g}, distances in cm"
+
+    def point(self, x, y):
+        return self.offset[0] + x * self.scale, self.offset[1] + y * self.scale
+
+
+def _baselines(y, lines, size, va):
+    # Baseline of each line of a text anchored at `y` (points, y up),
+    # matching matplotlib's 'top' / 'center' / 'bottom' placement closely
+    # enough for labels.
+    block = (len(lines) - 1) * LEADING * size + size
+    if va == 'top':
+        first = y - ASCENT * size
+    elif va == 'bottom':
+        first = y - DESCENT * size + block - size
+    else:
+        first = y + block / 2 - ASCENT * size
+    return [first - i * LEADING * size for i in range(len(lines))]
+
+
+def _triangles(page, group):
+    # (x, y) corners of each marker, pointing down for 'v' and up otherwise.
+    half = group.size / 2
+    tip = -1 if group.marker == 'v' else 1
+    for point in group.points:
+        x, y = page.point(*point)
+        yield (x - half, y - tip * half), (x + half, y - tip * half), (x, y + tip * half)
+
+
+def _scenes(scenes):
+    return [scenes] if isinstance(scenes, Scene) else scenes
+
+
+def _n(value):
+    # Coordinates to 1/100 pt, with no trailing zeros, keep SVGs small.
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def _svg_page(scene, page, top):
+    # SVG elements for one scene whose page starts `top` points down the
+    # document.
+    def xy(x, y):
+        px, py = page.point(x, y)
+        return _n(px), _n(top + page.height - py)
+
+    parts = []
+    for r in scene.rects:
+        x, y = xy(r.x, r.y + r.height)
+        parts.append(f'<rect x="{x}" y="{y}" width="{_n(r.width * page.scale)}" '
+                     f'height="{_n(r.height * page.scale)}" fill="{r.facecolor}" '
+                     f'stroke="{r.edgecolor}" stroke-width="{_n(r.linewidth)}"/>')
+    for group in scene.lines:
+        path = ''.join('M{},{}L{},{}'.format(*xy(*start), *xy(*end)) for start, end in group.segments)
+        dash = DASHES.get(group.linestyle)
+        dash = f' stroke-dasharray="{_n(dash[0] * group.linewidth)},{_n(dash[1] * group.linewidth)}"' if dash else ''
+        parts.append(f'<path d="{path}" fill="none" stroke="{group.color}" stroke-opacity="{group.alpha:g}" '
+                     f'stroke-width="{_n(group.linewidth)}"{dash}/>')
+    for group in scene.markers:
+        path = ''.join('M{},{}L{},{}L{},{}Z'.format(*(_n(v) for x, y in corners for v in (x, top + page.height - y)))
+                       for corners in _triangles(page, group))
+        parts.append(f'<path d="{path}" fill="{group.color}" fill-opacity="{group.alpha:g}"/>')
+
+    anchors = {'left': 'start', 'center': 'middle', 'right': 'end'}
+    if scene.title:
+        x, y = page.title_at
+        parts.append(f'<text x="{_n(x)}" y="{_n(top + page.height - y)}" font-size="{TITLE_SIZE}" '
+                     f'text-anchor="middle">{escape(scene.title)}</text>')
+    for text in scene.texts:
+        x, y = page.point(text.x, text.y)
+        lines = text.text.split('\n')
+        weight = ' font-weight="bold"' if text.bold else ''
+        for line, baseline in zip(lines, _baselines(y, lines, text.size, text.va)):
+            parts.append(f'<text x="{_n(x)}" y="{_n(top + page.height - baseline)}" font-size="{text.size:g}" '
+                         f'text-anchor="{anchors[text.ha]}" fill="{text.color}"{weight}>{escape(line)}</text>')
+    parts.append(f'<text x="{_n(page.width - MARGIN)}" y="{_n(top + page.height - MARGIN / 2)}" font-size="6" '
+                 f'text-anchor="end" fill="gray">{escape(page.scale_label)}</text>')
+    return parts
+
+
+def write_svg(scenes, path, scale=DEFAULT_SCALE):
+    # Writes one SVG with every scene, in points, so it prints at `scale`.
+    scenes = list(_scenes(scenes))
+    pages = [_Page(scene, scale) for scene in scenes]
+    width = max([page.width for page in pages] + [0])
+    height = sum(page.height for page in pages)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_n(width)}pt" height="{_n(height)}pt" '
+        f'viewBox="0 0 {_n(width)} {_n(height)}" font-family={quoteattr(SVG_FONT_FAMILY)}>'
+    ]
+    top = 0
+    for scene, page in zip(scenes, pages):
+        title = f'<title>{escape(scene.title)}</title>' if scene.title else ''
+        parts.append(f'<g>{title}')
+        parts += _svg_page(scene, page, top)
+        parts.append('</g>')
+        top += page.height
+    parts.append('</svg>\n')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+    return path
+
+
+def _pdf_page(c, scene, page, color):
+    # Draws one scene on the canvas' current page.
+    c.setPageSize((page.width, page.height))
+    for r in scene.rects:
+        x, y = page.point(r.x, r.y)
+        c.setFillColor(color(r.facecolor))
+        c.setStrokeColor(color(r.edgecolor))
+        c.setLineWidth(r.linewidth)
+        c.rect(x, y, r.width * page.scale, r.height * page.scale, stroke=1, fill=1)
+
+    # One path per group of lines or markers, like the Agg collections.
+    for group in scene.lines:
+        path = c.beginPath()
+        for start, end in group.segments:
+            path.moveTo(*page.point(*start))
+            path.lineTo(*page.point(*end))
+        dash = DASHES.get(group.linestyle)
+        c.setDash([dash[0] * group.linewidth, dash[1] * group.linewidth] if dash else [])
+        c.setStrokeColor(color(group.color))
+        c.setStrokeAlpha(group.alpha)
+        c.setLineWidth(group.linewidth)
+        c.drawPath(path, stroke=1, fill=0)
+    c.setDash([])
+    c.setStrokeAlpha(1)
+    for group in scene.markers:
+        path = c.beginPath()
+        for first, *rest in _triangles(page, group):
+            path.moveTo(*first)
+            for corner in rest:
+                path.lineTo(*corner)
+            path.close()
+        c.setFillColor(color(group.color))
+        c.setFillAlpha(group.alpha)
+        c.drawPath(path, stroke=0, fill=1)
+    c.setFillAlpha(1)
+
+    draw = {'left': c.drawString, 'center': c.drawCentredString, 'right': c.drawRightString}
+    if scene.title:
+        c.setFont(FONT, TITLE_SIZE)
+        c.setFillColor(color('black'))
+        c.drawCentredString(*page.title_at, scene.title)
+    for text in scene.texts:
+        x, y = page.point(text.x, text.y)
+        lines = text.text.split('\n')
+        c.setFont(BOLD_FONT if text.bold else FONT, text.size)
+        c.setFillColor(color(text.color))
+        for line, baseline in zip(lines, _baselines(y, lines, text.size, text.va)):
+            draw[text.ha](x, baseline, line)
+    c.setFont(FONT, 6)
+    c.setFillColor(color('gray'))
+    c.drawRightString(page.width - MARGIN, MARGIN / 2, page.scale_label)
+    c.showPage()
+
+
+def write_pdf(scenes, path, scale=DEFAULT_SCALE):
+    # Writes a PDF with a page per scene, each page sized to its wall.
+    # Scenes are drawn as they arrive, so a generator of many walls is never
+    # held in memory at once.
+    from reportlab.lib.colors import toColor
+    from reportlab.pdfgen import canvas
+
+    colors = {}
+
+    def color(name):
+        value = colors.get(name)
+        if value is None:
+            value = colors[name] = toColor(name)
+        return value
+
+    c = canvas.Canvas(os.fspath(path), pageCompression=1) # reportlab takes str paths only
+    for scene in _scenes(scenes):
+        _pdf_page(c, scene, _Page(scene, scale), color)
+    c.save()
+    return path
+
+
+WRITERS = {'.svg': write_svg, '.pdf': write_pdf}
+
+
+def export_layouts(layouts, path, scale=DEFAULT_SCALE, **options):
+    # Writes solved layouts (or ready-made scenes) to one SVG or PDF, told
+    # apart by the file suffix. `options` go to frame_render.build_scene for
+    # every layout.
+    suffix = str(path).lower()[-4:]
+    writer = WRITERS.get(suffix)
+    if writer is None:
+        raise ValueError(f"Unknown vector format. Use one of: {', '.join(WRITERS)}.")
+    if isinstance(layouts, Scene) or hasattr(layouts, 'boxes'):
+        layouts = [layouts]
+    scenes = (item if isinstance(item, Scene) else build_scene(item, **options) for item in layouts)
+    return writer(scenes, path, scale)
@@ -0,0 +1,108 @@
+from collections import OrderedDict, namedtuple
+
+MIN_FONT_SIZE = 4
+FONT_SIZE_STEP = 0.5
+LEADING_RATIO = 1.2
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+FitResult = namedtuple('FitResult', ['font_size', 'width', 'height'])
+
+
+def candidate_font_sizes(start_size):
+    # The sizes the old shrink loop walked through: start, start - 0.5, ...
+    # down to the first size at or below MIN_FONT_SIZE.
+    sizes = [start_size]
+    while sizes[-1] > MIN_FONT_SIZE:
+        sizes.append(sizes[-1] - FONT_SIZE_STEP)
+    return sizes
+
+
+def paragraph_style_for_size(base_style, font_size):
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(
+        f"{base_style.name}-{font_size}", parent=base_style,
+        fontSize=font_size, leading=font_size * LEADING_RATIO,
+    )
+
+
+class ParagraphFitCache:
+    # LRU cache of the font size a paragraph needs to fit its label box.
+    # Keyed on (markup, available width, available height, font, start size).
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _wrap(canv, markup, style, available_width, available_height):
+    from reportlab.platypus import Paragraph
+
+    paragraph = Paragraph(markup, style)
+    w, h = paragraph.wrapOn(canv, available_width, available_height)
+    return paragraph, w, h
+
+
+def fit_paragraph(canv, markup, base_style, available_width, available_height, fit_cache=None):
+    # Returns a wrapped Paragraph at the largest candidate size that fits, or
+    # at the smallest candidate when nothing does, plus its (width, height).
+    key = (markup, available_width, available_height, base_style.fontName, base_style.fontSize)
+    cached = fit_cache.get(key) if fit_cache is not None else None
+    if cached is not None:
+        style = paragraph_style_for_size(base_style, cached.font_size)
+        paragraph, w, h = _wrap(canv, markup, style, available_width, available_height)
+        return paragraph, w, h
+
+    sizes = candidate_font_sizes(base_style.fontSize)
+    wrapped = {}
+
+    def fits(i):
+        style = paragraph_style_for_size(base_style, sizes[i])
+        wrapped[i] = _wrap(canv, markup, style, available_width, available_height)
+        _, w, h = wrapped[i]
+        return w <= available_width and h <= available_height
+
+    # Most labels fit at the start size, so try it first. Reportlab breaks
+    # words at different points as the size changes, so whether a size fits
+    # does not fall off monotonically and the sizes are walked in order, as
+    # the old loop did. A paragraph that did not fit has at least one line,
+    # so sizes whose leading is taller than the box are skipped.
+    lo = 0
+    if not fits(0) and len(sizes) > 1:
+        lo = 1
+        while lo < len(sizes) - 1 and sizes[lo] * LEADING_RATIO > available_height:
+            lo += 1
+        while lo < len(sizes) - 1 and not fits(lo):
+            lo += 1
+        if lo not in wrapped:
+            fits(lo)
+
+    paragraph, w, h = wrapped[lo]
+    if fit_cache is not None:
+        fit_cache.put(key, FitResult(sizes[lo], w, h))
+    return paragraph, w, h
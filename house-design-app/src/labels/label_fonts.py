@@ -0,0 +1,48 @@
+import os
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Process-wide font registry: each (name, file) pair is parsed once and the
+# TTFont is reused by every later label job in this process.
+_lock = threading.Lock()
+_fonts = {} # (font_name, real path, mtime) -> CachedTTFont
+
+
+class CachedTTFont(TTFont):
+    # TTFont that memoises stringWidth. Paragraph wrapping measures the same
+    # words at the same handful of sizes over and over, and for TrueType
+    # fonts each measurement walks the glyph widths of the text.
+
+    max_cached_widths = 65536
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._widths = {}
+
+    def stringWidth(self, text, size, encoding='utf8'):
+        key = (text, size, encoding)
+        width = self._widths.get(key)
+        if width is None:
+            if len(self._widths) >= self.max_cached_widths:
+                self._widths.clear()
+            width = self._widths[key] = super().stringWidth(text, size, encoding)
+        return width
+
+
+def register_ttf_font(font_name, font_path):
+    # Registers `font_path` under `font_name` with reportlab, parsing the file
+    # only the first time this process sees it (or after it changes on disk).
+    # Raises FileNotFoundError if the file does not exist.
+    real_path = os.path.realpath(font_path)
+    key = (font_name, real_path, os.stat(real_path).st_mtime_ns)
+    with _lock:
+        font = _fonts.get(key)
+        if font is None:
+            font = _fonts[key] = CachedTTFont(font_name, real_path)
+        registered = font_name in pdfmetrics.getRegisteredFontNames() and pdfmetrics.getFont(font_name) is font
+        if not registered:
+            pdfmetrics.registerFont(font)
+    return font
+
@@ -0,0 +1,331 @@
+import codecs
+import logging
+import os
+import pickle
+import tempfile
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+
+# pandas is imported where rows are read, so importing this module (and
+# label_print) stays cheap.
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS_TO_TRY = ['utf-8', 'latin-1', 'cp1252']
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing, available):
+        super().__init__(f"Missing required columns: {missing}")
+        self.missing = missing
+        self.available = available
+
+
+def detect_encoding(input_file_path, encodings=ENCODINGS_TO_TRY, sample_bytes=ENCODING_SAMPLE_BYTES):
+    # Only the first `sample_bytes` are decoded; a multi-byte character cut at
+    # the end of the sample is not an error unless the sample is the whole file.
+    with open(input_file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    is_whole_file = len(sample) < sample_bytes
+    candidates = []
+    for enc in encodings:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=is_whole_file)
+            candidates.append(enc)
+        except UnicodeDecodeError:
+            if not candidates:
+                logger.info("Failed to read with encoding: %s. Trying next...", enc)
+    return candidates
+
+
+def _check_columns(columns, required):
+    missing = [col for col in required if col not in columns]
+    if missing:
+        raise MissingColumnsError(missing, list(columns))
+
+
+def _iter_delimited_chunks(input_file_path, sep, encoding, columns, chunksize):
+    import pandas as pd
+
+    reader = pd.read_csv(input_file_path, sep=sep, encoding=encoding, dtype=str, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            _check_columns(chunk.columns, columns)
+            yield chunk[columns]
+
+
+def _without_trailing_blank_rows(rows):
+    # read_only sheets go on to rows that only carry formatting. Like
+    # pd.read_excel, blank rows are dropped from the end of the sheet but kept
+    # between rows with data.
+    blank_run = 0
+    for row in rows:
+        if all(value is None or value == '' for value in row):
+            blank_run += 1
+            continue
+        for _ in range(blank_run):
+            yield ()
+        blank_run = 0
+        yield row
+
+
+def _iter_xlsx_chunks(input_file_path, columns, chunksize):
+    import openpyxl
+    import pandas as pd
+
+    # Cells come back typed; dimensions are made strings, as read_csv gives
+    # them, so all-numeric cells still reach parse_dimensions as text.
+    workbook = openpyxl.load_workbook(input_file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        _check_columns(header, columns)
+        positions = [list(header).index(col) for col in columns]
+        batch = []
+        for row in _without_trailing_blank_rows(rows):
+            batch.append([row[i] if i < len(row) else None for i in positions])
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns).astype({columns[1]: 'string'})
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns).astype({columns[1]: 'string'})
+    finally:
+        workbook.close()
+
+
+def _iter_dataframe_chunks(df, columns, chunksize):
+    _check_columns(df.columns, columns)
+    df = df[columns]
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def _iter_record_chunks(records, columns, chunksize):
+    # Records are mappings keyed by column name or (product, dimensions) pairs.
+    import pandas as pd
+
+    batch = []
+    for record in records:
+        if isinstance(record, Mapping):
+            if not batch:
+                _check_columns(record.keys(), columns)
+            batch.append([record.get(col) for col in columns])
+        else:
+            batch.append(list(record[:len(columns)]))
+        if len(batch) >= chunksize:
+            yield pd.DataFrame(batch, columns=columns)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=columns)
+
+
+def iter_source_chunks(source, columns, chunksize=10000):
+    # Like iter_label_chunks for in-memory sources: a DataFrame or an
+    # iterable of records. Dimensions are converted to strings, keeping blanks.
+    import pandas as pd
+
+    if isinstance(source, pd.DataFrame):
+        chunks = _iter_dataframe_chunks(source, columns, chunksize)
+    else:
+        chunks = _iter_record_chunks(source, columns, chunksize)
+    for chunk in chunks:
+        yield chunk.astype({columns[1]: 'string'})
+
+
+def iter_label_chunks(input_file_path, columns, chunksize=10000, encoding=None):
+    # Yields DataFrames holding only `columns`, at most `chunksize` rows each.
+    if input_file_path.endswith('.xlsx'):
+        yield from _iter_xlsx_chunks(input_file_path, columns, chunksize)
+    elif input_file_path.endswith('.csv'):
+        yield from _iter_delimited_chunks(input_file_path, ',', encoding or 'utf-8', columns, chunksize)
+    elif input_file_path.endswith('.txt'):
+        yield from _iter_delimited_chunks(input_file_path, '\t', encoding or 'utf-8', columns, chunksize)
+    else:
+        raise ValueError("Unsupported input file format. Use .xlsx, .txt, or .csv.")
+
+
+class RejectedRow(namedtuple('RejectedRow', ['row', 'product', 'dimensions', 'reason'])):
+    # A data row (0-based, header excluded) whose dimensions could not be
+    # used; it is printed at the default label size instead.
+    __slots__ = ()
+
+
+class ValidationReport:
+    def __init__(self, max_rejected_kept=1000):
+        self.max_rejected_kept = max_rejected_kept
+        self.total_rows = 0
+        self.rejected_count = 0
+        self.rejected = []
+
+    def add_rejected(self, rejected_row):
+        self.rejected_count += 1
+        if len(self.rejected) < self.max_rejected_kept:
+            self.rejected.append(rejected_row)
+
+    def as_dict(self):
+        return {
+            'total_rows': self.total_rows,
+            'rejected_count': self.rejected_count,
+            'rejected': [row._asdict() for row in self.rejected],
+        }
+
+
+def _split_dimensions(dimensions):
+    import pandas as pd
+
+    parts = dimensions.str.split('*', n=2, expand=True).reindex(columns=range(3))
+    widths = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=float)
+    heights = pd.to_numeric(parts[1], errors='coerce').to_numpy(dtype=float)
+    return parts, widths, heights
+
+
+def parse_dimensions(dimensions, default_label_width_cm, default_label_height_cm):
+    # Parses a column of 'WIDTH*HEIGHT' strings in one vectorized pass.
+    # Returns (widths, heights, invalid) as NumPy arrays; invalid rows hold
+    # the default size. A row is valid when it has exactly one '*' and both
+    # parts are finite positive numbers.
+    parts, widths, heights = _split_dimensions(dimensions)
+    well_formed = (parts[1].notna() & parts[2].isna()).to_numpy()
+    with np.errstate(invalid='ignore'):
+        invalid = ~(well_formed & np.isfinite(widths) & np.isfinite(heights) & (widths > 0) & (heights > 0))
+    widths = np.where(invalid, default_label_width_cm, widths)
+    heights = np.where(invalid, default_label_height_cm, heights)
+    return widths, heights, invalid
+
+
+def _cell_texts(column):
+    # Blank cells come back as NaN, None or pd.NA depending on the source;
+    # all of them read as 'nan', which is what the original script printed.
+    return ['nan' if missing else str(value) for value, missing in zip(column.tolist(), column.isna().tolist())]
+
+
+def _rejection_reason(has_text, part_count, width, height):
+    if not has_text:
+        return "missing dimensions"
+    if part_count != 2:
+        return "expected WIDTH*HEIGHT"
+    if np.isnan(width) or np.isnan(height):
+        return "width or height is not a number"
+    return "width and height must be positive"
+
+
+def _report_rejected(report, first_row, products, dimensions, invalid):
+    # Only runs on chunks that have rejected rows, so the explanation can be
+    # worked out row by row.
+    rejected_positions = np.flatnonzero(invalid)
+    if not len(rejected_positions):
+        return
+    parts, widths, heights = _split_dimensions(dimensions)
+    has_text = dimensions.notna().to_numpy()
+    part_counts = parts.notna().sum(axis=1).to_numpy()
+    dimension_texts = _cell_texts(dimensions)
+    for i in rejected_positions:
+        report.add_rejected(RejectedRow(
+            first_row + int(i), products[i], dimension_texts[i],
+            _rejection_reason(has_text[i], part_counts[i], widths[i], heights[i]),
+        ))
+
+
+class SizeBuckets:
+    # Rows grouped by (width, height), in arrival order within each size. Label
+    # catalogues use a handful of sizes, so emitting the buckets in key order
+    # gives the same stable sort as pandas without holding every row. Buckets
+    # are spilled to a temporary file once `max_rows_in_memory` is reached.
+
+    def __init__(self, max_rows_in_memory=100000):
+        self.max_rows_in_memory = max_rows_in_memory
+        self.row_count = 0
+        self._buffered = {}
+        self._buffered_count = 0
+        self._spilled = {}
+        self._spill_file = None
+
+    def add(self, size_key, row):
+        if size_key not in self._buffered:
+            self._buffered[size_key] = []
+            self._spilled.setdefault(size_key, [])
+        self._buffered[size_key].append(row)
+        self._buffered_count += 1
+        self.row_count += 1
+        if self._buffered_count >= self.max_rows_in_memory:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile()
+        for size_key, rows in self._buffered.items():
+            if rows:
+                offset = self._spill_file.seek(0, os.SEEK_END)
+                pickle.dump(rows, self._spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+                self._spilled[size_key].append(offset)
+                self._buffered[size_key] = []
+        self._buffered_count = 0
+
+    def __iter__(self):
+        for size_key in sorted(self._spilled):
+            width, height = size_key
+            for offset in self._spilled[size_key]:
+                self._spill_file.seek(offset)
+                for product, dims in pickle.load(self._spill_file):
+                    yield product, dims, width, height
+            for product, dims in self._buffered[size_key]:
+                yield product, dims, width, height
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._buffered = {}
+        self._spilled = {}
+
+
+def load_sorted_rows(source, product_col_name, dimensions_col_name,
+                     default_label_width_cm=4.5, default_label_height_cm=3.0,
+                     chunksize=10000, max_rows_in_memory=100000):
+    # Streams the input into SizeBuckets and returns them with a
+    # ValidationReport. Iterating the buckets yields
+    # (product, dimensions, width_cm, height_cm) sorted by width then height.
+    # `source` is a file path, a DataFrame or an iterable of records.
+    columns = [product_col_name, dimensions_col_name]
+    is_path = isinstance(source, (str, os.PathLike))
+    input_file_path = os.fspath(source) if is_path else None
+    encodings = [None]
+    if is_path and input_file_path.endswith('.txt'):
+        encodings = detect_encoding(input_file_path)
+        if not encodings:
+            raise ValueError("Could not read .txt file with common encodings. Please ensure it's UTF-8.")
+
+    for i, enc in enumerate(encodings):
+        buckets = SizeBuckets(max_rows_in_memory)
+        report = ValidationReport()
+        if is_path:
+            chunks = iter_label_chunks(input_file_path, columns, chunksize, encoding=enc)
+        else:
+            chunks = iter_source_chunks(source, columns, chunksize)
+        try:
+            for chunk in chunks:
+                products = _cell_texts(chunk[product_col_name])
+                dimensions = chunk[dimensions_col_name]
+                widths, heights, invalid = parse_dimensions(
+                    dimensions, default_label_width_cm, default_label_height_cm
+                )
+                _report_rejected(report, report.total_rows, products, dimensions, invalid)
+                report.total_rows += len(products)
+                for product, dims, width, height in zip(products, _cell_texts(dimensions), widths.tolist(), heights.tolist()):
+                    buckets.add((width, height), (product, dims))
+        except UnicodeDecodeError:
+            # The sample decoded but a later part of the file did not.
+            buckets.close()
+            logger.info("Failed to read with encoding: %s. Trying next...", enc)
+            if i == len(encodings) - 1:
+                raise ValueError("Could not read .txt file with common encodings. Please ensure it's UTF-8.")
+            continue
+        except BaseException:
+            buckets.close()
+            raise
+        if enc is not None:
+            logger.info("Read '%s' with encoding: %s", input_file_path, enc)
+        return buckets, report
@@ -0,0 +1,299 @@
+from collections import namedtuple
+
+# reportlab's cm and A4, computed the way reportlab does, so planning a
+# layout never imports it.
+cm = 72.0 / 2.54
+mm = cm * 0.1
+A4 = (210 * mm, 297 * mm)
+
+# A label placed on a sheet; (x, y) is its bottom-left corner in points.
+Placement = namedtuple('Placement', ['page', 'x', 'y', 'width', 'height'])
+
+EPSILON = 1e-6
+
+
+def _iter_shelf(sizes, page_size, margins, gaps):
+    # Greedy row fill: labels go left to right and a row is as tall as its
+    # tallest label. This is the placement create_labels_pdf always used.
+    page_width_pt, page_height_pt = page_size
+    margin_left_pt, margin_top_pt = margins
+    gap_x_pt, gap_y_pt = gaps
+    page_index = 0
+    current_x_pos = margin_left_pt
+    current_y_pos = page_height_pt - margin_top_pt
+    max_height_in_row_pt = 0
+
+    for label_width_pt, label_height_pt in sizes:
+        if current_x_pos + label_width_pt > page_width_pt - margin_left_pt:
+            current_x_pos = margin_left_pt
+            current_y_pos -= (max_height_in_row_pt + gap_y_pt)
+            max_height_in_row_pt = 0
+
+        if current_y_pos - label_height_pt < margin_top_pt:
+            page_index += 1
+            current_x_pos = margin_left_pt
+            current_y_pos = page_height_pt - margin_top_pt
+            max_height_in_row_pt = 0
+
+        max_height_in_row_pt = max(max_height_in_row_pt, label_height_pt)
+
+        yield Placement(page_index, current_x_pos, current_y_pos - label_height_pt, label_width_pt, label_height_pt)
+
+        current_x_pos += (label_width_pt + gap_x_pt)
+
+
+class SkylinePacker:
+    # Bottom-left skyline packing in sheet coordinates (origin at the top-left
+    # of the printable area, y growing down the page).
+
+    def __init__(self, bin_width, bin_height):
+        self.bin_width = bin_width
+        self.bin_height = bin_height
+        self.reset()
+
+    def reset(self):
+        self.segments = [[0.0, 0.0, self.bin_width]] # [x, y, width]
+
+    def _fit_y(self, start, width):
+        x = self.segments[start][0]
+        if x + width > self.bin_width + EPSILON:
+            return None
+        y = 0.0
+        end = x + width
+        for seg_x, seg_y, seg_w in self.segments[start:]:
+            if seg_x >= end - EPSILON:
+                break
+            y = max(y, seg_y)
+        return y
+
+    def place(self, width, height):
+        best = None
+        for i, segment in enumerate(self.segments):
+            y = self._fit_y(i, width)
+            if y is None:
+                break
+            if y + height > self.bin_height + EPSILON:
+                continue
+            if best is None or (y + height, segment[0]) < (best[1] + height, best[0]):
+                best = (segment[0], y)
+        if best is not None:
+            self.occupy(best[0], best[1], width, height)
+        return best
+
+    def occupy(self, x, y, width, height):
+        end = x + width
+        top = y + height
+        merged = []
+        for seg_x, seg_y, seg_w in self.segments:
+            seg_end = seg_x + seg_w
+            if seg_end <= x + EPSILON or seg_x >= end - EPSILON:
+                merged.append([seg_x, seg_y, seg_w])
+                continue
+            if seg_x < x:
+                merged.append([seg_x, seg_y, x - seg_x])
+            if seg_end > end:
+                merged.append([end, seg_y, seg_end - end])
+        merged.append([x, max(top, 0.0), width])
+        merged.sort(key=lambda seg: seg[0])
+        self.segments = []
+        for segment in merged:
+            if self.segments and abs(self.segments[-1][1] - segment[1]) <= EPSILON:
+                self.segments[-1][2] += segment[2]
+            else:
+                self.segments.append(segment)
+
+
+class MaxRectsPacker:
+    # MaxRects with the best-short-side-fit rule, in the same sheet
+    # coordinates as SkylinePacker.
+
+    def __init__(self, bin_width, bin_height):
+        self.bin_width = bin_width
+        self.bin_height = bin_height
+        self.reset()
+
+    def reset(self):
+        self.free_rects = [(0.0, 0.0, self.bin_width, self.bin_height)]
+
+    def place(self, width, height):
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free_rects:
+            if width <= fw + EPSILON and height <= fh + EPSILON:
+                leftover_w = fw - width
+                leftover_h = fh - height
+                score = (min(leftover_w, leftover_h), max(leftover_w, leftover_h), fy, fx)
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is not None:
+            self.occupy(best[0], best[1], width, height)
+        return best
+
+    def occupy(self, x, y, width, height):
+        right = x + width
+        bottom = y + height
+        split = []
+        for rect in self.free_rects:
+            fx, fy, fw, fh = rect
+            if (x >= fx + fw - EPSILON or right <= fx + EPSILON
+                    or y >= fy + fh - EPSILON or bottom <= fy + EPSILON):
+                split.append(rect)
+                continue
+            if x > fx + EPSILON:
+                split.append((fx, fy, x - fx, fh))
+            if right < fx + fw - EPSILON:
+                split.append((right, fy, fx + fw - right, fh))
+            if y > fy + EPSILON:
+                split.append((fx, fy, fw, y - fy))
+            if bottom < fy + fh - EPSILON:
+                split.append((fx, bottom, fw, fy + fh - bottom))
+        self.free_rects = _prune_contained(split)
+
+
+def _prune_contained(rects):
+    # Drops free rectangles that lie inside another one; larger rects first
+    # so each rect is only compared with the ones that could contain it.
+    rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+    kept = []
+    for rect in rects:
+        x, y, w, h = rect
+        contained = False
+        for kx, ky, kw, kh in kept:
+            if (x >= kx - EPSILON and y >= ky - EPSILON
+                    and x + w <= kx + kw + EPSILON and y + h <= ky + kh + EPSILON):
+                contained = True
+                break
+        if not contained:
+            kept.append(rect)
+    return kept
+
+
+def _iter_packed(sizes, packer_class, page_size, margins, gaps):
+    # Online page filling around a packer: each label goes on the current
+    # sheet if the packer finds room, otherwise on a new sheet. Gaps are
+    # handled by inflating every label and the sheet by one gap.
+    #
+    # Catalogues are sorted by size, so most sheets hold a single label size.
+    # The positions of a sheet filled with one size are remembered and reused
+    # for later sheets of that size, which keeps large jobs fast.
+    page_width_pt, page_height_pt = page_size
+    margin_x_pt, margin_y_pt = margins
+    gap_x_pt, gap_y_pt = gaps
+    bin_width = page_width_pt - 2 * margin_x_pt + gap_x_pt
+    bin_height = page_height_pt - 2 * margin_y_pt + gap_y_pt
+    packer = packer_class(bin_width, bin_height)
+
+    templates = {}
+    page_index = 0
+    placed = [] # (x, y, inflated width, inflated height) on the current sheet
+    page_size_key = None # the single size on the current sheet, if there is one
+    packer_stale = False
+    page_full = False
+
+    for width, height in sizes:
+        size_key = (width + gap_x_pt, height + gap_y_pt)
+        position = None
+
+        if not page_full:
+            template = templates.get(size_key)
+            if template is not None and (not placed or page_size_key == size_key):
+                if len(placed) < len(template):
+                    position = template[len(placed)]
+                    packer_stale = True
+            else:
+                if packer_stale:
+                    packer.reset()
+                    for occupied in placed:
+                        packer.occupy(*occupied)
+                    packer_stale = False
+                position = packer.place(*size_key)
+
+        if position is None and placed:
+            if page_size_key == size_key and not page_full and size_key not in templates:
+                templates[size_key] = [(x, y) for x, y, _, _ in placed]
+            page_index += 1
+            packer.reset()
+            packer_stale = False
+            placed = []
+            page_full = False
+            template = templates.get(size_key)
+            if template:
+                # Template slots never reach the packer, so it is rebuilt
+                # from `placed` before the next label it has to place.
+                position = template[0]
+                packer_stale = True
+            else:
+                position = packer.place(*size_key)
+
+        if position is None:
+            # Larger than an empty sheet: it gets a sheet of its own.
+            position = (0.0, 0.0)
+            page_full = True
+
+        x, y = position
+        if not placed:
+            page_size_key = size_key
+        elif page_size_key != size_key:
+            page_size_key = None
+        placed.append((x, y, size_key[0], size_key[1]))
+
+        yield Placement(page_index, margin_x_pt + x, page_height_pt - margin_y_pt - y - height, width, height)
+
+
+def _iter_skyline(sizes, page_size, margins, gaps):
+    return _iter_packed(sizes, SkylinePacker, page_size, margins, gaps)
+
+
+def _iter_maxrects(sizes, page_size, margins, gaps):
+    return _iter_packed(sizes, MaxRectsPacker, page_size, margins, gaps)
+
+
+LAYOUT_STRATEGIES = {
+    'shelf': _iter_shelf,
+    'skyline': _iter_skyline,
+    'maxrects': _iter_maxrects,
+}
+
+
+def register_layout_strategy(name, strategy):
+    # `strategy(sizes, page_size, margins, gaps)` must yield one Placement per
+    # size, in input order.
+    LAYOUT_STRATEGIES[name] = strategy
+
+
+def iter_layout(sizes, page_size=A4, margins=(1.0 * cm, 1.0 * cm), gaps=(0.2 * cm, 0.2 * cm), strategy='shelf'):
+    # Lazily maps (width, height) label sizes in points to Placements.
+    # `margins` is (left/right, top/bottom) and `gaps` is (x, y), in points.
+    try:
+        strategy_fn = LAYOUT_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown layout strategy '{strategy}'. Use one of: {', '.join(LAYOUT_STRATEGIES)}.")
+    return strategy_fn(iter(sizes), page_size, margins, gaps)
+
+
+def plan_layout(sizes, page_size=A4, margins=(1.0 * cm, 1.0 * cm), gaps=(0.2 * cm, 0.2 * cm), strategy='shelf'):
+    return list(iter_layout(sizes, page_size, margins, gaps, strategy))
+
+
+def layout_utilisation(placements, page_size=A4):
+    # Share of the sheet area covered by labels, over every sheet used.
+    page_count = 0
+    label_area = 0.0
+    for placement in placements:
+        page_count = max(page_count, placement.page + 1)
+        label_area += placement.width * placement.height
+    sheet_area = page_count * page_size[0] * page_size[1]
+    return {
+        'pages': page_count,
+        'label_area': label_area,
+        'utilisation': label_area / sheet_area if sheet_area else 0.0,
+    }
+
+
+def compare_layout_strategies(sizes, page_size=A4, margins=(1.0 * cm, 1.0 * cm), gaps=(0.2 * cm, 0.2 * cm), strategies=None):
+    sizes = list(sizes)
+    report = {}
+    for strategy in strategies or LAYOUT_STRATEGIES:
+        placements = iter_layout(sizes, page_size, margins, gaps, strategy)
+        report[strategy] = layout_utilisation(placements, page_size)
+    return report
@@ -1,16 +1,626 @@
-import pandas as pd
-from reportlab.pdfgen import canvas
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph
-from reportlab.lib.enums import TA_CENTER
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.colors import black, white
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import importlib.util
+import json
+import logging
 import os
 import re # Import the regular expression module
+import tempfile
+import time
+from io import BytesIO
+from ..atomic_write import write_output
+from ..output_cache import cache_key, code_version, default_cache, file_digest
+from .label_fit import ParagraphFitCache, fit_paragraph
+from .label_ingest import MissingColumnsError, load_sorted_rows
+from .label_layout import A4, LAYOUT_STRATEGIES, cm, iter_layout
+from .label_shapes import LabelShapeDrawer
+from .label_timing import PhaseTimer
+
+# reportlab (canvas, styles, fonts) and pandas (in label_ingest) are imported
+# when a job needs them, so importing this module stays cheap.
+
+logger = logging.getLogger(__name__)
+
+TEXT_PADDING_CM = 0.2
+
+# Fit cache kept by each worker process for the shards it renders
+_worker_fit_cache = None
+
+
+def _display_markup(raw_product_name, active_font_for_paragraph):
+    # Use regex to find English part and Tamil part in parentheses
+    match = re.match(r'^(.*?)\s*(\(.*?\))$', raw_product_name)
+    if match:
+        english_part = match.group(1).strip()
+        tamil_part_with_parentheses = match.group(2).strip()
+        # Construct the string with a line break using ReportLab's RML tag <br/>
+        # The <font name="..."> tag ensures the Tamil part explicitly uses the Tamil font
+        # if it was registered, or the fallback otherwise.
+        return (
+            f"{english_part}<br/>"
+            f"<font name='{active_font_for_paragraph}'>{tamil_part_with_parentheses}</font>"
+        )
+    # If no Tamil part in parentheses is found, use the name as is
+    return raw_product_name
+
+
+class LabelInputError(ValueError):
+    # The job's input could not be read; the message says why.
+    pass
+
+
+class LabelJobReport:
+    def __init__(self, output_pdf_path, validation, timer):
+        self.output_pdf_path = output_pdf_path # None when the PDF went to a stream
+        self.pdf_bytes = None # set by LabelRenderer.render_bytes
+        self.validation = validation # label_ingest.ValidationReport
+        self.timer = timer
+        self.worker_timer = PhaseTimer() # summed over worker processes when workers > 1
+        self.labels = 0
+        self.pages = 0
+        self.cached_document = False # the whole PDF came from the output cache
+        self.cached_pages = 0 # pages taken from the output cache when caching pages
+
+    @property
+    def timings(self):
+        # Seconds per phase: ingest, sort, font_registration, layout,
+        # text_fitting, drawing, save, cache
+        return self.timer.as_dict()
+
+    @property
+    def rejected_rows(self):
+        return self.validation.rejected
+
+    def as_dict(self):
+        return {
+            'output_pdf_path': self.output_pdf_path,
+            'labels': self.labels,
+            'pages': self.pages,
+            'cached_document': self.cached_document,
+            'cached_pages': self.cached_pages,
+            'validation': self.validation.as_dict(),
+            'timings': self.timings,
+            'worker_timings': self.worker_timer.as_dict(),
+        }
+
+
+def _count_placed(placed_labels, report, progress=None):
+    # Tracks label and page counts; `progress(labels_done, labels_total)` is
+    # called each time the layout moves on to a new page.
+    total = report.validation.total_rows
+    for placed in placed_labels:
+        if progress is not None and placed[0] + 1 > report.pages and report.labels:
+            progress(report.labels, total)
+        report.labels += 1
+        report.pages = placed[0] + 1
+        yield placed
+
+
+def _place_labels(labels, placements):
+    # Pairs each prepared label with its Placement as (page, x, y, label).
+    # `placements` is a function of the label sizes in points, so the layout
+    # pass stays as lazy as the label stream feeding it.
+    pending = deque()
+
+    def label_sizes():
+        for label in labels:
+            pending.append(label)
+            yield label[1] * cm, label[2] * cm
+
+    for placement in placements(label_sizes()):
+        label = pending.popleft()
+        yield placement.page, placement.x, placement.y, label
+
+
+def _planned_placements(placement_plan):
+    def placements(sizes):
+        plan = iter(placement_plan)
+        for _ in sizes:
+            placement = next(plan, None)
+            if placement is None:
+                raise ValueError("placement_plan has fewer placements than there are labels.")
+            yield placement
+    return placements
+
+
+def _draw_label(shapes, x, y, label, product_style, fit_cache, timer):
+    c = shapes.canv
+    product_name_for_display, label_width_cm, label_height_cm = label
+    label_width_pt = label_width_cm * cm
+    label_height_pt = label_height_cm * cm
+
+    is_circular_label = (label_width_cm == 3.5 and label_height_cm == 3.5)
+
+    # Black background with a grey outline, filled and stroked in one go
+    if is_circular_label:
+        shapes.circle(x, y, label_width_pt)
+    else:
+        shapes.rect(x, y, label_width_pt, label_height_pt)
+
+    text_padding_x = TEXT_PADDING_CM * cm
+    text_padding_y = TEXT_PADDING_CM * cm
+
+    available_width_for_text = label_width_pt - (2 * text_padding_x)
+    available_height_for_text = label_height_pt - (2 * text_padding_y)
+
+    # Pass the prepared string to Paragraph, shrinking the font until it fits
+    with timer.phase('text_fitting'):
+        product_paragraph, w, h = fit_paragraph(
+            c, product_name_for_display, product_style,
+            available_width_for_text, available_height_for_text, fit_cache,
+        )
+
+    product_y = y + (label_height_pt - h) / 2
+
+    product_paragraph.drawOn(c, x + text_padding_x, product_y)
+
+
+def _render_pages(c, placed_labels, product_style, fit_cache, timer, first_page=0, end_page=None):
+    # Draws placed labels onto `c`, whose first page is `first_page` of the
+    # layout. Pages without labels before `end_page` are emitted blank.
+    shapes = LabelShapeDrawer(c)
+    current_page = first_page
+    for page_index, x, y, label in placed_labels:
+        with timer.phase('drawing'):
+            while current_page < page_index:
+                shapes.show_page()
+                current_page += 1
+            _draw_label(shapes, x, y, label, product_style, fit_cache, timer)
+    if end_page is not None:
+        while current_page < end_page - 1:
+            shapes.show_page()
+            current_page += 1
+
+
+def _product_style(active_font_for_paragraph, font_size_product):
+    # A new style per job, so concurrent jobs never share mutable style state
+    from reportlab.lib.colors import white
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(
+        'LabelProduct',
+        fontName=active_font_for_paragraph, # Ensure this is used for both English and Tamil parts by default
+        fontSize=font_size_product,
+        leading=font_size_product * 1.2,
+        alignment=TA_CENTER,
+        textColor=white,
+    )
+
+
+def _job_characters(rows):
+    # Every character the job's products use, in a fixed order.
+    characters = set()
+    for product, _, _, _ in rows:
+        characters.update(product)
+    return ''.join(sorted(characters))
+
+
+def _seed_font_subset(c, font_name, characters):
+    # A TrueType font is embedded as a subset of the glyphs a PDF uses, in
+    # the order it first meets them. Giving every shard the job's characters
+    # up front makes their subsets identical, so joining the shards can keep
+    # one copy of the font instead of one per shard.
+    from reportlab.pdfbase import pdfmetrics
+
+    font = pdfmetrics.getFont(font_name)
+    if characters and getattr(font, '_dynamicFont', False):
+        font.splitString(characters, c._doc)
+
+
+def _render_shard(part_path, shard, render_settings):
+    # Runs in a worker process: renders one contiguous page range to its own PDF.
+    from reportlab.pdfgen import canvas
+
+    from .label_fonts import register_ttf_font
+
+    global _worker_fit_cache
+    if _worker_fit_cache is None:
+        _worker_fit_cache = ParagraphFitCache()
+    timer = PhaseTimer()
+
+    active_font_for_paragraph = render_settings['active_font']
+    with timer.phase('font_registration'):
+        if render_settings['tamil_font_path'] and active_font_for_paragraph == render_settings['tamil_font_name']:
+            register_ttf_font(active_font_for_paragraph, render_settings['tamil_font_path'])
+
+    first_page, end_page, placed_labels = shard
+    product_style = _product_style(active_font_for_paragraph, render_settings['font_size_product'])
+    c = canvas.Canvas(part_path, pagesize=render_settings['page_size'])
+    _seed_font_subset(c, active_font_for_paragraph, render_settings.get('characters'))
+    _render_pages(c, placed_labels, product_style, _worker_fit_cache, timer, first_page, end_page)
+    with timer.phase('save'):
+        c.save()
+    return part_path, timer.as_dict()
+
+
+def _iter_page_shards(placed_labels, pages_per_shard):
+    # Groups placed labels into (first_page, end_page, labels) page ranges.
+    # Ranges are contiguous, so blank pages land in the shard that follows them.
+    start_page = 0
+    shard_labels = []
+    for placed in placed_labels:
+        page_index = placed[0]
+        if shard_labels and page_index // pages_per_shard != shard_labels[0][0] // pages_per_shard:
+            end_page = shard_labels[-1][0] + 1
+            yield start_page, end_page, shard_labels
+            start_page = end_page
+            shard_labels = []
+        shard_labels.append(placed)
+    if shard_labels:
+        yield start_page, shard_labels[-1][0] + 1, shard_labels
+
+
+def _render_parallel(output, placed_labels, render_settings, pool, workers, pages_per_shard, report):
+    from pypdf import PdfWriter
+
+    def collect(future):
+        part_path, worker_timings = future.result()
+        report.worker_timer.merge(worker_timings)
+        return part_path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pending = deque()
+        part_paths = []
+        for shard_index, shard in enumerate(_iter_page_shards(placed_labels, pages_per_shard)):
+            part_path = os.path.join(tmp_dir, f"part-{shard_index:06d}.pdf")
+            pending.append(pool.submit(_render_shard, part_path, shard, render_settings))
+            # Keep a bounded number of shards in flight so the layout pass
+            # does not run arbitrarily far ahead of the workers.
+            if len(pending) >= 2 * workers:
+                with report.timer.phase('drawing'):
+                    part_paths.append(collect(pending.popleft()))
+        with report.timer.phase('drawing'):
+            while pending:
+                part_paths.append(collect(pending.popleft()))
+
+        if not part_paths:
+            return False
+
+        with report.timer.phase('save'):
+            writer = PdfWriter()
+            for part_path in part_paths:
+                writer.append(part_path)
+            # Shards embed identical font subsets (see _seed_font_subset). Each
+            # pass merges one level of them: the font files, then their
+            # descriptors, then the fonts.
+            for _ in range(3):
+                writer.compress_identical_objects()
+            if isinstance(output, (str, os.PathLike)):
+                with open(output, 'wb') as f:
+                    writer.write(f)
+            else:
+                writer.write(output)
+    return True
+
+
+class LabelRenderer:
+    # Long-lived label renderer. Fonts are registered and the paragraph style
+    # built once, and the fit cache and (when workers > 1) the worker pool
+    # stay warm across jobs, so many small jobs cost little more than their
+    # drawing. A job is a file path, a DataFrame or an iterable of records
+    # (mappings keyed by column name, or (product, dimensions) pairs).
+
+    def __init__(
+        self,
+        product_col_name="Product Name",
+        dimensions_col_name="Dimensions",
+        default_label_width_cm=4.5,
+        default_label_height_cm=3.0,
+        margin_left_cm=1.0,
+        margin_top_cm=1.0,
+        gap_x_cm=0.2,
+        gap_y_cm=0.2,
+        font_name="Helvetica", # Default fallback font for English
+        tamil_font_name="NotoSansTamil", # Logical name for the registered Tamil font
+        tamil_font_path=None, # Path to the .ttf file for the regular Tamil font
+        font_size_product=10,
+        chunksize=10000, # Rows read from the input at a time
+        max_rows_in_memory=100000, # Rows buffered for sorting before spilling to a temp file
+        fit_cache=None, # ParagraphFitCache shared by every job; a fresh one is used if not given
+        workers=1, # Processes rendering pages; above 1 each PDF is rendered in page-range shards
+        pages_per_shard=25, # Pages per shard handed to a worker when workers > 1
+        layout_strategy="shelf", # Placement strategy from label_layout.LAYOUT_STRATEGIES
+        page_size=A4,
+        cache=None, # output_cache.OutputCache of finished PDFs, keyed by the sorted rows and every setting
+        cache_pages=False, # Also cache each page, so a job that changes a few labels redraws only their pages
+    ):
+        if layout_strategy not in LAYOUT_STRATEGIES:
+            raise ValueError(f"Unknown layout strategy '{layout_strategy}'. Use one of: {', '.join(LAYOUT_STRATEGIES)}.")
+
+        self.product_col_name = product_col_name
+        self.dimensions_col_name = dimensions_col_name
+        self.default_label_width_cm = default_label_width_cm
+        self.default_label_height_cm = default_label_height_cm
+        self.margins_pt = (margin_left_cm * cm, margin_top_cm * cm)
+        self.gaps_pt = (gap_x_cm * cm, gap_y_cm * cm)
+        self.font_size_product = font_size_product
+        self.chunksize = chunksize
+        self.max_rows_in_memory = max_rows_in_memory
+        self.fit_cache = fit_cache if fit_cache is not None else ParagraphFitCache()
+        self.pages_per_shard = pages_per_shard
+        self.layout_strategy = layout_strategy
+        self.page_size = page_size
+
+        self.jobs_rendered = 0
+        self.busy_seconds = 0.0
+        self._pool = None
+
+        self.timer = PhaseTimer() # work done once for the renderer rather than per job
+        with self.timer.phase('font_registration'):
+            self.active_font = self._register_fonts(font_name, tamil_font_name, tamil_font_path)
+        self.product_style = _product_style(self.active_font, font_size_product)
+        self._render_settings = {
+            'page_size': page_size,
+            'active_font': self.active_font,
+            'tamil_font_name': tamil_font_name,
+            'tamil_font_path': tamil_font_path if self.active_font == tamil_font_name else None,
+            'font_size_product': font_size_product,
+        }
+
+        if workers > 1 and importlib.util.find_spec('pypdf') is None:
+            logger.warning("pypdf is not installed, so PDF shards cannot be joined. Rendering in a single process.")
+            workers = 1
+        self.workers = workers
+
+        self.cache = cache
+        if cache_pages and cache is not None and importlib.util.find_spec('pypdf') is None:
+            logger.warning("pypdf is not installed, so cached pages cannot be joined. Caching whole PDFs only.")
+            cache_pages = False
+        self.cache_pages = cache_pages and cache is not None
+        if cache is not None:
+            from importlib.metadata import version
+
+            # Everything besides the rows that decides what a page looks like.
+            font_path = self._render_settings['tamil_font_path']
+            label_modules = [f"{__package__}.{name}" for name in ('label_fit', 'label_layout', 'label_shapes', 'label_fonts')]
+            self._cache_settings = [
+                code_version(__name__, *label_modules), version('reportlab'),
+                self.margins_pt, self.gaps_pt, list(page_size), layout_strategy,
+                self.active_font, font_size_product, font_path and file_digest(font_path),
+            ]
+
+    @staticmethod
+    def _register_fonts(font_name, tamil_font_name, tamil_font_path):
+        from .label_fonts import register_ttf_font
+
+        if tamil_font_path and os.path.exists(tamil_font_path):
+            try:
+                # Parsed once per process; later renderers reuse the cached font
+                register_ttf_font(tamil_font_name, tamil_font_path)
+                logger.debug("Registered regular Tamil font '%s' from '%s'", tamil_font_name, tamil_font_path)
+                return tamil_font_name
+            except Exception as e:
+                logger.warning("Could not register regular Tamil font '%s' from '%s': %s. Tamil text may not render correctly.",
+                               tamil_font_name, tamil_font_path, e)
+        else:
+            logger.warning("Regular Tamil font path '%s' is not valid or not provided. Tamil text will use fallback font '%s'.",
+                           tamil_font_path, font_name)
+        return font_name
+
+    def _load(self, source):
+        try:
+            return load_sorted_rows(
+                source, self.product_col_name, self.dimensions_col_name,
+                self.default_label_width_cm, self.default_label_height_cm,
+                chunksize=self.chunksize, max_rows_in_memory=self.max_rows_in_memory,
+            )
+        except FileNotFoundError:
+            raise LabelInputError(f"Input file not found at '{source}'")
+        except MissingColumnsError as e:
+            raise LabelInputError(
+                f"Missing required columns. Ensure '{self.product_col_name}' and '{self.dimensions_col_name}' exist. "
+                f"Available columns: {e.available}"
+            )
+        except Exception as e:
+            raise LabelInputError(f"Error reading input file: {e}")
+
+    def _cache_entry(self, rows, timer):
+        # Key of a whole PDF: the sorted rows as parsed, so re-saving or
+        # re-encoding a catalogue keeps its entry, plus every setting.
+        with timer.phase('cache'):
+            digest = hashlib.sha256()
+            for product, _, width, height in rows:
+                digest.update(f"{len(product)}:{product}{width!r},{height!r};".encode())
+            return cache_key('labels', self._cache_settings, digest.hexdigest())
+
+    def _write_cached(self, entry, output, report, timer):
+        # Writes the PDF stored under `entry` to `output`; False on a miss.
+        with timer.phase('cache'):
+            data = self.cache.get(entry)
+            counts = self.cache.get(cache_key(entry, 'counts')) if data is not None else None
+        if counts is None:
+            return False
+        counts = json.loads(counts)
+        report.labels, report.pages = counts['labels'], counts['pages']
+        report.cached_document = True
+        with timer.phase('save'):
+            write_output(output, data)
+        return True
+
+    def _render_cached_pages(self, target, placed_labels, report, timer):
+        # Joins the PDF from per-page PDFs in the cache, drawing (in this
+        # process) only the pages it does not hold yet. A page is keyed by
+        # what is drawn on it, so labels that keep their place keep their
+        # page; blank pages travel with the page after them.
+        from pypdf import PdfWriter
+        from reportlab.pdfgen import canvas
+
+        writer = PdfWriter()
+        for first_page, end_page, labels in _iter_page_shards(placed_labels, 1):
+            with timer.phase('cache'):
+                entry = cache_key('label-page', self._cache_settings, end_page - first_page,
+                                  [(x, y, label) for _, x, y, label in labels])
+                data = self.cache.get(entry)
+            if data is None:
+                buffer = BytesIO()
+                c = canvas.Canvas(buffer, pagesize=self.page_size)
+                _render_pages(c, labels, self.product_style, self.fit_cache, timer, first_page, end_page)
+                with timer.phase('save'):
+                    c.save()
+                data = buffer.getvalue()
+                with timer.phase('cache'):
+                    self.cache.put(entry, data)
+            else:
+                report.cached_pages += end_page - first_page
+            with timer.phase('save'):
+                writer.append(BytesIO(data))
+        if not writer.pages:
+            return False
+        with timer.phase('save'):
+            writer.write(target)
+        return True
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def render(self, source, output, placement_plan=None, progress=None):
+        # Renders one job to `output`, a file path or a writable binary stream,
+        # and returns its LabelJobReport. Raises LabelInputError when the
+        # input cannot be read.
+        started = time.perf_counter()
+        timer = PhaseTimer()
+        with timer.phase('ingest'):
+            rows, validation = self._load(source)
+        try:
+            report = self._render_rows(rows, validation, timer, output, placement_plan, progress)
+        finally:
+            rows.close()
+        self.jobs_rendered += 1
+        self.busy_seconds += time.perf_counter() - started
+        return report
+
+    def render_bytes(self, source, placement_plan=None, progress=None):
+        # Renders one job in memory; the PDF is in the report's pdf_bytes.
+        buffer = BytesIO()
+        report = self.render(source, buffer, placement_plan, progress)
+        report.pdf_bytes = buffer.getvalue()
+        return report
+
+    def render_batch(self, jobs, progress=None):
+        # Renders jobs in order, yielding a report for each. A job is a
+        # (source, output) tuple, or just a source to render to bytes (pass
+        # records as a list so they are not taken for a tuple job).
+        for job in jobs:
+            if isinstance(job, tuple):
+                source, output = job
+                yield self.render(source, output, progress=progress)
+            else:
+                yield self.render_bytes(job, progress=progress)
+
+    def jobs_per_second(self):
+        return self.jobs_rendered / self.busy_seconds if self.busy_seconds else 0.0
+
+    def _render_rows(self, rows, validation, timer, output, placement_plan, progress):
+        if validation.rejected_count:
+            logger.warning("%d of %d rows have invalid dimensions and use the default label size %sx%s cm.",
+                           validation.rejected_count, validation.total_rows,
+                           self.default_label_width_cm, self.default_label_height_cm)
+
+        active_font_for_paragraph = self.active_font
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+        def prepared_labels():
+            # Sizes were parsed and validated during ingestion; rows with bad
+            # dimensions already carry the default size and are in `validation`.
+            for raw_product_name, dimensions_str, label_width_cm, label_height_cm in timer.timed_iter('sort', rows):
+                product_name_for_display = _display_markup(raw_product_name, active_font_for_paragraph)
+                if debug_enabled:
+                    logger.debug("Processing item: '%s' -> Displaying as: '%s' (Dimensions: %s)",
+                                 raw_product_name, product_name_for_display, dimensions_str)
+                yield product_name_for_display, label_width_cm, label_height_cm
+
+        # Layout pass: decides the page and position of every label before drawing
+        if placement_plan is not None:
+            placements = _planned_placements(placement_plan)
+        else:
+            def placements(sizes):
+                return iter_layout(sizes, self.page_size, self.margins_pt, self.gaps_pt, self.layout_strategy)
+
+        output_pdf_path = os.fspath(output) if isinstance(output, (str, os.PathLike)) else None
+        report = LabelJobReport(output_pdf_path, validation, timer)
+        placed_labels = _count_placed(
+            timer.timed_iter('layout', _place_labels(prepared_labels(), placements)), report, progress
+        )
+
+        # With a cache the PDF is looked up first; on a miss it is rendered
+        # into memory, stored and then written out. Jobs with a
+        # placement_plan are not cached.
+        entry = None
+        if self.cache is not None and placement_plan is None:
+            entry = self._cache_entry(rows, timer)
+        cached = entry is not None and self._write_cached(entry, output, report, timer)
+        target = output if entry is None else BytesIO()
+
+        rendered = cached
+        if not rendered and entry is not None and self.cache_pages:
+            rendered = self._render_cached_pages(target, placed_labels, report, timer)
+        if not rendered and self.workers > 1:
+            render_settings = self._render_settings
+            if render_settings['tamil_font_path']:
+                with timer.phase('font_registration'):
+                    render_settings = dict(render_settings, characters=_job_characters(rows))
+            rendered = _render_parallel(
+                target, placed_labels, render_settings, self._get_pool(),
+                self.workers, self.pages_per_shard, report,
+            )
+
+        if not rendered:
+            from reportlab.pdfgen import canvas
+
+            c = canvas.Canvas(target, pagesize=self.page_size)
+            _render_pages(c, placed_labels, self.product_style, self.fit_cache, timer)
+            with timer.phase('save'):
+                c.save()
+
+        if entry is not None and not cached:
+            data = target.getvalue()
+            with timer.phase('cache'):
+                self.cache.put(entry, data)
+                counts = {'labels': report.labels, 'pages': report.pages}
+                self.cache.put(cache_key(entry, 'counts'), json.dumps(counts).encode())
+            with timer.phase('save'):
+                write_output(output, data)
+
+        if progress is not None:
+            progress(report.labels, validation.total_rows)
+        logger.info("Created labels PDF %s: %d labels on %d pages",
+                    output_pdf_path or "(stream)", report.labels, report.pages)
+        logger.debug("Label job timings: %s", report.timings)
+        return report
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def sorted_label_sizes(
+    input_file_path,
+    product_col_name="Product Name",
+    dimensions_col_name="Dimensions",
+    default_label_width_cm=4.5,
+    default_label_height_cm=3.0,
+):
+    # Label sizes in points, in the order create_labels_pdf draws them. Feed
+    # these to label_layout.plan_layout to build a placement_plan.
+    rows, _ = load_sorted_rows(
+        input_file_path, product_col_name, dimensions_col_name, default_label_width_cm, default_label_height_cm
+    )
+    try:
+        return [(width_cm * cm, height_cm * cm) for _, _, width_cm, height_cm in rows]
+    finally:
+        rows.close()
+
 
 def create_labels_pdf(
     input_file_path,
@@ -26,195 +636,58 @@ def create_labels_pdf(
     font_name="Helvetica", # Default fallback font for English
     tamil_font_name="NotoSansTamil", # Logical name for the registered Tamil font (e.g., NotoSansTamil-Regular.ttf)
     tamil_font_path=None, # Path to the .ttf file for the regular Tamil font
-    font_size_product=10
+    font_size_product=10,
+    chunksize=10000, # Rows read from the input file at a time
+    max_rows_in_memory=100000, # Rows buffered for sorting before spilling to a temp file
+    fit_cache=None, # ParagraphFitCache to reuse across calls; a fresh one is used if not given
+    workers=1, # Processes rendering pages; above 1 the PDF is rendered in page-range shards
+    pages_per_shard=25, # Pages per shard handed to a worker when workers > 1
+    layout_strategy="shelf", # Placement strategy from label_layout.LAYOUT_STRATEGIES
+    placement_plan=None, # Placements from label_layout.plan_layout, one per sorted label; overrides layout_strategy
+    progress=None, # Called as progress(labels_done, labels_total) as pages fill up
+    cache=None, # output_cache.OutputCache; an unchanged job is copied from it instead of rendered
+    cache_pages=False, # Also cache single pages, so a changed catalogue redraws only the pages it changes
 ):
-    df = None
-    try:
-        if input_file_path.endswith('.xlsx'):
-            df = pd.read_excel(input_file_path)
-        elif input_file_path.endswith('.csv'):
-            df = pd.read_csv(input_file_path, encoding='utf-8')
-        elif input_file_path.endswith('.txt'):
-            encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
-            for enc in encodings_to_try:
-                try:
-                    df = pd.read_csv(input_file_path, sep='\t', encoding=enc)
-                    print(f"Successfully read '{input_file_path}' with encoding: {enc}")
-                    break
-                except UnicodeDecodeError:
-                    print(f"Failed to read with encoding: {enc}. Trying next...")
-                    continue
-            if df is None:
-                raise ValueError("Could not read .txt file with common encodings. Please ensure it's UTF-8.")
-        else:
-            raise ValueError("Unsupported input file format. Use .xlsx, .txt, or .csv.")
-    except FileNotFoundError:
-        print(f"Error: Input file not found at '{input_file_path}'")
-        return
-    except Exception as e:
-        print(f"Error reading input file: {e}")
-        return
-
-    if df is None or product_col_name not in df.columns or dimensions_col_name not in df.columns:
-        print(f"Error: Missing required columns or failed to load DataFrame. Ensure '{product_col_name}' and '{dimensions_col_name}' exist.")
-        if df is not None:
-            print(f"Available columns: {df.columns.tolist()}")
-        return
-
-    df[['Label_Width_Temp', 'Label_Height_Temp']] = df[dimensions_col_name].str.split('*', expand=True).astype(float)
-    df = df.sort_values(by=['Label_Width_Temp', 'Label_Height_Temp']).reset_index(drop=True)
-    df = df.drop(columns=['Label_Width_Temp', 'Label_Height_Temp'])
-
-    c = canvas.Canvas(output_pdf_path, pagesize=A4)
-    page_width_pt, page_height_pt = A4
-
-    margin_left_pt = margin_left_cm * cm
-    margin_top_pt = margin_top_cm * cm
-    gap_x_pt = gap_x_cm * cm
-    gap_y_pt = gap_y_cm * cm
-
-    current_x_pos = margin_left_pt
-    current_y_pos = page_height_pt - margin_top_pt
-    max_height_in_row_pt = 0
-
-    styles = getSampleStyleSheet()
-
-    active_font_for_paragraph = font_name
-    regular_tamil_font_successfully_registered = False
-
-    print(f"Attempting to register Tamil font:")
-    
-    if tamil_font_path and os.path.exists(tamil_font_path):
+    # One-off job; use LabelRenderer directly to render many jobs in a row.
+    if placement_plan is not None:
+        layout_strategy = "shelf"
+    with LabelRenderer(
+        product_col_name=product_col_name,
+        dimensions_col_name=dimensions_col_name,
+        default_label_width_cm=default_label_width_cm,
+        default_label_height_cm=default_label_height_cm,
+        margin_left_cm=margin_left_cm,
+        margin_top_cm=margin_top_cm,
+        gap_x_cm=gap_x_cm,
+        gap_y_cm=gap_y_cm,
+        font_name=font_name,
+        tamil_font_name=tamil_font_name,
+        tamil_font_path=tamil_font_path,
+        font_size_product=font_size_product,
+        chunksize=chunksize,
+        max_rows_in_memory=max_rows_in_memory,
+        fit_cache=fit_cache,
+        workers=workers,
+        pages_per_shard=pages_per_shard,
+        layout_strategy=layout_strategy,
+        cache=cache,
+        cache_pages=cache_pages,
+    ) as renderer:
         try:
-            pdfmetrics.registerFont(TTFont(tamil_font_name, tamil_font_path))
-            print(f"SUCCESS: Registered regular Tamil font: '{tamil_font_name}' from '{tamil_font_path}'")
-            active_font_for_paragraph = tamil_font_name
-            regular_tamil_font_successfully_registered = True
-        except Exception as e:
-            print(f"WARNING: Could not register regular Tamil font '{tamil_font_name}' from '{tamil_font_path}': {e}. Tamil text may not render correctly.")
-    else:
-        print(f"WARNING: Regular Tamil font path '{tamil_font_path}' is not valid or not provided. Tamil text will use fallback font '{font_name}'.")
-
-    base_product_style_template = styles['Normal']
-    base_product_style_template.fontSize = font_size_product
-    base_product_style_template.leading = font_size_product * 1.2
-    base_product_style_template.alignment = TA_CENTER
-    base_product_style_template.textColor = white
-
-    for index, row in df.iterrows():
-        raw_product_name = str(row[product_col_name])
-        dimensions_str = str(row[dimensions_col_name])
-        
-        # --- MODIFICATION START ---
-        # Use regex to find English part and Tamil part in parentheses
-        match = re.match(r'^(.*?)\s*(\(.*?\))$', raw_product_name)
-        if match:
-            english_part = match.group(1).strip()
-            tamil_part_with_parentheses = match.group(2).strip()
-            # Construct the string with a line break using ReportLab's RML tag <br/>
-            # The <font name="..."> tag ensures the Tamil part explicitly uses the Tamil font
-            # if it was registered, or the fallback otherwise.
-            product_name_for_display = (
-                f"{english_part}<br/>"
-                f"<font name='{active_font_for_paragraph}'>{tamil_part_with_parentheses}</font>"
-            )
-        else:
-            # If no Tamil part in parentheses is found, use the name as is
-            product_name_for_display = raw_product_name
-        
-        print(f"Processing item: '{raw_product_name}' -> Displaying as: '{product_name_for_display}' (Dimensions: {dimensions_str})")
-        # --- MODIFICATION END ---
-
-        try:
-            width_str, height_str = dimensions_str.split('*')
-            label_width_cm = float(width_str)
-            label_height_cm = float(height_str)
-        except (ValueError, IndexError):
-            print(f"Warning: Invalid dimension format '{dimensions_str}' for '{raw_product_name}'. "
-                  f"Using default label size {default_label_width_cm}x{default_label_height_cm} cm.")
-            label_width_cm = default_label_width_cm
-            label_height_cm = default_label_height_cm
-
-        label_width_pt = label_width_cm * cm
-        label_height_pt = label_height_cm * cm
-
-        if current_x_pos + label_width_pt > page_width_pt - margin_left_pt:
-            current_x_pos = margin_left_pt
-            current_y_pos -= (max_height_in_row_pt + gap_y_pt)
-            max_height_in_row_pt = 0
-
-        if current_y_pos - label_height_pt < margin_top_pt:
-            c.showPage()
-            current_x_pos = margin_left_pt
-            current_y_pos = page_height_pt - margin_top_pt
-            max_height_in_row_pt = 0
-
-        max_height_in_row_pt = max(max_height_in_row_pt, label_height_pt)
-
-        is_circular_label = (label_width_cm == 3.5 and label_height_cm == 3.5)
-        
-        if is_circular_label:
-            radius_pt = label_width_pt / 2
-            center_x = current_x_pos + radius_pt
-            center_y = current_y_pos - radius_pt
-
-            c.setFillColor(black)
-            c.circle(center_x, center_y, radius_pt, fill=1)
-
-            c.setStrokeColorRGB(0.5, 0.5, 0.5)
-            c.circle(center_x, center_y, radius_pt, fill=0)
-            
-            label_render_x_start = current_x_pos
-            label_render_y_start = current_y_pos - label_height_pt
-            
-        else:
-            c.setFillColor(black)
-            c.rect(current_x_pos, current_y_pos - label_height_pt, label_width_pt, label_height_pt, fill=1)
-
-            c.setStrokeColorRGB(0.5, 0.5, 0.5)
-            c.rect(current_x_pos, current_y_pos - label_height_pt, label_width_pt, label_height_pt, fill=0)
-
-            label_render_x_start = current_x_pos
-            label_render_y_start = current_y_pos - label_height_pt
-        
-        product_style = styles['Normal']
-        product_style.fontName = active_font_for_paragraph # Ensure this is used for both English and Tamil parts by default
-        product_style.bold = 0 
-        product_style.fontSize = font_size_product
-        product_style.leading = product_style.fontSize * 1.2
-        product_style.alignment = TA_CENTER
-        product_style.textColor = white
-
-        text_padding_x = 0.2 * cm
-        text_padding_y = 0.2 * cm
-
-        available_width_for_text = label_width_pt - (2 * text_padding_x)
-        available_height_for_text = label_height_pt - (2 * text_padding_y)
-
-        # Pass the prepared string to Paragraph
-        while True:
-            product_paragraph = Paragraph(product_name_for_display, product_style)
-            w, h = product_paragraph.wrapOn(c, available_width_for_text, available_height_for_text)
-
-            if (w <= available_width_for_text and h <= available_height_for_text) or product_style.fontSize <= 4:
-                break
-            product_style.fontSize -= 0.5
-            product_style.leading = product_style.fontSize * 1.2
-
-        product_y = label_render_y_start + (label_height_pt - h) / 2
-        
-        product_paragraph.drawOn(c, label_render_x_start + text_padding_x, product_y)
-
-        current_x_pos += (label_width_pt + gap_x_pt)
-
-    c.save()
-    print(f"Successfully created labels PDF: {output_pdf_path}")
+            report = renderer.render(input_file_path, output_pdf_path, placement_plan, progress)
+        except LabelInputError as e:
+            logger.error("%s", e)
+            return None
+    report.timer.merge(renderer.timer.totals)
+    return report
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
     tamil_regular_font_file = "NotoSansTamil-Regular.ttf"
 
-    input_data_file = "label_data.txt"
+    input_data_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "label_data.txt")
     output_pdf_file = "my_printed_labels_tamil_newline.pdf" # New output name for clarity
 
     product_name_column = "Product Name"
@@ -227,5 +700,6 @@ if __name__ == "__main__":
         dimensions_col_name=dimensions_column,
         tamil_font_path=tamil_regular_font_file,
         tamil_font_name="NotoSansTamil",
-        font_size_product=12
+        font_size_product=12,
+        cache=default_cache(),
     )
\ No newline at end of file
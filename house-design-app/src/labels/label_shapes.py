@@ -0,0 +1,87 @@
+LABEL_FILL = (0, 0, 0) # RGB, made into reportlab colours when a drawer starts
+LABEL_OUTLINE = (0.5, 0.5, 0.5)
+OUTLINE_WIDTH = 1 # reportlab's default line width, which labels are drawn with
+
+
+class LabelShapeDrawer:
+    # Draws label backgrounds onto a reportlab canvas with as few content
+    # stream operators as possible:
+    #
+    # * each shape is filled and outlined by one path op ('B') instead of a
+    #   filled draw followed by an outline draw of the same path;
+    # * fill and stroke colours are only set when they are not already in
+    #   effect (paragraphs draw inside saveState/restoreState, so the colours
+    #   survive the text of a label; a new page starts from the defaults);
+    # * circles, whose path is four Bezier curves, are drawn once per radius
+    #   into an XObject form and placed with a translate. Rectangles are a
+    #   single 're' and are cheaper to emit inline than to place as a form.
+    #   Pass form_shapes=('circle', 'rect') to use forms for both.
+
+    def __init__(self, canv, fill_color=LABEL_FILL, stroke_color=LABEL_OUTLINE, form_shapes=('circle',)):
+        from reportlab.lib.colors import Color
+
+        self.canv = canv
+        self.fill_color = Color(*fill_color) if isinstance(fill_color, tuple) else fill_color
+        self.stroke_color = Color(*stroke_color) if isinstance(stroke_color, tuple) else stroke_color
+        self.form_shapes = frozenset(form_shapes)
+        self._forms = {} # (shape, size) -> form name
+        self.new_page()
+
+    def new_page(self):
+        # Call after canv.showPage(): a page starts with default colours.
+        self._fill_in_effect = None
+        self._stroke_in_effect = None
+
+    def show_page(self):
+        self.canv.showPage()
+        self.new_page()
+
+    def _use_colors(self):
+        if self._fill_in_effect != self.fill_color:
+            self.canv.setFillColor(self.fill_color)
+            self._fill_in_effect = self.fill_color
+        if self._stroke_in_effect != self.stroke_color:
+            self.canv.setStrokeColor(self.stroke_color)
+            self._stroke_in_effect = self.stroke_color
+
+    def _form(self, shape, width, height):
+        key = (shape, width, height)
+        name = self._forms.get(key)
+        if name is None:
+            name = self._forms[key] = f"label-{shape}-{width:g}x{height:g}"
+            c = self.canv
+            # Half the outline falls outside the shape; keep it in the bbox.
+            pad = OUTLINE_WIDTH
+            c.beginForm(name, -pad, -pad, width + pad, height + pad)
+            c.setFillColor(self.fill_color)
+            c.setStrokeColor(self.stroke_color)
+            if shape == 'circle':
+                c.circle(width / 2, height / 2, width / 2, stroke=1, fill=1)
+            else:
+                c.rect(0, 0, width, height, stroke=1, fill=1)
+            c.endForm()
+        return name
+
+    def _place_form(self, name, x, y):
+        c = self.canv
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def rect(self, x, y, width, height):
+        if 'rect' in self.form_shapes:
+            self._place_form(self._form('rect', width, height), x, y)
+            return
+        self._use_colors()
+        self.canv.rect(x, y, width, height, stroke=1, fill=1)
+
+    def circle(self, x, y, diameter):
+        # (x, y) is the bottom-left corner of the circle's bounding square.
+        if 'circle' in self.form_shapes:
+            self._place_form(self._form('circle', diameter, diameter), x, y)
+            return
+        self._use_colors()
+        radius = diameter / 2
+        self.canv.circle(x + radius, y + radius, radius, stroke=1, fill=1)
+
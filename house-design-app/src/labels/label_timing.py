@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    # Wall time per named phase. Phases nest: starting one pauses the phase
+    # that was running, so every second is counted in exactly one phase.
+
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+        self._resumed_at = None
+
+    def _add(self, phase, seconds):
+        self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+
+    def start(self, phase):
+        now = time.perf_counter()
+        if self._stack:
+            self._add(self._stack[-1], now - self._resumed_at)
+        self._stack.append(phase)
+        self._resumed_at = now
+
+    def stop(self):
+        now = time.perf_counter()
+        self._add(self._stack.pop(), now - self._resumed_at)
+        self._resumed_at = now
+
+    @contextmanager
+    def phase(self, phase):
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def timed_iter(self, phase, iterable):
+        # Counts the time spent producing each item of `iterable` as `phase`.
+        iterator = iter(iterable)
+        while True:
+            self.start(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def merge(self, totals):
+        for phase, seconds in totals.items():
+            self._add(phase, seconds)
+
+    def as_dict(self):
+        return dict(self.totals)
@@ -0,0 +1,154 @@
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+
+# Content-addressed store for rendered outputs (label PDFs and pages, plan
+# and frame layout images) on local disk.
+#
+# Entries are opaque bytes filed under a hex key, as
+# <directory>/<first two key digits>/<key>. A key is built with cache_key()
+# from everything that decides the output: the normalized input, the
+# parameters, digests of font files (file_digest) and the code that draws
+# it (code_version). Equal keys therefore mean equal outputs, and nothing
+# ever needs invalidating; stale entries just stop being asked for.
+#
+# Reading an entry bumps its modification time, and once the store grows
+# past max_bytes the least recently used entries are deleted. Several
+# processes may share a directory: writes are atomic, and eviction
+# rescans the directory rather than trusting one process's count.
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_DIR_ENV = 'HOUSE_DESIGN_CACHE_DIR' # default_cache() uses this directory when set
+CACHE_MB_ENV = 'HOUSE_DESIGN_CACHE_MB' # and this size limit in MiB
+
+_code_versions = {} # module names -> digest of their sources
+
+
+def _update(digest, part):
+    # Each part is length-prefixed so different splits never hash equal.
+    if isinstance(part, str):
+        part = part.encode()
+    elif not isinstance(part, (bytes, bytearray, memoryview)):
+        part = json.dumps(part, sort_keys=True, default=str).encode()
+    digest.update(len(part).to_bytes(8, 'little'))
+    digest.update(part)
+
+
+def cache_key(*parts):
+    # SHA-256 hex digest of the parts: bytes, strings, or anything JSON can
+    # encode (namedtuples encode as lists).
+    digest = hashlib.sha256()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    # SHA-256 of a file's contents, e.g. a font the output embeds.
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(*module_names):
+    # Digest of the named modules' source files, computed once per process,
+    # so editing the drawing code invalidates what it drew.
+    version = _code_versions.get(module_names)
+    if version is None:
+        digest = hashlib.sha256()
+        for name in module_names:
+            with open(importlib.import_module(name).__file__, 'rb') as f:
+                _update(digest, f.read())
+        version = _code_versions[module_names] = digest.hexdigest()
+    return version
+
+
+class OutputCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entries(self):
+        # (mtime, path, size) of every stored entry.
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError: # evicted by another process
+                    continue
+                yield stat.st_mtime, entry.path, stat.st_size
+
+    def get(self, key):
+        # The stored bytes, or None on a miss.
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name first so readers never see half an entry.
+        fd, tmp_path = tempfile.mkstemp(prefix='.', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            replaced = os.stat(path).st_size # an entry rewritten under the same key
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        self._size += len(data) - replaced
+        if self._size > self.max_bytes:
+            self.evict(keep=path)
+
+    def evict(self, keep=None):
+        # Deletes least recently used entries until the store fits in
+        # max_bytes, never the entry at `keep`.
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+            self.evicted += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evicted': self.evicted, 'bytes': self._size}
+
+
+def default_cache():
+    # An OutputCache in $HOUSE_DESIGN_CACHE_DIR, or None when it is unset;
+    # the example scripts use this.
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    megabytes = os.environ.get(CACHE_MB_ENV)
+    return OutputCache(directory, int(float(megabytes) * 1024 * 1024) if megabytes else DEFAULT_MAX_BYTES)
@@ -0,0 +1,75 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.design import areas
+from src.design.areas import union_area
+
+
+def _brute_force(boxes):
+    # Sums every cell of the grid of distinct edges that some box covers.
+    boxes = [(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)) for x0, y0, x1, y1 in boxes]
+    xs = sorted({x for box in boxes for x in (box[0], box[2])})
+    ys = sorted({y for box in boxes for y in (box[1], box[3])})
+    area = 0.0
+    for (xa, xb), (ya, yb) in itertools.product(zip(xs, xs[1:]), zip(ys, ys[1:])):
+        if any(x0 <= xa and xb <= x1 and y0 <= ya and yb <= y1 for x0, y0, x1, y1 in boxes):
+            area += (xb - xa) * (yb - ya)
+    return area
+
+
+@pytest.fixture(params=['grid', 'sweep'])
+def method(request, monkeypatch):
+    if request.param == 'sweep':
+        monkeypatch.setattr(areas, 'GRID_CELLS_PER_BOX', 0)
+    else:
+        monkeypatch.setattr(areas, 'GRID_STRIP_CELLS', 7) # several strips even for small grids
+    return request.param
+
+
+CASES = {
+    'overlapping': [(0, 0, 10, 10), (5, 5, 15, 15), (8, -2, 12, 20)],
+    'nested': [(0, 0, 100, 100), (10, 10, 20, 20), (30, 30, 90, 40), (31, 31, 32, 32)],
+    'touching': [(0, 0, 10, 10), (10, 0, 20, 10), (0, 10, 20, 15), (20, 15, 25, 20)],
+    'identical': [(1, 1, 4, 4)] * 5,
+    'degenerate': [(0, 0, 0, 10), (0, 0, 10, 0), (3, 3, 3, 3), (2, 2, 6, 6)],
+    'flipped corners': [(10, 10, 0, 0), (5, 15, 15, 5)],
+    'all empty': [(0, 0, 0, 5), (1, 1, 4, 1)],
+    'single': [(2, 3, 7, 11)],
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_union_area_matches_brute_force(method, name):
+    boxes = CASES[name]
+    assert union_area(*np.array(boxes, dtype=float).T) == pytest.approx(_brute_force(boxes))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('scale', ['integer', 'float'])
+def test_random_boxes_match_brute_force(method, seed, scale):
+    rng = np.random.default_rng(seed)
+    count = 40
+    x0, y0 = rng.uniform(0, 100, (2, count))
+    # Some boxes empty, some far bigger than the rest.
+    x1 = x0 + rng.choice([0, 1, 5, 30, 90], count) * rng.uniform(0, 1, count)
+    y1 = y0 + rng.choice([0, 1, 5, 30, 90], count) * rng.uniform(0, 1, count)
+    boxes = np.array([x0, y0, x1, y1])
+    if scale == 'integer':
+        boxes = np.round(boxes)
+    assert union_area(*boxes) == pytest.approx(_brute_force(boxes.T.tolist()), rel=1e-12)
+
+
+def test_grid_and_sweep_agree_on_a_large_plan(monkeypatch):
+    rng = np.random.default_rng(0)
+    x0, y0 = rng.integers(0, 2000, 5000), rng.integers(0, 500, 5000)
+    boxes = (x0, y0, x0 + rng.integers(1, 300, 5000), y0 + rng.integers(1, 40, 5000))
+    boxes = [np.asarray(side, dtype=float) for side in boxes]
+    calls = []
+    monkeypatch.setattr(areas, '_sweep_area', lambda *args: calls.append(args) or 0.0)
+    grid = union_area(*boxes)
+    assert not calls
+    monkeypatch.undo()
+    monkeypatch.setattr(areas, 'GRID_CELLS_PER_BOX', 0)
+    assert union_area(*boxes) == pytest.approx(grid, rel=1e-12)
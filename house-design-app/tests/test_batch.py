@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from src.design.batch import render_houses
+from src.design.house import House, Wall
+from src.design.house_io import save_house
+
+
+def _house():
+    house = House()
+    house.add_wall(Wall(10, 10, 100, 10))
+    house.add_room({'x': 20, 'y': 30, 'width': 50, 'height': 40, 'color': 'lightblue'})
+    return house
+
+
+@pytest.mark.parametrize('items', [
+    [('plan', _house()), ('plan', _house())],
+    [_house(), ('house_00000', _house())],
+])
+def test_duplicate_output_names_are_rejected(tmp_path, items):
+    with pytest.raises(ValueError, match='would both be written'):
+        render_houses(items, tmp_path / 'out', img_size=(200, 150), workers=1)
+    assert len(os.listdir(tmp_path / 'out')) <= 1
+
+
+@pytest.mark.parametrize('paths', [('a/plan.json', 'b/plan.json'), ('p.json', 'p.hplan')])
+def test_layout_files_with_one_output_name_are_rejected(tmp_path, paths):
+    for path in paths:
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        save_house(_house(), tmp_path / path)
+    with pytest.raises(ValueError, match='would both be written'):
+        render_houses([tmp_path / path for path in paths], tmp_path / 'out', img_size=(200, 150), workers=1)
+    assert len(os.listdir(tmp_path / 'out')) <= 1
+
+
+def test_named_houses_are_written_in_order(tmp_path):
+    report = render_houses([('first', _house()), ('second', _house()), _house()], tmp_path / 'out',
+                           img_size=(200, 150), workers=1)
+    assert [item.name for item in report.items] == ['first', 'second', 'house_00002']
+    assert sorted(os.listdir(tmp_path / 'out')) == ['first.png', 'house_00002.png', 'second.png']
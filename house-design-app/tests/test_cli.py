@@ -0,0 +1,151 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+from PIL import Image
+from pypdf import PdfReader
+
+from src.cli import MANIFEST, main, run_command
+from src.design.house import House, Wall
+from src.design.house_io import save_frame_layout, save_house
+from src.output_cache import CACHE_DIR_ENV
+
+LABEL_OPTIONS = {
+    'format': 'pdf', 'product_col_name': 'Product Name', 'dimensions_col_name': 'Dimensions',
+    'tamil_font_path': None, 'font_size_product': 10, 'layout_strategy': 'shelf', 'cache_pages': False,
+    'cache_dir': None, 'cache_mb': None,
+}
+
+
+def _catalogue(path, rows=12):
+    lines = ['Product Name,Dimensions'] + [f"Item {i},{3 + i % 3}*2" for i in range(rows)]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def _house():
+    house = House()
+    house.add_wall(Wall(10, 10, 100, 10))
+    house.add_room({'x': 20, 'y': 30, 'width': 50, 'height': 40, 'color': 'lightblue'})
+    return house
+
+
+def _frames():
+    return [{'name': 'a', 'x': 20, 'y': 30, 'width': 40, 'height': 50, 'label': 'first'},
+            {'name': 'b', 'x': 100, 'y': 30, 'width': 60, 'height': 40}]
+
+
+def test_up_to_date_outputs_are_skipped(tmp_path):
+    source = _catalogue(tmp_path / 'a.csv')
+    other = _catalogue(tmp_path / 'b.csv', 5)
+    out = tmp_path / 'out'
+    first = run_command('labels', [source, other], out, LABEL_OPTIONS, jobs=1)
+    assert (first.inputs, len(first.results), first.skipped, first.failed) == (2, 2, 0, [])
+    manifest = json.loads((out / MANIFEST).read_text(encoding='utf-8'))
+    assert sorted(manifest) == ['a.pdf', 'b.pdf']
+
+    again = run_command('labels', [source, other], out, LABEL_OPTIONS, jobs=1)
+    assert (len(again.results), again.skipped) == (0, 2)
+
+    # A changed input, a changed option, a missing output and --force each
+    # render again.
+    _catalogue(tmp_path / 'a.csv', 20)
+    assert [r.job.source for r in run_command('labels', [source, other], out, LABEL_OPTIONS, jobs=1).results] \
+        == [source]
+    os.remove(out / 'b.pdf')
+    assert [r.job.source for r in run_command('labels', [source, other], out, LABEL_OPTIONS, jobs=1).results] \
+        == [other]
+    assert len(run_command('labels', [source, other], out, {**LABEL_OPTIONS, 'font_size_product': 12},
+                           jobs=1).results) == 2
+    assert len(run_command('labels', [source, other], out, LABEL_OPTIONS, jobs=1, force=True).results) == 2
+    # Options that never change an output are not part of the key.
+    assert run_command('labels', [source, other], out, {**LABEL_OPTIONS, 'cache_mb': 5}, jobs=1).skipped == 2
+
+
+def test_labels_command(tmp_path, capsys):
+    inputs = tmp_path / 'tables'
+    (inputs / 'shop').mkdir(parents=True)
+    _catalogue(inputs / 'one.csv')
+    _catalogue(inputs / 'shop' / 'two.csv', 30)
+    (inputs / 'notes.md').write_text('not a table')
+    out = tmp_path / 'out'
+    assert main(['labels', str(inputs), '-o', str(out), '-j', '1', '-q']) == 0
+    assert len(PdfReader(out / 'one.pdf').pages) >= 1
+    assert len(PdfReader(out / 'shop' / 'two.pdf').pages) >= 1
+    assert 'labels: 2 inputs, 2 rendered, 0 up to date, 0 failed' in capsys.readouterr().out
+    assert main(['labels', str(inputs), '-o', str(out), '-j', '1', '-q']) == 0
+    assert 'labels: 2 inputs, 0 rendered, 2 up to date' in capsys.readouterr().out
+
+
+def test_render_house_command(tmp_path):
+    save_house(_house(), tmp_path / 'plan.json')
+    save_house(_house(), tmp_path / 'big.hplan')
+    out = tmp_path / 'out'
+    assert main(['render-house', str(tmp_path / 'plan.json'), str(tmp_path / '*.hplan'), '-o', str(out),
+                 '--size', '300x200', '--format', 'webp', '--backend', 'numpy', '-j', '1', '-q']) == 0
+    for name in ('plan.webp', 'big.webp'):
+        with Image.open(out / name) as image:
+            assert (image.format, image.size) == ('WEBP', (300, 200))
+
+
+@pytest.mark.parametrize('image_format, magic', [('png', b'\x89PNG'), ('svg', b'<svg'), ('pdf', b'%PDF')])
+def test_frame_layout_command(tmp_path, image_format, magic):
+    save_frame_layout(tmp_path / 'wall.json', (200, 120), _frames())
+    out = tmp_path / 'out'
+    assert main(['frame-layout', str(tmp_path / 'wall.json'), '-o', str(out), '--format', image_format,
+                 '--measure', 'both', '--guides', '-j', '1', '-q']) == 0
+    assert (out / f'wall.{image_format}').read_bytes().startswith(magic)
+
+
+def test_failed_inputs_exit_1_and_are_not_recorded(tmp_path, capsys):
+    good = _catalogue(tmp_path / 'good.csv')
+    out = tmp_path / 'out'
+    assert main(['labels', good, str(tmp_path / 'missing.csv'), '-o', str(out), '-j', '1', '-q']) == 1
+    assert 'failed' in capsys.readouterr().err
+    assert sorted(json.loads((out / MANIFEST).read_text(encoding='utf-8'))) == ['good.pdf']
+    assert sorted(os.listdir(out)) == [MANIFEST, 'good.pdf']
+
+
+def test_inputs_writing_one_output_are_rejected(tmp_path, capsys):
+    (tmp_path / 'a').mkdir()
+    save_house(_house(), tmp_path / 'plan.json')
+    save_house(_house(), tmp_path / 'a' / 'plan.json')
+    assert main(['render-house', str(tmp_path / 'plan.json'), str(tmp_path / 'a' / 'plan.json'),
+                 '-o', str(tmp_path / 'out'), '-q']) == 2
+    assert 'would both write plan.png' in capsys.readouterr().err
+
+
+def test_outputs_follow_the_umask(tmp_path):
+    source = _catalogue(tmp_path / 'a.csv')
+    umask = os.umask(0o022)
+    try:
+        run_command('labels', [source], tmp_path / 'out', LABEL_OPTIONS, jobs=1)
+    finally:
+        os.umask(umask)
+    for name in ('a.pdf', MANIFEST):
+        assert stat.S_IMODE(os.stat(tmp_path / 'out' / name).st_mode) == 0o644
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning') # runpy, for modules other tests imported
+@pytest.mark.parametrize('command, output', [
+    ('create-frame', 'create.png'), ('new-frame', 'new.png'), ('bed-frame', 'bed.png'), ('house', None),
+])
+def test_example_commands(tmp_path, monkeypatch, command, output):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(sys, 'argv', sys.argv[:])
+    assert main([command] + ([output] if output else [])) == 0
+    with Image.open(tmp_path / (output or 'house_2d.png')) as image:
+        assert image.format == 'PNG'
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_frame_scripts_have_their_own_default_images(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+    monkeypatch.setattr(sys, 'argv', sys.argv[:])
+    for command in ('create-frame', 'new-frame', 'bed-frame'):
+        assert main([command]) == 0
+    assert len(os.listdir(tmp_path)) == 3
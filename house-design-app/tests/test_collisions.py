@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.design import collisions
+from src.design.collisions import TOLERANCE, overlapping_pairs
+
+
+def _brute_force(x0, y0, x1, y1):
+    return [(i, j) for i, j in itertools.combinations(range(len(x0)), 2)
+            if min(x1[i], x1[j]) - max(x0[i], x0[j]) > TOLERANCE
+            and min(y1[i], y1[j]) - max(y0[i], y0[j]) > TOLERANCE]
+
+
+def _random_boxes(count, seed):
+    # Boxes on a coarse grid, so many share or touch an edge.
+    rng = np.random.default_rng(seed)
+    x0, y0 = rng.integers(0, 40, (2, count)).astype(float)
+    w, h = rng.integers(0, 8, (2, count))
+    return x0, y0, x0 + w, y0 + h
+
+
+@pytest.mark.parametrize('count', [2, 3, 50, 400])
+def test_pairs_match_brute_force(count):
+    boxes = _random_boxes(count, count)
+    pairs = overlapping_pairs(*boxes)
+    assert pairs.shape[1] == 2
+    assert [tuple(pair) for pair in pairs.tolist()] == _brute_force(*boxes)
+
+
+def test_small_batches_find_the_same_pairs(monkeypatch):
+    boxes = _random_boxes(400, 1)
+    expected = overlapping_pairs(*boxes)
+    monkeypatch.setattr(collisions, 'MAX_CANDIDATES', 7)
+    assert np.array_equal(overlapping_pairs(*boxes), expected)
+
+
+def test_touching_boxes_do_not_overlap():
+    # Side by side, stacked, corner to corner, and the same box twice.
+    x0, y0, x1, y1 = np.array([[0, 0, 1, 1], [1, 0, 2, 1], [0, 1, 1, 2], [1, 1, 2, 2], [1, 1, 2, 2]], float).T
+    assert overlapping_pairs(x0, y0, x1, y1).tolist() == [[3, 4]]
+    # Overlaps within the tolerance are rounding.
+    assert overlapping_pairs([0, 1 - TOLERANCE / 2], [0, 0], [1, 2], [1, 1]).tolist() == []
+    assert overlapping_pairs([0, 0.999], [0, 0], [1, 2], [1, 1]).tolist() == [[0, 1]]
+
+
+@pytest.mark.parametrize('count', [0, 1])
+def test_fewer_than_two_boxes_have_no_pairs(count):
+    low, high = [0.0] * count, [1.0] * count
+    pairs = overlapping_pairs(low, low, high, high)
+    assert pairs.shape == (0, 2) and pairs.dtype == np.intp
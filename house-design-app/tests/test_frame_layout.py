@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.labels import bed_frame, create_frame, new_frame
+from src.labels.frame_layout import LayoutError, LayoutSpec, align_left, center_y, left_of, right_of
+
+# Frame centres and hung sizes the scripts computed by hand before they
+# were moved onto LayoutSpec.
+BASELINE = {
+    'create_frame': {
+        'A3': ((203.4, 134.3), (40.0, 30.0)),
+        'A4-1': ((166.9, 134.3), (21.0, 29.7)),
+        'A4-2': ((239.9, 134.3), (21.0, 29.7)),
+        'A4-3': ((203.4, 165.3), (30.0, 20.0)),
+        '200x150-1': ((142.9, 134.3), (15.0, 20.0)),
+        '200x150-2': ((263.9, 134.3), (15.0, 20.0)),
+        '200x150-3': ((203.4, 105.8), (20.0, 15.0)),
+        '127x178-2': ((120.5, 134.3), (17.8, 12.7)),
+        '127x178-1': ((286.3, 134.3), (17.8, 12.7)),
+    },
+    'new_frame': {
+        'A3': ((203.4, 136.3), (40.0, 30.0)),
+        'A4-1': ((168.9, 151.15), (21.0, 29.7)),
+        'A4-2': ((237.9, 121.45), (21.0, 29.7)),
+        '200x150-1': ((193.4, 162.8), (20.0, 15.0)),
+        '127x178-2': ((217.05, 164.2), (12.7, 17.8)),
+        '200x150-3': ((237.9, 147.8), (20.0, 15.0)),
+        '200x150-2': ((168.9, 124.8), (20.0, 15.0)),
+        '127x178-1': ((237.9, 165.65), (17.8, 12.7)),
+        'A4-3': ((203.4, 107.3), (30.0, 20.0)),
+    },
+    'bed_frame': {
+        'small_frame': ((13.7, 133.75), (13.0, 18.0)),
+        'medium_frame': ((35.2, 139.6), (21.0, 29.7)),
+        'large_frame': ((65.2, 144.75), (30.0, 40.0)),
+    },
+}
+SCRIPTS = {'create_frame': create_frame, 'new_frame': new_frame, 'bed_frame': bed_frame}
+
+
+@pytest.mark.parametrize('script', sorted(BASELINE))
+def test_script_layouts_match_the_baseline(script):
+    layout = SCRIPTS[script].spec.solve()
+    positions, dims = layout.positions(), layout.placed_dims()
+    assert sorted(positions) == sorted(BASELINE[script])
+    for name, (center, size) in BASELINE[script].items():
+        assert positions[name] == pytest.approx(center, abs=1e-9)
+        assert dims[name] == pytest.approx(size)
+
+
+def test_solve_many_matches_solving_each_variant():
+    spec = create_frame.spec
+    rng = np.random.default_rng(0)
+    base = np.array([frame.size for frame in spec.frames])
+    sizes = base * rng.uniform(0.5, 1.5, (6, len(spec), 1))
+    rotated = rng.random((6, len(spec))) < 0.5
+    spacing = rng.uniform(0, 10, 6)
+    centers, placed = spec.solve_many(sizes, rotated, spacing)
+    for variant in range(6):
+        layout = spec.solve(sizes[variant], rotated[variant], spacing[variant])
+        assert np.allclose(centers[variant], layout.centers)
+        assert np.allclose(placed[variant], layout.sizes)
+
+
+def test_centred_group_moves_the_frames_placed_from_it():
+    spec = LayoutSpec((100, 50), spacing=5)
+    spec.add('a', (10, 10), align_left(), center_y())
+    spec.add('b', (20, 10), right_of('a'), center_y('a'))
+    spec.add('c', (10, 10), align_left('b'), center_y(offset=10))
+    spec.center_group(['a', 'b'])
+    boxes = spec.solve().boxes()
+    assert boxes[0, 0] == pytest.approx(32.5) and boxes[1, 2] == pytest.approx(67.5)
+    assert boxes[2, 0] == boxes[1, 0]
+
+
+def test_circular_and_unknown_references_are_rejected():
+    spec = LayoutSpec((100, 50))
+    spec.add('a', (10, 10), left_of('b'), center_y())
+    spec.add('b', (10, 10), right_of('a'), center_y())
+    with pytest.raises(LayoutError, match='Circular'):
+        spec.solve()
+    spec = LayoutSpec((100, 50))
+    spec.add('a', (10, 10), left_of('missing'), center_y())
+    with pytest.raises(LayoutError, match='unknown frame'):
+        spec.solve()
@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.labels import frame_render
+from src.labels.frame_layout import LayoutSpec, align_bottom, align_left
+from src.labels.frame_render import Decoration, build_scene, render_layout
+from src.output_cache import OutputCache
+
+
+def _layout():
+    spec = LayoutSpec((200, 120))
+    spec.add('a', (40, 50), align_left(offset=20), align_bottom(offset=30))
+    spec.add('b', (60, 40), align_left(offset=100), align_bottom(offset=30))
+    return spec.solve()
+
+
+OPTIONS = {'title': 'Wall', 'guides': True, 'midline': 'middle', 'measure': 'both',
+           'decorations': [Decoration(5, 5, 10, 20, 'sienna', 'brown', 'Pot', 'white')]}
+
+
+@pytest.mark.parametrize('backend', ['agg', 'pillow'])
+@pytest.mark.parametrize('image_format, pil_format', [('png', 'PNG'), ('jpeg', 'JPEG')])
+def test_images_have_the_figure_size_and_format(backend, image_format, pil_format):
+    output = io.BytesIO()
+    assert render_layout(_layout(), output, figsize=(4, 3), dpi=50, backend=backend,
+                         image_format=image_format, **OPTIONS) is output
+    image = Image.open(io.BytesIO(output.getvalue()))
+    assert image.format == pil_format
+    assert image.size == (200, 150)
+    # The frames are drawn: the wall has more than its own colour and white.
+    assert len(np.unique(np.asarray(image.convert('RGB')).reshape(-1, 3), axis=0)) > 2
+
+
+@pytest.mark.parametrize('image_format, magic', [('svg', b'<?xml'), ('pdf', b'%PDF')])
+def test_agg_writes_vector_formats(tmp_path, image_format, magic):
+    path = tmp_path / f'wall.{image_format}'
+    render_layout(_layout(), path, figsize=(4, 3), dpi=50, image_format=image_format, **OPTIONS)
+    assert path.read_bytes().startswith(magic)
+
+
+@pytest.mark.parametrize('backend', ['agg', 'pillow'])
+def test_cache_hit_writes_the_same_image(tmp_path, monkeypatch, backend):
+    cache = OutputCache(tmp_path / 'cache')
+    first = tmp_path / 'first.png'
+    render_layout(_layout(), first, figsize=(4, 3), dpi=50, backend=backend, cache=cache, **OPTIONS)
+    # A hit sets up no renderer.
+    def no_renderer(*args):
+        raise AssertionError('renderer created on a cache hit')
+
+    monkeypatch.setattr(frame_render, '_renderers', {})
+    monkeypatch.setitem(frame_render.RENDERERS, backend, no_renderer)
+    second = io.BytesIO()
+    render_layout(_layout(), second, figsize=(4, 3), dpi=50, backend=backend, cache=cache, **OPTIONS)
+    assert second.getvalue() == first.read_bytes()
+
+
+def test_scene_has_a_rect_and_label_per_frame():
+    scene = build_scene(_layout(), labels={'a': 'first'}, measure='top')
+    assert len(scene.rects) == 3 # the wall and two frames
+    assert [text.text for text in scene.texts[:2]] == ['first', 'b']
+    assert len(scene.markers) == 1 and len(scene.markers[0].points) == 2
+    with pytest.raises(ValueError, match='measure'):
+        build_scene(_layout(), measure='left')
+    with pytest.raises(ValueError, match='Unknown backend'):
+        render_layout(_layout(), io.BytesIO(), backend='svg')
@@ -0,0 +1,86 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from src.labels.frame_search import DEFAULT_WEIGHTS, arrange_frames, cluster_spec, score_layouts
+
+WALL = (300.0, 200.0)
+FRAMES = {'a': (40.0, 30.0), 'b': (21.0, 29.7), 'c': (20.0, 15.0), 'd': (12.7, 17.8)}
+
+
+def _scalar_terms(centers, sizes, wall_size, spacing):
+    # The score terms of one layout, frame by frame, as DEFAULT_WEIGHTS
+    # describes them.
+    wall_w, wall_h = wall_size
+    boxes = [(cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2) for (cx, cy), (w, h) in zip(centers, sizes)]
+    areas = [w * h for w, h in sizes]
+    total = sum(areas)
+    typical = sum(w + h for w, h in sizes) / (2 * len(sizes))
+    overlap = 0.0
+    for (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) in itertools.combinations(boxes, 2):
+        overlap += max(min(ax1, bx1) - max(ax0, bx0), 0) * max(min(ay1, by1) - max(ay0, by0), 0)
+    off_wall = sum(area - max(min(x1, wall_w) - max(x0, 0), 0) * max(min(y1, wall_h) - max(y0, 0), 0)
+                   for area, (x0, y0, x1, y1) in zip(areas, boxes))
+    mirror = [min(abs(wall_w - cx - ox) + abs(cy - oy) + abs(w - ow) + abs(h - oh)
+                  for (ox, oy), (ow, oh) in zip(centers, sizes))
+              for (cx, cy), (w, h) in zip(centers, sizes)]
+    balance = (abs(sum(a * cx for a, (cx, _) in zip(areas, centers)) / total - wall_w / 2)
+               + abs(sum(a * cy for a, (_, cy) in zip(areas, centers)) / total - wall_h / 2))
+    misses = []
+    for i, (ax0, ay0, ax1, ay1) in enumerate(boxes):
+        gaps = []
+        for j, (bx0, by0, bx1, by1) in enumerate(boxes):
+            if i != j:
+                dx, dy = max(bx0 - ax1, ax0 - bx1), max(by0 - ay1, ay0 - by1)
+                gaps.append(math.hypot(dx, dy) if dx > 0 and dy > 0 else max(dx, dy))
+        if gaps:
+            misses.append(abs(max(min(gaps), 0) - spacing))
+    return {
+        'overlap': overlap / total,
+        'bounds': off_wall / total,
+        'symmetry': (sum(mirror) / len(mirror) + balance) / typical,
+        'spacing': sum(misses) / len(misses) / typical if misses else 0.0,
+    }
+
+
+def _scalar_score(layout, spacing):
+    terms = _scalar_terms(layout.centers.tolist(), layout.sizes.tolist(), layout.wall_size, spacing)
+    return sum(DEFAULT_WEIGHTS[key] * value for key, value in terms.items())
+
+
+@pytest.mark.parametrize('count', [1, 2, 7])
+def test_batch_scores_match_the_scalar_scorer(count):
+    # Random layouts, with frames overlapping and hanging off the wall.
+    rng = np.random.default_rng(count)
+    centers = rng.uniform(-20, 320, (50, count, 2))
+    sizes = rng.uniform(5, 80, (50, count, 2))
+    scores, terms = score_layouts(centers, sizes, WALL, 6.0)
+    for variant in range(50):
+        expected = _scalar_terms(centers[variant].tolist(), sizes[variant].tolist(), WALL, 6.0)
+        for key, value in expected.items():
+            assert terms[key][variant] == pytest.approx(value, rel=1e-9, abs=1e-12)
+        assert scores[variant] == pytest.approx(sum(DEFAULT_WEIGHTS[k] * v for k, v in expected.items()))
+
+
+def test_exhaustive_search_finds_the_best_candidate():
+    found = arrange_frames(WALL, FRAMES, 6.0, top_k=3)
+    best = math.inf
+    for order in itertools.permutations(FRAMES):
+        for turned in itertools.product((False, True), repeat=len(FRAMES)):
+            spec = cluster_spec(WALL, [(name, FRAMES[name]) for name in order], 6.0, rotated=turned)
+            best = min(best, _scalar_score(spec.solve(), 6.0))
+    assert found[0].score == pytest.approx(best)
+    assert [item.score for item in found] == sorted(item.score for item in found)
+    for item in found:
+        assert item.score == pytest.approx(_scalar_score(item.layout, 6.0))
+
+
+def test_evolutionary_search_scores_match_its_layouts():
+    found = arrange_frames(WALL, FRAMES, 6.0, top_k=3, exhaustive_limit=0, population=64, generations=5)
+    assert len(found) == 3
+    assert [item.score for item in found] == sorted(item.score for item in found)
+    for item in found:
+        assert item.score == pytest.approx(_scalar_score(item.layout, 6.0))
+        assert sorted(item.layout.names) == sorted(FRAMES)
@@ -0,0 +1,15 @@
+import pytest
+
+from src.labels.frame_layout import LayoutSpec, align_bottom, align_left
+from src.labels.frame_vector import export_layouts
+
+
+@pytest.mark.parametrize('suffix', ['.pdf', '.svg'])
+def test_export_accepts_pathlib_paths(tmp_path, suffix):
+    spec = LayoutSpec((200, 120))
+    spec.add('a', (40, 50), align_left(offset=20), align_bottom(offset=30))
+    spec.add('b', (60, 40), align_left(offset=100), align_bottom(offset=30))
+    layout = spec.solve()
+    path = tmp_path / f'wall{suffix}'
+    export_layouts([layout], path, measure='both')
+    assert path.stat().st_size > 0
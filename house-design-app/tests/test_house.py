@@ -0,0 +1,192 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from src.design import house as house_module
+from src.design.geometry import GridIndex, RectColumns
+from src.design.house import House, Wall
+
+COLORS = ['lightblue', 'lightgreen', 'mistyrose']
+
+
+def _wall_values(house):
+    return [(wall.x, wall.y, wall.width, wall.height) for wall in house.walls]
+
+
+def _room_values(house):
+    return [dict(room) for room in house.rooms]
+
+
+def _room(rng):
+    room = {'x': float(rng.randint(0, 500)), 'y': float(rng.randint(0, 500)),
+            'width': float(rng.randint(1, 80)), 'height': float(rng.randint(1, 80))}
+    if rng.random() < 0.8:
+        room['color'] = rng.choice(COLORS)
+    if rng.random() < 0.3:
+        room['name'] = f"room {rng.randint(0, 9)}"
+    return room
+
+
+def _random_house(rng, walls, rooms):
+    house = House()
+    for _ in range(walls):
+        house.add_wall(Wall(rng.uniform(-50, 950), rng.uniform(-50, 950), rng.uniform(0, 60), rng.uniform(0, 60)))
+    for _ in range(rooms):
+        house.add_room(_room(rng))
+    return house
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_walls_and_rooms_edit_like_lists(seed):
+    # Every list edit made on the house's views and on plain lists of the same
+    # values leaves the two equal.
+    rng = random.Random(seed)
+    house = House()
+    walls, rooms = [], []
+    for _ in range(300):
+        room = _room(rng)
+        wall = (float(rng.randint(0, 500)), float(rng.randint(0, 500)), 10.0, float(rng.randint(1, 90)))
+        index = rng.randint(-len(rooms) - 2, len(rooms) + 2)
+        kind = rng.randrange(7)
+        if kind == 0 or not rooms:
+            house.walls.append(Wall(*wall))
+            house.rooms.append(room)
+            walls.append(wall)
+            rooms.append(room)
+        elif kind == 1:
+            house.walls.insert(index, Wall(*wall))
+            house.rooms.insert(index, room)
+            walls.insert(index, wall)
+            rooms.insert(index, room)
+        elif kind == 2:
+            index = rng.randrange(-len(rooms), len(rooms))
+            house.walls[index] = Wall(*wall)
+            house.rooms[index] = room
+            walls[index] = wall
+            rooms[index] = room
+        elif kind == 3:
+            index = rng.randrange(-len(rooms), len(rooms))
+            del house.walls[index]
+            del house.rooms[index]
+            del walls[index]
+            del rooms[index]
+        elif kind == 4:
+            part = slice(rng.randint(0, len(rooms)), rng.randint(0, len(rooms)), rng.choice([None, 1, 2, -1]))
+            del house.walls[part]
+            del house.rooms[part]
+            del walls[part]
+            del rooms[part]
+        elif kind == 5:
+            start = rng.randint(0, len(rooms))
+            part = slice(start, rng.randint(start, len(rooms)))
+            new_rooms = [_room(rng) for _ in range(rng.randint(0, 3))]
+            house.rooms[part] = new_rooms
+            house.walls[part] = [Wall(*wall)] * len(new_rooms)
+            rooms[part] = new_rooms
+            walls[part] = [wall] * len(new_rooms)
+        else:
+            assert house.rooms.pop(index % len(rooms)) is not None
+            house.walls.pop(index % len(walls))
+            rooms.pop(index % len(rooms))
+            walls.pop(index % len(walls))
+        assert _wall_values(house) == walls
+        assert _room_values(house) == [dict(house_module.ROOM_DEFAULTS, **room) for room in rooms]
+
+
+def test_views_of_the_list_can_be_assigned_back():
+    house = House()
+    for i in range(4):
+        house.add_wall(Wall(i, 0, 1, 1))
+        house.add_room({'x': i, 'y': 0, 'width': 1, 'height': 1, 'color': COLORS[i % 3]})
+    house.walls[:] = reversed(house.walls)
+    house.rooms[::2] = house.rooms[1::2]
+    assert [wall.x for wall in house.walls] == [3, 2, 1, 0]
+    assert [room['x'] for room in house.rooms] == [1, 1, 3, 3]
+    house.walls.remove(house.walls[1])
+    assert house.walls.index(house.walls[-1]) == 2
+    assert [wall.x for wall in house.walls] == [3, 1, 0]
+    with pytest.raises(ValueError):
+        house.rooms[::2] = [house.rooms[0]]
+
+
+def test_added_elements_are_copied():
+    house = House()
+    wall = Wall(0, 0, 10, 10)
+    room = {'x': 0, 'y': 0, 'width': 5, 'height': 5, 'color': 'lightblue'}
+    index = house.add_wall(wall)
+    house.add_room(room)
+    wall.x, room['color'] = 50, 'lightgreen'
+    assert house.walls[index].x == 0 and house.rooms[0]['color'] == 'lightblue'
+
+
+def test_list_edits_are_seen_by_changes_and_queries():
+    house = House()
+    house.add_wall(Wall(0, 0, 10, 10))
+    house.add_wall(Wall(100, 100, 10, 10))
+    version = house.version
+    del house.walls[0]
+    assert house.changes_since(version) == [(0.0, 0.0, 10.0, 10.0)]
+    assert house.walls_at(5, 5).tolist() == []
+    assert house.walls_at(105, 105).tolist() == [0]
+    assert house.total_area() == 100
+
+
+def _brute_force(rects, x0, y0, x1, y1):
+    return [i for i, (x, y, w, h) in enumerate(rects) if x <= x1 and x + w >= x0 and y <= y1 and y + h >= y0]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_grid_index_candidates_cover_every_hit(seed):
+    rng = np.random.default_rng(seed)
+    count = 3000
+    # A few rooms large enough to be kept out of the grid.
+    large = rng.random(count) < 0.02
+    columns = RectColumns.from_arrays(rng.uniform(-100, 1000, count), rng.uniform(-100, 1000, count),
+                                      np.where(large, 400, rng.uniform(0, 20, count)),
+                                      np.where(large, 400, rng.uniform(0, 20, count)))
+    rects = columns.data.T.tolist()
+    index = GridIndex(columns)
+    assert len(index.large)
+    for _ in range(200):
+        x0, y0 = rng.uniform(-200, 1100, 2)
+        x1, y1 = x0 + rng.choice([0, 5, 50]), y0 + rng.choice([0, 5, 50])
+        candidates = index.candidates(x0, y0, x1, y1)
+        expected = _brute_force(rects, x0, y0, x1, y1)
+        if candidates is not None:
+            assert set(expected) <= set(candidates.tolist())
+        assert columns.intersecting(x0, y0, x1, y1, candidates).tolist() == expected
+
+
+def test_grid_index_on_empty_columns():
+    index = GridIndex(RectColumns())
+    assert index.candidates(0, 0, 10, 10).tolist() == []
+
+
+@pytest.mark.parametrize('threshold', [0, 10 ** 9])
+def test_queries_match_brute_force(monkeypatch, threshold):
+    # With the grid index and with a plain scan.
+    monkeypatch.setattr(house_module, 'INDEX_THRESHOLD', threshold)
+    rng = random.Random(threshold)
+    house = _random_house(rng, walls=500, rooms=300)
+    walls, rooms = _wall_values(house), [tuple(room[key] for key in ('x', 'y', 'width', 'height'))
+                                         for room in house.rooms]
+    for _ in range(100):
+        x0, y0, x1, y1 = (rng.uniform(-100, 1000) for _ in range(4))
+        box = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        assert house.walls_in(x0, y0, x1, y1).tolist() == _brute_force(walls, *box)
+        assert house.rooms_in(x1, y1, x0, y0).tolist() == _brute_force(rooms, *box)
+        assert house.walls_at(x0, y0).tolist() == _brute_force(walls, x0, y0, x0, y0)
+        assert house.rooms_at(x1, y1).tolist() == _brute_force(rooms, x1, y1, x1, y1)
+    # Edits reach the index.
+    house.walls[0] = Wall(2000, 2000, 5, 5)
+    assert house.walls_at(2002, 2002).tolist() == [0]
+
+
+def test_pickle_round_trip():
+    house = _random_house(random.Random(0), walls=50, rooms=50)
+    copy = pickle.loads(pickle.dumps(house))
+    assert _wall_values(copy) == _wall_values(house)
+    assert _room_values(copy) == _room_values(house)
+    assert copy.layout_hash() == house.layout_hash()
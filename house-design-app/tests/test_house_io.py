@@ -0,0 +1,59 @@
+import os
+import stat
+
+import pytest
+
+from src.design.house import House, Wall
+from src.design.house_io import load_house, save_house
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX permissions')
+@pytest.mark.parametrize('name', ['plan.json', 'plan.hplan'])
+def test_saved_files_follow_the_umask(tmp_path, name):
+    house = House()
+    house.add_wall(Wall(10, 10, 100, 10))
+    umask = os.umask(0o022)
+    try:
+        save_house(house, tmp_path / name)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(tmp_path / name).st_mode) == 0o644
+    assert len(load_house(tmp_path / name).walls) == 1
+
+
+def _house():
+    house = House()
+    house.add_walls([0, 50, 100], [0, 0, 40], [50, 10, 5], [10, 60, 5])
+    house.add_room({'x': 5, 'y': 10, 'width': 40, 'height': 30, 'color': 'lightblue', 'name': 'hall'})
+    house.add_room({'x': 60, 'y': 10, 'width': 40, 'height': 30, 'color': (10, 20, 30)})
+    house.add_room({'x': 60, 'y': 50, 'width': 4, 'height': 3})
+    return house
+
+
+def _values(house):
+    return ([wall.as_dict() for wall in house.walls], [dict(room) for room in house.rooms])
+
+
+@pytest.mark.parametrize('name, mmap', [('plan.json', True), ('plan.hplan', True), ('plan.hplan', False)])
+def test_round_trip_keeps_columns_and_attributes(tmp_path, name, mmap):
+    house = _house()
+    save_house(house, tmp_path / name)
+    loaded = load_house(tmp_path / name, mmap=mmap)
+    assert _values(loaded) == _values(house)
+    assert loaded.layout_hash() == house.layout_hash()
+    assert loaded.total_area() == house.total_area()
+
+
+def test_edits_to_a_memory_mapped_house_stay_in_memory(tmp_path):
+    path = tmp_path / 'plan.hplan'
+    save_house(_house(), path)
+    saved = path.read_bytes()
+    house = load_house(path)
+    house.walls[0].x = 500
+    del house.rooms[0]
+    house.rooms.append({'x': 1, 'y': 2, 'width': 3, 'height': 4, 'color': 'lightgreen'})
+    assert path.read_bytes() == saved
+    assert house.walls[0].x == 500
+    assert [room.get('color') for room in house.rooms] == [(10, 20, 30), None, 'lightgreen']
+    save_house(house, tmp_path / 'edited.hplan')
+    assert _values(load_house(tmp_path / 'edited.hplan')) == _values(house)
@@ -0,0 +1,113 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.design.house import House, Wall
+from src.design import image2d
+from src.design.image2d import IncrementalRenderer, generate_2d_image
+
+IMG_SIZE = (800, 600)
+COLORS = ['lightblue', 'lightgreen', 'mistyrose', 'lavender']
+
+
+def _random_house(rng, walls=60, rooms=30):
+    # Shapes of every thickness, including ones thinner than their outline.
+    house = House()
+    for _ in range(rooms):
+        house.add_room({'x': rng.uniform(-20, 780), 'y': rng.uniform(-20, 580),
+                        'width': rng.choice([rng.uniform(0.5, 5), rng.uniform(5, 200)]),
+                        'height': rng.choice([rng.uniform(0.5, 5), rng.uniform(5, 200)]),
+                        'color': rng.choice(COLORS)})
+    for _ in range(walls):
+        thickness = rng.choice([rng.uniform(0.5, 5), 10])
+        length = rng.uniform(5, 300)
+        w, h = (length, thickness) if rng.random() < 0.5 else (thickness, length)
+        house.add_wall(Wall(rng.uniform(-20, 780), rng.uniform(-20, 580), w, h))
+    return house
+
+
+def _random_edit(rng, house):
+    kind = rng.random()
+    if kind < 0.3:
+        wall = house.walls[rng.randrange(len(house.walls))]
+        wall.x += rng.uniform(-40, 40)
+        wall.y += rng.uniform(-40, 40)
+    elif kind < 0.5:
+        wall = house.walls[rng.randrange(len(house.walls))]
+        wall.height = rng.uniform(0.5, 8)
+    elif kind < 0.7:
+        room = house.rooms[rng.randrange(len(house.rooms))]
+        room['color'] = rng.choice(COLORS)
+    elif kind < 0.85:
+        room = house.rooms[rng.randrange(len(house.rooms))]
+        room['height'] = rng.uniform(0.5, 120)
+    else:
+        house.add_wall(Wall(rng.uniform(-20, 780), rng.uniform(-20, 580), rng.uniform(5, 100), rng.uniform(0.5, 6)))
+
+
+def test_thin_wall_move_matches_full_render():
+    # A wall thinner than its outline is drawn past its box; moving it has
+    # to repaint that spill too.
+    house = House()
+    house.add_room({'x': 600, 'y': 380, 'width': 150, 'height': 60, 'color': 'lightblue'})
+    house.add_wall(Wall(645.24, 403.03, 82.53, 1.74))
+    renderer = IncrementalRenderer(house, IMG_SIZE)
+    renderer.render()
+    house.walls[0].y += 20
+    assert np.array_equal(np.asarray(renderer.render()), np.asarray(generate_2d_image(house, IMG_SIZE)))
+    assert renderer.repainted_regions > 0
+
+
+@pytest.mark.parametrize('backend', ['pillow', 'numpy'])
+@pytest.mark.parametrize('seed', range(3))
+def test_random_edits_match_full_render(backend, seed):
+    rng = random.Random(seed)
+    house = _random_house(rng)
+    renderer = IncrementalRenderer(house, IMG_SIZE, backend)
+    renderer.render()
+    for _ in range(40):
+        for _ in range(rng.randint(1, 4)):
+            _random_edit(rng, house)
+        frame = np.asarray(renderer.render())
+        assert renderer.repainted_regions is not None
+        assert np.array_equal(frame, np.asarray(generate_2d_image(house, IMG_SIZE, backend=backend)))
+
+
+@pytest.fixture(params=['sliced', 'batched'])
+def room_painting(request, monkeypatch):
+    # Forces rooms to be painted one slice at a time or in one batch.
+    monkeypatch.setattr(image2d, 'ROOM_SLICE_COST', 0 if request.param == 'sliced' else 10 ** 9)
+    monkeypatch.setattr(image2d, 'ROOM_SLICE_PIXELS', 10 ** 12)
+    return request.param
+
+
+@pytest.mark.parametrize('viewport', [None, (100.5, 50, 400.5, 250), (0, 0, 1600, 1200)])
+@pytest.mark.parametrize('seed', range(5))
+def test_numpy_backend_matches_pillow(viewport, seed, room_painting):
+    # Including the outlines Pillow draws past boxes thinner than them, and
+    # rooms filled with the outline colour, which get no outline at all.
+    house = _random_house(random.Random(seed), walls=200, rooms=100)
+    house.add_room({'x': 50, 'y': 50, 'width': 3, 'height': 40, 'color': '#808080'})
+    house.add_room({'x': 70, 'y': 50, 'width': 3, 'height': 40, 'color': (10, 20, 30)})
+    size = IMG_SIZE if viewport is None else (300, 200)
+    expected = generate_2d_image(house, size, viewport)
+    assert np.array_equal(np.asarray(generate_2d_image(house, size, viewport, 'numpy')), np.asarray(expected))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_paint_in_order_matches_slicing_one_by_one(seed):
+    # Including empty slices, single pixels and slices over the whole canvas.
+    rng = np.random.default_rng(seed)
+    count = 300
+    top, left = rng.integers(0, 60, count), rng.integers(0, 90, count)
+    bottom = np.minimum(top + rng.choice([0, 1, 2, 5, 40, 70], count), 60)
+    right = np.minimum(left + rng.choice([0, 1, 3, 8, 50, 90], count), 90)
+    top[:3], bottom[:3], left[:3], right[:3] = 0, 60, 0, 90
+    values = rng.integers(1, 6, count).astype(np.uint8)
+    expected = np.zeros((60, 90), dtype=np.uint8)
+    for t, b, l, r, value in zip(top, bottom, left, right, values):
+        expected[t:b, l:r] = value
+    canvas = np.zeros((60, 90), dtype=np.uint8)
+    image2d._paint_in_order(canvas, top, bottom, left, right, values)
+    assert np.array_equal(canvas, expected)
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules timed with `python -X importtime`, and the most each may take.
+# None of them may import HEAVY_MODULES at import time; those load when a
+# job needs them. benchmarks/run_benchmarks.py times the same modules.
+IMPORT_BUDGETS = {
+    "src": 0.05,
+    "src.cli": 0.2,
+    "src.design.house": 0.3,
+    "src.design.image2d": 0.4,
+    "src.design.batch": 0.4,
+    "src.labels.label_print": 0.3,
+    "src.labels.create_frame": 0.3,
+    "src.labels.frame_search": 0.3,
+}
+HEAVY_MODULES = ("pandas", "reportlab", "matplotlib", "scipy")
+
+
+def parse_importtime(stderr, module):
+    # Seconds spent importing `module` (its parent packages included) and
+    # the heavy modules that came in with it, from `-X importtime` output.
+    parents = {".".join(module.split(".")[:i]) for i in range(1, module.count(".") + 2)}
+    seconds = 0.0
+    heavy = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue # the header
+        if name.strip().split(".")[0] in HEAVY_MODULES:
+            heavy.add(name.strip().split(".")[0])
+        if name[1:2] != " " and name.strip() in parents: # top level, not nested
+            seconds += int(cumulative) / 1e6
+    return seconds, heavy
+
+
+def measure_import(module):
+    # (seconds, heavy modules loaded) for importing `module` in a fresh
+    # interpreter.
+    finished = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(finished.stderr, module)
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+def test_import_stays_light(module):
+    # Best of three, so one slow start on a busy machine does not fail it.
+    samples = [measure_import(module) for _ in range(3)]
+    assert set().union(*(heavy for _, heavy in samples)) == set()
+    assert min(seconds for seconds, _ in samples) <= IMPORT_BUDGETS[module]
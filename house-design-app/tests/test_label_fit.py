@@ -0,0 +1,73 @@
+import io
+import random
+
+import pytest
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen import canvas
+
+from src.labels.label_fit import (
+    MIN_FONT_SIZE, FitResult, ParagraphFitCache, _wrap, fit_paragraph, paragraph_style_for_size,
+)
+
+WORDS = ['Teak', 'Cabinet', 'Solid', 'Oak', 'Drawer', 'Extra-long-handle', 'Walnut', '(Set of 4)', 'Shelf']
+
+
+def _linear_fit_size(canv, markup, base_style, available_width, available_height):
+    # The original shrink loop: half a point at a time until the paragraph
+    # fits or MIN_FONT_SIZE is reached.
+    font_size = base_style.fontSize
+    while True:
+        style = paragraph_style_for_size(base_style, font_size)
+        _, w, h = _wrap(canv, markup, style, available_width, available_height)
+        if (w <= available_width and h <= available_height) or font_size <= MIN_FONT_SIZE:
+            return font_size
+        font_size -= 0.5
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ParagraphFitCache(maxsize=2)
+    cache.put('a', FitResult(10, 1, 1))
+    cache.put('b', FitResult(9, 1, 1))
+    assert cache.get('a') == FitResult(10, 1, 1)
+    cache.put('c', FitResult(8, 1, 1))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.cache_info().currsize == 2
+
+
+def test_hit_and_miss_counters():
+    cache = ParagraphFitCache()
+    canv = canvas.Canvas(io.BytesIO())
+    style = ParagraphStyle('product', fontName='Helvetica', fontSize=12)
+    for markup in ['Oak shelf', 'Teak cabinet', 'Oak shelf', 'Oak shelf']:
+        fit_paragraph(canv, markup, style, 80, 40, fit_cache=cache)
+    assert cache.cache_info() == (2, 2, 4096, 2)
+    cache.clear()
+    assert cache.cache_info() == (0, 0, 4096, 0)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_bisected_size_matches_linear_walk(seed):
+    rng = random.Random(seed)
+    canv = canvas.Canvas(io.BytesIO())
+    for _ in range(60):
+        markup = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        style = ParagraphStyle('product', fontName='Helvetica', fontSize=rng.choice([8, 10, 12, 14.5]))
+        width, height = rng.uniform(20, 200), rng.uniform(8, 90)
+        paragraph, _, _ = fit_paragraph(canv, markup, style, width, height)
+        assert paragraph.style.fontSize == _linear_fit_size(canv, markup, style, width, height)
+
+
+@pytest.mark.parametrize('markup, font_size, width, height', [
+    # Fits at 9.5pt but not at 7.5pt, where the hyphenated word breaks
+    # differently, so a bisection would settle on 6pt.
+    ('Oak Extra-long-handle Shelf', 12, 62.6, 23.1),
+    ('Teak cabinet', 4, 10, 3),
+    ('Teak cabinet', 3.5, 10, 3),
+    ('', 12, 10, 3),
+])
+def test_fit_matches_linear_walk(markup, font_size, width, height):
+    canv = canvas.Canvas(io.BytesIO())
+    style = ParagraphStyle('product', fontName='Helvetica', fontSize=font_size)
+    paragraph, _, _ = fit_paragraph(canv, markup, style, width, height)
+    assert paragraph.style.fontSize == _linear_fit_size(canv, markup, style, width, height)
@@ -0,0 +1,99 @@
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.styles import PatternFill
+
+from src.labels.label_ingest import RejectedRow, ValidationReport, load_sorted_rows
+
+
+def test_xlsx_with_numeric_dimension_cells(tmp_path):
+    # openpyxl returns typed cells; a chunk whose dimensions are all numbers
+    # must still be parsed as text and rejected, not break the split.
+    path = tmp_path / 'labels.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Product', 'Dimensions'])
+    for row in [('a', '4*3'), ('b', '5*2'), ('c', 35), ('d', 4.5)]:
+        sheet.append(row)
+    workbook.save(path)
+
+    buckets, report = load_sorted_rows(str(path), 'Product', 'Dimensions', chunksize=2)
+    rows = list(buckets)
+    buckets.close()
+    assert len(rows) == 4
+    assert report.rejected_count == 2
+    assert {row.product: row.reason for row in report.rejected} == {
+        'c': 'expected WIDTH*HEIGHT', 'd': 'expected WIDTH*HEIGHT'}
+
+
+def _rows(source, **kwargs):
+    buckets, report = load_sorted_rows(source, 'Product', 'Dimensions', **kwargs)
+    rows = [(product, dims) for product, dims, _, _ in buckets]
+    buckets.close()
+    return rows, report
+
+
+def test_xlsx_drops_trailing_blank_rows_like_read_excel(tmp_path):
+    # read_only sheets yield the rows that only carry formatting; blank rows
+    # between data rows are kept, as pd.read_excel keeps them.
+    path = tmp_path / 'labels.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Product', 'Dimensions', 'Note'])
+    for row in [('a', '4*3'), (None, None), ('b', '5*2')]:
+        sheet.append(row)
+    for row in range(5, 15):
+        sheet.cell(row=row, column=1).fill = PatternFill('solid', fgColor='FFFF00')
+    workbook.save(path)
+
+    rows, report = _rows(str(path), chunksize=2)
+    assert len(rows) == report.total_rows == len(pd.read_excel(path)) == 3
+    assert sorted(rows) == [('a', '4*3'), ('b', '5*2'), ('nan', 'nan')]
+
+
+@pytest.mark.parametrize('blank', [None, float('nan'), pd.NA])
+def test_blank_cells_read_the_same_from_every_source(tmp_path, blank):
+    csv_path = tmp_path / 'labels.csv'
+    csv_path.write_text('Product,Dimensions\n,4*3\nb,\n')
+    xlsx_path = tmp_path / 'labels.xlsx'
+    workbook = openpyxl.Workbook()
+    for row in [('Product', 'Dimensions'), (None, '4*3'), ('b', None)]:
+        workbook.active.append(row)
+    workbook.save(xlsx_path)
+    frame = pd.DataFrame({'Product': [blank, 'b'], 'Dimensions': ['4*3', blank]}, dtype=object)
+    records = [{'Product': blank, 'Dimensions': '4*3'}, ('b', blank)]
+
+    results = [_rows(source) for source in (str(csv_path), str(xlsx_path), frame, records)]
+    for rows, report in results:
+        assert rows == [('nan', '4*3'), ('b', 'nan')]
+        assert [(row.product, row.dimensions) for row in report.rejected] == [('b', 'nan')]
+
+
+def test_each_rejected_row_says_why():
+    records = [('ok', '4*3'), ('blank', None), ('one', '4'), ('three', '4*3*2'), ('word', 'four*3'),
+               ('zero', '0*3'), ('negative', '4*-1')]
+    rows, report = _rows(records, default_label_width_cm=4.5, default_label_height_cm=3.0)
+    assert report.total_rows == len(rows) == 7
+    assert [tuple(row) for row in report.rejected] == [
+        (1, 'blank', 'nan', 'missing dimensions'),
+        (2, 'one', '4', 'expected WIDTH*HEIGHT'),
+        (3, 'three', '4*3*2', 'expected WIDTH*HEIGHT'),
+        (4, 'word', 'four*3', 'width or height is not a number'),
+        (5, 'zero', '0*3', 'width and height must be positive'),
+        (6, 'negative', '4*-1', 'width and height must be positive'),
+    ]
+
+
+def test_rejected_rows_are_counted_past_the_kept_cap():
+    report = ValidationReport(max_rejected_kept=3)
+    for i in range(5):
+        report.add_rejected(RejectedRow(i, f'p{i}', 'x', 'expected WIDTH*HEIGHT'))
+    assert report.rejected_count == 5
+    assert [row.row for row in report.rejected] == [0, 1, 2]
+    assert len(report.as_dict()['rejected']) == 3
+
+    # Row numbers run on across chunks, and loading keeps the default cap.
+    _, report = _rows([(f'p{i}', 'bad') for i in range(1500)], chunksize=400)
+    assert report.rejected_count == 1500
+    assert len(report.rejected) == report.max_rejected_kept == 1000
+    assert [row.row for row in report.rejected[398:402]] == [398, 399, 400, 401]
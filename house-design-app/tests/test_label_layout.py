@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from src.design.collisions import check_boxes
+from src.labels.label_layout import A4, LAYOUT_STRATEGIES, cm, plan_layout
+
+SIZES = [(3.5 * cm, 3.5 * cm), (4 * cm, 2.5 * cm), (4.5 * cm, 3 * cm), (6 * cm, 4 * cm), (2 * cm, 2 * cm)]
+
+
+def _collisions(placements):
+    # (overlapping pairs, labels off the sheet) over every page.
+    pairs, outside = 0, 0
+    for page in {placement.page for placement in placements}:
+        on_page = [p for p in placements if p.page == page]
+        found = check_boxes([p.x for p in on_page], [p.y for p in on_page],
+                            [p.x + p.width for p in on_page], [p.y + p.height for p in on_page],
+                            (0.0, 0.0) + A4)
+        pairs += len(found.pairs)
+        outside += len(found.out_of_bounds)
+    return pairs, outside
+
+
+@pytest.mark.parametrize('strategy', sorted(LAYOUT_STRATEGIES))
+def test_full_page_template_then_other_size(strategy):
+    # A page opened on a remembered template must not hand its first slot
+    # to a label of another size.
+    placements = plan_layout([(3.5 * cm, 3.5 * cm)] * 36 + [(4 * cm, 2.5 * cm)] * 5, strategy=strategy)
+    assert _collisions(placements) == (0, 0)
+
+
+@pytest.mark.parametrize('strategy', sorted(LAYOUT_STRATEGIES))
+@pytest.mark.parametrize('seed', range(5))
+def test_mixed_sizes_never_overlap(strategy, seed):
+    rng = random.Random(seed)
+    sizes = []
+    for _ in range(12):
+        # Runs of one size, as sorted catalogues give, mixed with strays.
+        sizes += [rng.choice(SIZES)] * rng.randint(1, 80)
+    placements = plan_layout(sizes, strategy=strategy)
+    assert len(placements) == len(sizes)
+    assert _collisions(placements) == (0, 0)
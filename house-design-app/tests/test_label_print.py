@@ -0,0 +1,106 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+import reportlab
+from pypdf import PdfReader
+
+from src.labels.label_print import LabelInputError, LabelRenderer, create_labels_pdf
+from src.output_cache import OutputCache
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+SIZES = ['4*3', '5*2', '3*3', '6*4', 'oops']
+
+
+def _catalogue(path, rows):
+    lines = ['Product Name,Dimensions']
+    for i in range(rows):
+        lines.append(f"Item {i} café ü{'x' * (i % 7)} (set {i % 5}),{SIZES[i % len(SIZES)]}")
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def _page_texts(path):
+    return [page.extract_text() for page in PdfReader(path).pages]
+
+
+@pytest.mark.parametrize('font_path', [None, VERA])
+def test_parallel_render_matches_serial(tmp_path, font_path):
+    source = _catalogue(tmp_path / 'labels.csv', 600)
+    outputs = {}
+    for workers in (1, 3):
+        output = str(tmp_path / f'labels-{workers}.pdf')
+        report = create_labels_pdf(source, output, tamil_font_path=font_path, workers=workers, pages_per_shard=2)
+        outputs[workers] = output, report
+
+    (serial, serial_report), (parallel, parallel_report) = outputs[1], outputs[3]
+    assert parallel_report.pages == serial_report.pages == len(PdfReader(serial).pages) > 6
+    assert parallel_report.labels == serial_report.labels == 600
+    assert _page_texts(parallel) == _page_texts(serial)
+    # Shards embed one shared font subset, so the joined PDF is not much
+    # bigger than the serial one.
+    assert os.path.getsize(parallel) < 1.1 * os.path.getsize(serial)
+
+
+def test_render_writes_the_pdf_and_reports_it(tmp_path):
+    source = _catalogue(tmp_path / 'labels.csv', 40)
+    output = tmp_path / 'labels.pdf'
+    with LabelRenderer() as renderer:
+        report = renderer.render(source, str(output))
+        assert renderer.jobs_rendered == 1
+    assert report.output_pdf_path == str(output)
+    assert report.labels == report.validation.total_rows == 40
+    assert report.pages == len(PdfReader(output).pages)
+    # Every fifth size is 'oops' and is printed at the default size.
+    assert report.validation.rejected_count == len(report.rejected_rows) == 8
+    assert {'ingest', 'layout', 'drawing', 'save'} <= set(report.timings)
+
+
+def test_cached_jobs_are_written_whole(tmp_path):
+    source = _catalogue(tmp_path / 'labels.csv', 40)
+    out = tmp_path / 'out'
+    out.mkdir()
+    with LabelRenderer(cache=OutputCache(tmp_path / 'cache')) as renderer:
+        first = renderer.render(source, str(out / 'first.pdf'))
+        second = renderer.render(source, str(out / 'second.pdf'))
+    assert (first.cached_document, second.cached_document) == (False, True)
+    assert (second.labels, second.pages) == (first.labels, first.pages)
+    assert (out / 'second.pdf').read_bytes() == (out / 'first.pdf').read_bytes()
+    # Both went through a temporary file beside them, which is gone.
+    assert sorted(os.listdir(out)) == ['first.pdf', 'second.pdf']
+
+
+def test_render_bytes_matches_rendering_to_a_file(tmp_path):
+    source = _catalogue(tmp_path / 'labels.csv', 40)
+    with LabelRenderer() as renderer:
+        to_file = renderer.render(source, str(tmp_path / 'labels.pdf'))
+        in_memory = renderer.render_bytes(source)
+    assert in_memory.output_pdf_path is None and to_file.pdf_bytes is None
+    assert in_memory.pdf_bytes.startswith(b'%PDF')
+    assert (in_memory.labels, in_memory.pages) == (to_file.labels, to_file.pages)
+    assert _page_texts(io.BytesIO(in_memory.pdf_bytes)) == _page_texts(tmp_path / 'labels.pdf')
+
+
+def test_render_batch_takes_paths_frames_and_records(tmp_path):
+    source = _catalogue(tmp_path / 'labels.csv', 10)
+    frame = pd.read_csv(source, dtype=str)
+    records = list(frame.itertuples(index=False, name=None))
+    stream = io.BytesIO()
+    with LabelRenderer() as renderer:
+        reports = list(renderer.render_batch([(source, stream), frame, records]))
+        assert renderer.jobs_rendered == 3
+    assert [report.labels for report in reports] == [10, 10, 10]
+    assert reports[0].pdf_bytes is None and stream.getvalue().startswith(b'%PDF')
+    texts = _page_texts(io.BytesIO(stream.getvalue()))
+    assert all(_page_texts(io.BytesIO(report.pdf_bytes)) == texts for report in reports[1:])
+
+
+def test_unreadable_inputs_raise_label_input_error(tmp_path):
+    (tmp_path / 'labels.csv').write_text('Name,Size\na,4*3\n')
+    with LabelRenderer() as renderer:
+        with pytest.raises(LabelInputError, match='not found'):
+            renderer.render(str(tmp_path / 'missing.csv'), io.BytesIO())
+        with pytest.raises(LabelInputError, match='Missing required columns'):
+            renderer.render(str(tmp_path / 'labels.csv'), io.BytesIO())
+    assert create_labels_pdf(str(tmp_path / 'missing.csv'), str(tmp_path / 'out.pdf')) is None
@@ -0,0 +1,69 @@
+import io
+
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+from src.labels.label_shapes import LabelShapeDrawer
+
+
+def _draw(draw, **kwargs):
+    # Runs draw(drawer) on an uncompressed canvas and returns the pages read
+    # back.
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pageCompression=0)
+    draw(LabelShapeDrawer(c, **kwargs))
+    c.save()
+    return PdfReader(io.BytesIO(buffer.getvalue())).pages
+
+
+# Path painting, colour, curve and XObject operators
+OPS = {'re', 'c', 'B', 'B*', 'f', 'f*', 'S', 'rg', 'RG', 'Do'}
+
+
+def _ops(stream):
+    return [token for token in stream.get_data().decode().split() if token in OPS]
+
+
+def test_rects_are_filled_and_outlined_by_one_op():
+    def draw(shapes):
+        shapes.rect(10, 10, 50, 30)
+        shapes.rect(70, 10, 50, 30)
+        shapes.show_page()
+        shapes.rect(10, 10, 50, 30)
+
+    first, second = _draw(draw)
+    # Colours are set once per page; no separate fill or stroke op.
+    assert _ops(first.get_contents()) == ['rg', 'RG', 're', 'B*', 're', 'B*']
+    assert _ops(second.get_contents()) == ['rg', 'RG', 're', 'B*']
+
+
+def test_circles_of_one_size_share_a_form():
+    def draw(shapes):
+        shapes.circle(10, 100, 40)
+        shapes.circle(60, 100, 40)
+        shapes.circle(110, 100, 20)
+        shapes.show_page()
+        shapes.circle(10, 100, 40)
+
+    first, second = _draw(draw)
+    assert _ops(first.get_contents()) == ['Do', 'Do', 'Do']
+    forms = first['/Resources']['/XObject']
+    assert sorted(forms) == ['/FormXob.label-circle-20x20', '/FormXob.label-circle-40x40']
+    # The form is four curves filled and outlined together, written once for
+    # the whole document.
+    form = forms['/FormXob.label-circle-40x40']
+    assert _ops(form.get_object()) == ['rg', 'RG', 'c', 'c', 'c', 'c', 'B*']
+    assert second['/Resources']['/XObject'].raw_get('/FormXob.label-circle-40x40') == \
+        forms.raw_get('/FormXob.label-circle-40x40')
+
+
+def test_form_shapes_choose_between_forms_and_inline_paths():
+    def draw(shapes):
+        shapes.rect(10, 10, 50, 30)
+        shapes.circle(10, 100, 40)
+
+    (inline,) = _draw(draw, form_shapes=())
+    assert _ops(inline.get_contents()) == ['rg', 'RG', 're', 'B*', 'c', 'c', 'c', 'c', 'B*']
+    (forms,) = _draw(draw, form_shapes=('circle', 'rect'))
+    assert _ops(forms.get_contents()) == ['Do', 'Do']
+    assert len(forms['/Resources']['/XObject']) == 2
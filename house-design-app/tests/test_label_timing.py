@@ -0,0 +1,67 @@
+import pytest
+
+from src.labels import label_timing
+from src.labels.label_timing import PhaseTimer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A perf_counter that only moves when the test advances it.
+    now = [0.0]
+    monkeypatch.setattr(label_timing.time, 'perf_counter', lambda: now[0])
+
+    def advance(seconds):
+        now[0] += seconds
+
+    return advance
+
+
+def test_nested_phases_count_each_second_once(clock):
+    timer = PhaseTimer()
+    with timer.phase('layout'):
+        clock(1)
+        with timer.phase('text_fitting'):
+            clock(2)
+        clock(3)
+        with timer.phase('layout'):
+            clock(4)
+    with timer.phase('save'):
+        clock(5)
+    assert timer.as_dict() == {'layout': 8, 'text_fitting': 2, 'save': 5}
+    assert sum(timer.totals.values()) == 15
+
+
+def test_timed_iter_counts_only_producing_items(clock):
+    def produce():
+        for item in 'abc':
+            clock(1)
+            yield item
+
+    timer = PhaseTimer()
+    with timer.phase('drawing'):
+        for item in timer.timed_iter('layout', produce()):
+            clock(10) # the consumer's time stays in 'drawing'
+    assert timer.as_dict() == {'layout': 3, 'drawing': 30}
+
+
+def test_a_failing_phase_is_still_stopped(clock):
+    timer = PhaseTimer()
+    with pytest.raises(ValueError):
+        with timer.phase('ingest'):
+            clock(2)
+            raise ValueError
+    clock(5)
+    with timer.phase('sort'):
+        clock(1)
+    assert timer.as_dict() == {'ingest': 2, 'sort': 1}
+
+
+def test_merge_adds_to_existing_phases(clock):
+    timer = PhaseTimer()
+    with timer.phase('drawing'):
+        clock(1)
+    timer.merge({'drawing': 2.5, 'font_registration': 0.5})
+    totals = timer.as_dict()
+    assert totals == {'drawing': 3.5, 'font_registration': 0.5}
+    totals['drawing'] = 0 # as_dict is a copy
+    assert timer.totals['drawing'] == 3.5
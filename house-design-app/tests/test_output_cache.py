@@ -0,0 +1,28 @@
+import os
+
+from src.output_cache import OutputCache, cache_key
+
+
+def test_overwriting_a_key_counts_its_size_once(tmp_path):
+    cache = OutputCache(tmp_path, max_bytes=1000)
+    key = cache_key('test', 1)
+    for _ in range(5):
+        cache.put(key, b'x' * 300)
+    assert cache.stats()['bytes'] == 300
+    cache.put(key, b'x' * 100)
+    assert cache.stats()['bytes'] == 100
+    assert cache.get(key) == b'x' * 100
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = OutputCache(tmp_path, max_bytes=1000)
+    keys = [cache_key('test', i) for i in range(4)]
+    for key in keys[:3]:
+        cache.put(key, b'x' * 300)
+    # Last used: keys[1], then keys[2], then keys[0]
+    for key, used_at in zip(keys, (3000, 1000, 2000)):
+        os.utime(cache._path(key), (used_at, used_at))
+    cache.put(keys[3], b'x' * 300)
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) == b'x' * 300 for key in (keys[0], keys[2], keys[3]))
+    assert cache.stats()['bytes'] == 900
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.design.house import House, Wall
+from src.design.image2d import generate_2d_image
+from src.design.tiles import TileRenderer
+
+
+def _house():
+    house = House()
+    house.add_room({'x': 0, 'y': 0, 'width': 700, 'height': 500, 'color': 'lightblue'})
+    house.add_wall(Wall(100, 100, 600, 10))
+    house.add_wall(Wall(100, 100, 10, 400))
+    return house
+
+
+def test_cached_tiles_are_kept_apart_by_tile_size(tmp_path):
+    house = _house()
+    for tile_size in (128, 256, 128):
+        renderer = TileRenderer(house, tile_size=tile_size, cache_dir=tmp_path)
+        tile = renderer.render_tile(1, 0, 0)
+        assert tile.size == (tile_size, tile_size)
+        assert np.array_equal(np.asarray(tile), np.asarray(renderer.draw_tile(1, 0, 0)))
+    assert sorted(p.name for p in (tmp_path / house.layout_hash()).iterdir()) == ['128', '256']
+
+
+def _seam_house():
+    # Thin walls and rooms next to the 64-unit tile edges, whose outlines
+    # spill over into the neighbouring tile.
+    rng = random.Random(0)
+    house = _house()
+    for edge in range(64, 700, 64):
+        for offset in (-3, -1.5, 0, 1):
+            thickness = rng.choice([1, 2.5, 3])
+            house.add_wall(Wall(edge + offset, rng.uniform(0, 450), thickness, rng.uniform(10, 60)))
+            house.add_wall(Wall(rng.uniform(0, 650), edge + offset, rng.uniform(10, 60), thickness))
+            house.add_room({'x': edge + offset - 2, 'y': rng.uniform(0, 450), 'width': thickness,
+                            'height': 30, 'color': 'lightgreen'})
+    return house
+
+
+@pytest.mark.parametrize('zoom_out', [0, 1])
+def test_tiles_have_no_seams(zoom_out):
+    house = _seam_house()
+    renderer = TileRenderer(house, tile_size=64)
+    z = renderer.max_zoom - zoom_out
+    scale = 2 ** -zoom_out
+    mosaic = renderer.render_viewport(z, 0, 0, 640, 448)
+    # The whole plan drawn at once, cut down to the same region.
+    whole = generate_2d_image(house, (round(1024 * scale), round(1024 * scale)), (0, 0, 1024, 1024))
+    expected = whole.crop((0, 0, round(640 * scale), round(448 * scale)))
+    assert np.array_equal(np.asarray(mosaic), np.asarray(expected))